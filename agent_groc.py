@@ -7,33 +7,83 @@ import os
 import json
 import hashlib
 from tools.crm_logger_tool import crm_logger_tool
+from data_store import get_table, get_partition, row_count, DATA_PATH
+from tracing import traced
+from claims_index import get_claims_index
+from collections_job import recompute_overdue
+from schema import RecordView
+from deadline import check_deadline
+from async_runtime import run_blocking
 
 # Data folder
-DATA_PATH = os.path.join(os.path.dirname(__file__), "data")
 CUSTOMER_FILE = os.path.join(DATA_PATH, "customers.csv")
 CLAIMS_FILE = os.path.join(DATA_PATH, "claims.csv")
 PAYMENT_FILE = os.path.join(DATA_PATH, "payments.csv")
 SOP_FILE = os.path.join(DATA_PATH, "sop.json")
 
+# Checked in order; the first domain with a matching keyword handles the goal
+DOMAIN_KEYWORDS = (
+    ("verification", ("verify", "identity", "who am i", "my name")),
+    ("payment", ("emi", "payment", "due date", "installment", "balance", "paid")),
+    ("claim", ("claim", "accident", "damage", "theft", "status")),
+    ("sop", ("sop", "procedure", "insurance", "coverage", "policy")),
+)
+
 
 class AutoFinanceGROC:
     def __init__(self, model_name="mistral"):
         self.model_name = model_name
-        self.customers = self._load_csv(CUSTOMER_FILE)
-        self.claims = self._load_csv(CLAIMS_FILE)
-        self.payments = self._load_csv(PAYMENT_FILE)
+        self._views = {}  # table name -> (shared source table, normalized view)
+        self._records = {}  # table name -> (normalized view, RecordView over it)
         self.sop = self._load_json(SOP_FILE)
 
     # ----------------------------------------------------------------
-    # Helpers
+    # Live tables
     # ----------------------------------------------------------------
-    def _load_csv(self, file_path):
-        """Load CSV flexibly and normalize column headers"""
-        if not os.path.exists(file_path):
-            return pd.DataFrame()
-
-        df = pd.read_csv(file_path, dtype=str).fillna("")
+    # Tables come from the process-wide data store on every access, so a
+    # long-lived agent sees appended claims/payments without a restart.
+    # Handlers pass the customer, so the partitioned layout loads just that
+    # customer's shard (get_partition is the whole table in the flat layout).
+    def _view(self, name, customer_id=None):
+        source = get_table(name) if customer_id is None else get_partition(name, customer_id)
+        cached = self._views.get(name)
+        if cached is None or cached[0] is not source:
+            cached = self._views[name] = (source, self._normalize_columns(source))
+        return cached[1]
+
+    @property
+    def customers(self):
+        return self._view("customers")
+
+    @property
+    def claims(self):
+        return self._view("claims")
+
+    @property
+    def payments(self):
+        return self._view("payments")
+
+    @property
+    def claims_index(self):
+        return self._claims_snapshot()[1]
+
+    def _record_view(self, name, view):
+        """Slotted single-row access for a view (cheaper than building a Series per lookup)."""
+        cached = self._records.get(name)
+        if cached is None or cached[0] is not view:
+            cached = self._records[name] = (view, RecordView(view))
+        return cached[1]
+
+    def _claims_snapshot(self, customer_id=None):
+        """Claims view plus its index (claims per customer, ordered by parsed incident date)."""
+        claims = self._view("claims", customer_id)
+        return claims, get_claims_index(self._views["claims"][0])
 
+    # ----------------------------------------------------------------
+    # Helpers
+    # ----------------------------------------------------------------
+    def _normalize_columns(self, df):
+        """Normalize column headers of a shared table without copying its data"""
         # Normalize column names (case-insensitive + alias handling)
         rename_map = {}
         for col in df.columns:
@@ -55,7 +105,7 @@ class AutoFinanceGROC:
             elif c == "outstanding_balance":
                 rename_map[col] = "Balance"
         if rename_map:
-            df = df.rename(columns=rename_map)
+            df = df.rename(columns=rename_map, copy=False)
 
         return df
 
@@ -79,21 +129,33 @@ class AutoFinanceGROC:
     # ----------------------------------------------------------------
     # Main entrypoint
     # ----------------------------------------------------------------
-    def handle_goal(self, user_goal: str, context: dict = None):
+    @staticmethod
+    def classify(user_goal: str):
+        """Domain handle_goal would route a goal to ('verification', 'payment', 'claim', 'sop') or None."""
         user_goal_lower = user_goal.lower()
+        for domain, keywords in DOMAIN_KEYWORDS:
+            if any(k in user_goal_lower for k in keywords):
+                return domain
+        return None
+
+    @traced("groc.handle_goal")
+    def handle_goal(self, user_goal: str, context: dict = None):
         customer_id = context.get("customer_id") if context else None
+        # Don't start a lookup for a turn whose deadline has already passed
+        check_deadline("groc.handle_goal")
 
         try:
-            if any(k in user_goal_lower for k in ["verify", "identity", "who am i", "my name"]):
+            domain = self.classify(user_goal)
+            if domain == "verification":
                 return self._handle_verification(user_goal, customer_id)
 
-            if any(k in user_goal_lower for k in ["emi", "payment", "due date", "installment", "balance", "paid"]):
+            if domain == "payment":
                 return self._handle_payment(user_goal, customer_id)
 
-            if any(k in user_goal_lower for k in ["claim", "accident", "damage", "theft", "status"]):
+            if domain == "claim":
                 return self._handle_claim(user_goal, customer_id)
 
-            if any(k in user_goal_lower for k in ["sop", "procedure", "insurance", "coverage", "policy"]):
+            if domain == "sop":
                 return self._handle_sop(user_goal, customer_id)
 
             return "GROC Agent: I couldn't identify the domain for this request. Please clarify: payment, claim, or coverage?"
@@ -103,16 +165,21 @@ class AutoFinanceGROC:
             print(error_msg)
             return error_msg
 
+    async def ahandle_goal(self, user_goal: str, context: dict = None):
+        """Async handle_goal(); the pandas lookups run on the blocking-work pool."""
+        return await run_blocking(self.handle_goal, user_goal, context)
+
     # ----------------------------------------------------------------
     # Handlers
     # ----------------------------------------------------------------
     def _handle_verification(self, user_goal, customer_id=None):
-        if not customer_id or self.customers.empty:
+        if not customer_id or row_count("customers") == 0:
             return "Verification Agent: Please provide your loan number or phone number for verification."
 
-        match = self.customers[
-            (self.customers["CustomerID"] == customer_id)
-            | (self.customers["LoanID"] == customer_id)
+        customers = self._view("customers", customer_id)
+        match = customers[
+            (customers["CustomerID"] == customer_id)
+            | (customers["LoanID"] == customer_id)
         ]
         if match.empty:
             return "Verification Agent: No matching customer found."
@@ -121,31 +188,34 @@ class AutoFinanceGROC:
 
     def _handle_payment(self, user_goal, customer_id=None):
         """Handle EMI / Payment-related queries."""
-        if self.payments.empty:
+        if row_count("payments") == 0:
             return "Payment Agent: No payment data available."
         if not customer_id:
             return "Payment Agent: Please verify your loan ID first."
 
         # Map verified CustomerID → LoanID
         loan_id = None
-        if not self.customers.empty:
-            match = self.customers[
-                (self.customers["CustomerID"].astype(str).str.lower() == str(customer_id).lower())
-                | (self.customers["LoanID"].astype(str).str.lower() == str(customer_id).lower())
+        customers = self._view("customers", customer_id)
+        if not customers.empty:
+            match = customers[
+                (customers["CustomerID"].astype(str).str.lower() == str(customer_id).lower())
+                | (customers["LoanID"].astype(str).str.lower() == str(customer_id).lower())
             ]
             if not match.empty:
                 loan_id = match.iloc[0].get("LoanID")
 
         # Find in payments using either LoanID or CustomerID
-        p = self.payments[
-            (self.payments.get("LoanID", pd.Series()).astype(str).str.lower() == str(loan_id).lower())
-            | (self.payments.get("CustomerID", pd.Series()).astype(str).str.lower() == str(customer_id).lower())
+        payments = self._view("payments", customer_id)
+        p = payments[
+            (payments.get("LoanID", pd.Series()).astype(str).str.lower() == str(loan_id).lower())
+            | (payments.get("CustomerID", pd.Series()).astype(str).str.lower() == str(customer_id).lower())
         ]
 
         if p.empty:
             return f"Payment Agent: No EMI data found for Loan {loan_id or customer_id}."
 
-        row = p.iloc[0]
+        # Derive payment status as of today instead of echoing the export
+        row = recompute_overdue(p.iloc[:1]).iloc[0]
         emi_amt = row.get("EMI_Amount", "N/A")
         due_date = row.get("Due_Date", "N/A")
         balance = row.get("Balance", "N/A")
@@ -159,30 +229,33 @@ class AutoFinanceGROC:
 
     def _handle_claim(self, user_goal, customer_id=None):
         """Handle insurance claim status queries."""
-        if self.claims.empty:
+        if row_count("claims") == 0:
             return "Claim Agent: No claim data available."
         if not customer_id:
             return "Claim Agent: Please verify your loan ID first."
 
         # Find loan mapping for claim lookup
         loan_id = None
-        if not self.customers.empty:
-            match = self.customers[
-                (self.customers["CustomerID"].astype(str).str.lower() == str(customer_id).lower())
-                | (self.customers["LoanID"].astype(str).str.lower() == str(customer_id).lower())
+        customers = self._view("customers", customer_id)
+        if not customers.empty:
+            match = customers[
+                (customers["CustomerID"].astype(str).str.lower() == str(customer_id).lower())
+                | (customers["LoanID"].astype(str).str.lower() == str(customer_id).lower())
             ]
             if not match.empty:
                 loan_id = match.iloc[0].get("LoanID")
 
-        # Match claim by customer_id (primary key)
-        c = self.claims[self.claims["CustomerID"].astype(str).str.lower() == str(customer_id).lower()]
-        if c.empty and loan_id:
-            c = self.claims[self.claims["CustomerID"].astype(str).str.lower() == str(loan_id).lower()]
+        # Latest claim by incident date for customer_id (primary key).
+        # Take the index and rows from one snapshot so positions line up.
+        claims, index = self._claims_snapshot(customer_id)
+        pos = index.latest(customer_id)
+        if pos is None and loan_id:
+            pos = index.latest(loan_id)
 
-        if c.empty:
+        if pos is None:
             return f"Claim Agent: No claim found for Loan {loan_id or customer_id}."
 
-        row = c.sort_values(by="ClaimID").iloc[-1]
+        row = self._record_view("claims", claims)[pos]
         claim_id = row.get("ClaimID", "N/A")
         status = row.get("Status", "N/A")
         amount = row.get("claim_amount", "N/A")
@@ -211,10 +284,11 @@ class AutoFinanceGROC:
                     selected_addons.append(addons[idx])
 
         name = ""
-        if not self.customers.empty and customer_id:
-            match = self.customers[
-                (self.customers["CustomerID"] == customer_id)
-                | (self.customers["LoanID"] == customer_id)
+        customers = self._view("customers", customer_id) if customer_id else None
+        if customers is not None and not customers.empty:
+            match = customers[
+                (customers["CustomerID"] == customer_id)
+                | (customers["LoanID"] == customer_id)
             ]
             if not match.empty:
                 r = match.iloc[0]
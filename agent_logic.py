@@ -142,6 +142,8 @@ from tools.payment_lookup_tool import payment_lookup_tool
 from tools.fnol_claim_tool import fnol_claim_tool
 from tools.sop_lookup_tool import sop_lookup_tool
 from tools.crm_logger_tool import crm_logger_tool
+from tracing import traced
+from async_runtime import run_blocking
 
 
 class AutoFinanceAgent:
@@ -149,6 +151,11 @@ class AutoFinanceAgent:
         self.verified_customer = None
         self.last_greeted = False
 
+    async def aroute_query(self, user_input: str) -> str:
+        """Async route_query(); the rule-based flow runs on the blocking-work pool."""
+        return await run_blocking(self.route_query, user_input)
+
+    @traced("rule.route_query")
     def route_query(self, user_input: str) -> str:
         text = user_input.lower().strip()
 
@@ -2,75 +2,62 @@
 # agent_logic_llm.py
 # ===========================================
 
-from langchain_community.llms import Ollama
-from langchain.agents import initialize_agent, Tool
-from langchain.agents import AgentType
-
-# Import existing tools
-from tools.verify_user_tool import verify_user_tool
-from tools.payment_lookup_tool import payment_lookup_tool
-from tools.fnol_claim_tool import fnol_claim_tool
-from tools.sop_lookup_tool import sop_lookup_tool
-from tools.crm_logger_tool import crm_logger_tool
-from llm_loader import load_llm
+from tools.crm_logger_tool import crm_logger_tool, acrm_logger_tool
+from tool_registry import get_executor, run_turn, arun_turn
+from conversation_memory import ConversationMemory
+from tracing import traced
 
 class AutoFinanceLLMAgent:
     """
     A single-step reasoning agent powered by a local Ollama LLM.
     The LLM decides which tools to call based on the user's query.
+    Tools and the ReAct executor are shared process-wide (tool_registry).
     """
 
     def __init__(self, model_name="mistral"):
-        # Connect to local Ollama LLM
-        # self.llm = Ollama(model=model_name)
-        self.llm = load_llm()
-
-        # Register tools
-        self.tools = [
-            Tool(
-                name="Verify User",
-                func=verify_user_tool,
-                description="Verify customer identity using name, loan number, or contact details."
-            ),
-            Tool(
-                name="Payment Lookup",
-                func=payment_lookup_tool,
-                description="Fetch EMI, payment due date, and loan balance for verified customers."
-            ),
-            Tool(
-                name="FNOL Claim Tool",
-                func=fnol_claim_tool,
-                description="Handle accident, theft, or damage insurance claims."
-            ),
-            Tool(
-                name="SOP Lookup",
-                func=sop_lookup_tool,
-                description="Retrieve process or policy information from SOP documents."
-            ),
-            Tool(
-                name="CRM Logger",
-                func=crm_logger_tool,
-                description="Log chat messages to CRM system for future reference."
-            ),
-        ]
-
-        # Initialize LLM-powered agent
-        self.agent = initialize_agent(
-            tools=self.tools,
-            llm=self.llm,
-            agent_type=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-            verbose=True,
-        )
-
+        self.agent = get_executor()
+        self.llm = self.agent.agent.llm_chain.llm
+        self.tools = self.agent.tools
+        # Counts for the most recent turn: llm_calls, tool_calls, tool_cache_hits, elapsed_ms
+        self.last_turn_stats = None
+        # Rolling window + summary, so prompt size stays flat over long chats
+        self.memory = ConversationMemory()
+
+    def reset(self):
+        self.memory.clear()
+
+    @traced("llm.route_query")
     def route_query(self, user_input: str) -> str:
         """
         Pass the user's query to the LLM-powered agent.
         """
+        memory = self.memory.render()
+        prompt_input = f"{user_input}\n\n{memory}" if memory else user_input
         try:
-            response = self.agent.run(user_input)
+            response, stats = run_turn(self.agent, prompt_input)
+            self.last_turn_stats = stats.as_dict()
         except Exception as e:
             response = f"⚠️ LLM Agent Error: {str(e)}"
 
+        self.memory.add_turn(user_input, response)
+
         # Log all queries and responses
         crm_logger_tool(user_input, response)
         return response
+
+    @traced("llm.aroute_query")
+    async def aroute_query(self, user_input: str) -> str:
+        """
+        Async route_query(): the event loop is free while the LLM is thinking.
+        """
+        memory = self.memory.render()
+        prompt_input = f"{user_input}\n\n{memory}" if memory else user_input
+        try:
+            response, stats = await arun_turn(self.agent, prompt_input)
+            self.last_turn_stats = stats.as_dict()
+        except Exception as e:
+            response = f"⚠️ LLM Agent Error: {str(e)}"
+
+        self.memory.add_turn(user_input, response)
+        await acrm_logger_tool(user_input, response)
+        return response
@@ -0,0 +1,79 @@
+# ===========================================
+# agent_modes.py (Agent Mode Registry)
+# ===========================================
+"""
+One place that knows how to build each agent mode and run a single turn,
+so the Streamlit app, worker processes and offline tools drive the agents
+the same way.
+"""
+
+AGENT_MODES = ("supervisor", "graph", "groc", "llm", "rule")
+
+# Streamlit selector labels → mode keys
+MODE_LABELS = {
+    "Supervisor (Multi-Agent)": "supervisor",
+    "Supervisor (LangGraph)": "graph",
+    "GROC (Planner + Executor)": "groc",
+    "Local LLM (Ollama)": "llm",
+    "Rule-Based": "rule",
+}
+
+
+def create_agent(mode: str, session_id: str = None):
+    """Instantiate the agent for a mode (imports are lazy so unused modes cost nothing)."""
+    if mode == "supervisor":
+        from supervisor_agent import SupervisorAgent
+        return SupervisorAgent(session_id=session_id)
+    if mode == "graph":
+        from supervisor_graph import SupervisorGraphAgent
+        return SupervisorGraphAgent(session_id=session_id)
+    if mode == "groc":
+        from agent_groc import AutoFinanceGROC
+        return AutoFinanceGROC()
+    if mode == "llm":
+        from agent_logic_llm import AutoFinanceLLMAgent
+        return AutoFinanceLLMAgent()
+    if mode == "rule":
+        from agent_logic import AutoFinanceAgent
+        return AutoFinanceAgent()
+    raise ValueError(f"Unknown agent mode: {mode}")
+
+
+def bind_customer(agent, mode: str, customer_id: str):
+    """
+    Make the next turns answer for an already verified customer (offline and
+    batch runs). Returns the context to pass to run_turn. The LLM agent has no
+    verified state: its messages must name the customer.
+    """
+    if not customer_id:
+        return None
+    if mode == "groc":
+        return {"customer_id": customer_id}
+    if mode == "rule":
+        agent.verified_customer = customer_id
+    elif mode in ("supervisor", "graph"):
+        current = agent.user_context or {}
+        if not (current.get("ok") and current.get("customer_id") == customer_id):
+            from tools.verify_user_tool import verify_customer
+            result = verify_customer(customer_id)
+            if result.get("ok"):
+                agent.user_context = result
+    return None
+
+
+def run_turn(agent, mode: str, user_input: str, context: dict = None) -> str:
+    """Send one user message to an agent using the entrypoint its mode exposes."""
+    if mode in ("supervisor", "graph"):
+        return agent.orchestrate_goal(user_input)
+    if mode == "groc":
+        return agent.handle_goal(user_input, context=context)
+    return agent.route_query(user_input)
+
+
+async def arun_turn(agent, mode: str, user_input: str, context: dict = None) -> str:
+    """Async run_turn(): many conversations can share one event loop."""
+    if mode in ("supervisor", "graph"):
+        return await agent.aorchestrate_goal(user_input)
+    if mode == "groc":
+        return await agent.ahandle_goal(user_input, context=context)
+    return await agent.aroute_query(user_input)
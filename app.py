@@ -1,7 +1,9 @@
 
 import streamlit as st
 import os
+import uuid
 import pandas as pd
+import memory_profile  # early, so AUTOFIN_MEMORY_PROFILE=1 traces the agents' allocations
 
 # ===========================
 # PAGE CONFIG
@@ -20,6 +22,7 @@ mode = st.sidebar.selectbox(
     "Select Agent Mode",
     [
         "Supervisor (Multi-Agent)",
+        "Supervisor (LangGraph)",
         "GROC (Planner + Executor)",
         "Local LLM (Ollama)",
         "Rule-Based"
@@ -28,6 +31,8 @@ mode = st.sidebar.selectbox(
 
 if mode == "Supervisor (Multi-Agent)":
     from supervisor_agent import SupervisorAgent as AutoFinanceAgent
+elif mode == "Supervisor (LangGraph)":
+    from supervisor_graph import SupervisorGraphAgent as AutoFinanceAgent
 elif mode == "GROC (Planner + Executor)":
     from agent_groc import AutoFinanceGROC as AutoFinanceAgent
 elif mode == "Local LLM (Ollama)":
@@ -38,14 +43,64 @@ else:
 # ===========================
 # INITIALIZE AGENT & STATE
 # ===========================
+from agent_modes import MODE_LABELS
+
+# AGENT_WORKERS > 0 serves turns from a shared multi-process worker pool
+AGENT_WORKERS = int(os.getenv("AGENT_WORKERS", "0"))
+
+
+@st.cache_resource
+def get_worker_pool():
+    from worker_pool import AgentWorkerPool
+    return AgentWorkerPool(AGENT_WORKERS).start()
+
+
+@st.cache_resource
+def start_metrics_endpoint():
+    from tracing import start_metrics_server
+    return start_metrics_server()
+
+
+if os.getenv("AUTOFIN_TRACING") == "1" and os.getenv("AUTOFIN_METRICS_PORT"):
+    start_metrics_endpoint()
+
+
+@st.cache_resource
+def start_data_watcher():
+    from data_store import start_watcher
+    return start_watcher()
+
+
+# Pick up edits to data/*.csv without restarting (0 disables the watcher)
+if float(os.getenv("AUTOFIN_WATCH_INTERVAL", "2")) > 0:
+    start_data_watcher()
+
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+
+def create_agent():
+    if AGENT_WORKERS:
+        return None
+    # Supervisors keep their verified context in the session store / checkpointer
+    if mode in ("Supervisor (Multi-Agent)", "Supervisor (LangGraph)"):
+        return AutoFinanceAgent(session_id=st.session_state.session_id)
+    return AutoFinanceAgent()
+
+
 if "agent" not in st.session_state:
-    st.session_state.agent = AutoFinanceAgent()
+    st.session_state.agent = create_agent()
 
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
 
 agent = st.session_state.agent
 
+# AUTOFIN_MEMORY_PROFILE=1: account this session's memory (admin panel below)
+memory_profile.track_session(
+    st.session_state.session_id, agent=agent, chat_history=st.session_state.chat_history
+)
+
 # ===========================
 # SIDEBAR INFO
 # ===========================
@@ -55,16 +110,51 @@ st.sidebar.info(
     """
 **Available Modes**
 - 🧠 Supervisor: Multi-agent planner + reflector  
+- 🕸️ Supervisor (LangGraph): Same flow as a checkpointed state graph  
 - 🧭 GROC: Goal-oriented reasoning chain  
 - 🤖 Local LLM: Direct reasoning (Ollama)  
 - ⚙️ Rule-Based: Baseline offline logic  
 """
 )
 
+with st.sidebar.expander("📊 Portfolio Overview"):
+    from portfolio_aggregates import get_aggregates
+    for name, view in get_aggregates().items():
+        st.caption(name.replace("_", " ").capitalize())
+        st.dataframe(view, use_container_width=True)
+
+if memory_profile.enabled():
+    with st.sidebar.expander("🧮 Memory (admin)"):
+        measure, baseline, dump = st.columns(3)
+        if measure.button("Measure"):
+            st.session_state.memory_report = memory_profile.memory_report()
+        if baseline.button("Baseline"):
+            memory_profile.set_baseline()
+            st.caption("Top allocations now show growth since this point.")
+        if dump.button("Dump JSON"):
+            st.caption(f"Saved to `{memory_profile.dump_report()}`")
+        report = st.session_state.get("memory_report")
+        if report:
+            traced = report["traced"] or {}
+            mib = memory_profile.format_mib
+            st.caption(
+                f"RSS {mib(report['rss_bytes'])} · traced {mib(traced.get('current_bytes'))} · "
+                f"shared {mib(report['shared_bytes'])} · {len(report['sessions'])} sessions "
+                f"{mib(report['sessions_bytes'])} · {report['generated_at']}"
+            )
+            for name, table in memory_profile.report_tables(report).items():
+                st.caption(name.capitalize())
+                st.dataframe(table, use_container_width=True, hide_index=True)
+
 st.sidebar.markdown("---")
 if st.sidebar.button("🧹 Clear Chat"):
+    memory_profile.forget_session(st.session_state.session_id)
     st.session_state.chat_history = []
-    st.session_state.agent = AutoFinanceAgent()
+    if AGENT_WORKERS:
+        st.session_state.session_id = uuid.uuid4().hex
+    elif hasattr(st.session_state.agent, "reset"):
+        st.session_state.agent.reset()
+    st.session_state.agent = create_agent()
     st.success("Chat cleared and agent reinitialized.")
 
 # ===========================
@@ -87,7 +177,11 @@ user_input = st.chat_input("Type your message or goal...")
 
 if user_input:
     # Choose appropriate method for each mode
-    if mode == "Supervisor (Multi-Agent)":
+    if AGENT_WORKERS:
+        response = get_worker_pool().chat(
+            st.session_state.session_id, user_input, MODE_LABELS[mode]
+        )
+    elif mode in ("Supervisor (Multi-Agent)", "Supervisor (LangGraph)"):
         response = agent.orchestrate_goal(user_input)
     elif mode == "GROC (Planner + Executor)":
         response = agent.handle_goal(user_input)
@@ -0,0 +1,39 @@
+# ===========================================
+# async_runtime.py (Blocking-Work Offload for the Async API)
+# ===========================================
+"""
+The async entrypoints (aorchestrate_goal, ahandle_goal, aroute_query, the
+a* tools) await LLM calls natively and push blocking pandas / file / SQLite
+work onto one bounded thread pool. Hundreds of conversations can wait on
+the LLM in one event loop while only AUTOFIN_BLOCKING_THREADS threads ever
+touch the data.
+"""
+
+import os
+import asyncio
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+BLOCKING_THREADS = int(os.getenv("AUTOFIN_BLOCKING_THREADS", "8"))
+
+_executor = ThreadPoolExecutor(max_workers=BLOCKING_THREADS, thread_name_prefix="autofin-blocking")
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run func(*args, **kwargs) on the blocking-work pool; trace/deadline context goes along."""
+    ctx = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(ctx.run, func, *args, **kwargs))
+
+
+def blocking_to_async(func):
+    """Async twin of a blocking tool, e.g. apayment_lookup_tool = blocking_to_async(payment_lookup_tool)."""
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_blocking(func, *args, **kwargs)
+
+    wrapper.__name__ = f"a{func.__name__}"
+    wrapper.__qualname__ = wrapper.__name__
+    return wrapper
@@ -0,0 +1,251 @@
+# ===========================================
+# batch_runner.py (Offline Batch Conversations)
+# ===========================================
+"""
+Runs (session, customer, message) records from a JSONL file through any
+agent mode, e.g. nightly "is my EMI paid?" / "claim status" checks for a
+customer list:
+
+    {"id": "r1", "session": "s1", "customer": "C001", "message": "is my EMI paid?"}
+
+- turns of one session run in file order on the same agent; sessions are
+  spread over a thread pool (one process, one data store) or the
+  multi-process worker pool (tables published once into shared memory)
+- a record with a customer is answered as that customer, already verified
+  (agent_modes.bind_customer); without one the conversation has to verify
+- results are appended to the output JSONL as they finish; a rerun skips
+  every session whose records are all there, so an interrupted run resumes
+  (a partly done session is replayed from its first turn on a new agent,
+  since later turns depend on earlier ones, e.g. verification; turns
+  already in the output are not written again)
+- throughput and latency percentiles are printed at the end
+
+    python batch_runner.py questions.jsonl --mode groc --workers 8
+    python batch_runner.py questions.jsonl --mode supervisor --executor process --workers 8 --out logs/nightly.jsonl
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed, FIRST_COMPLETED
+
+import numpy as np
+
+from agent_modes import AGENT_MODES, create_agent, run_turn, bind_customer
+
+OUT_FILE = "logs/batch_results.jsonl"
+IN_FLIGHT_PER_WORKER = 4  # sessions (threads) / 16x turns (processes) queued per worker
+PROGRESS_SECONDS = 5.0
+
+
+# ----------------------------------------------------------------
+# Input / resume
+# ----------------------------------------------------------------
+def read_records(path):
+    """Records with id (default: line number), session (default: customer, else id), customer and message."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            raw = json.loads(line)
+            message = raw.get("message")
+            if not message:
+                raise ValueError(f"{path}:{line_no}: record has no message")
+            record_id = str(raw.get("id", line_no))
+            customer = raw.get("customer", raw.get("customer_id"))
+            customer = str(customer).strip() if customer else None
+            yield {
+                "id": record_id,
+                "session": str(raw.get("session", raw.get("session_id")) or customer or record_id),
+                "customer": customer,
+                "message": str(message),
+            }
+
+
+def completed_ids(path):
+    """Ids already in the output; a torn last line from a crash is cut off so appends stay valid JSONL."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            data = data[: data.rfind(b"\n") + 1]
+            f.truncate(len(data))
+    done = set()
+    for line in data.decode("utf-8").splitlines():
+        if line.strip():
+            done.add(json.loads(line)["id"])
+    return done
+
+
+def group_sessions(records):
+    """session → records in file order (sessions in order of first appearance)."""
+    sessions = OrderedDict()
+    for record in records:
+        sessions.setdefault(record["session"], []).append(record)
+    return sessions
+
+
+def _result(record, mode, response, turn_s):
+    return {
+        **record,
+        "mode": mode,
+        "response": response,
+        # Agents report failures as "⚠️ … Error …" answers
+        "ok": not (response.startswith("⚠️") and "Error" in response),
+        "latency_ms": round(turn_s * 1000.0, 3),
+    }
+
+
+# ----------------------------------------------------------------
+# Executors
+# ----------------------------------------------------------------
+def run_session(mode, session_id, records):
+    """All turns of one session on one agent, in order (thread executor)."""
+    results, agent = [], None
+    for record in records:
+        t0 = time.perf_counter()
+        try:
+            if agent is None:
+                agent = create_agent(mode, session_id=session_id)
+            context = bind_customer(agent, mode, record["customer"])
+            response = run_turn(agent, mode, record["message"], context=context)
+        except Exception as e:
+            response = f"⚠️ Batch Error — {type(e).__name__}: {e}"
+        results.append(_result(record, mode, response, time.perf_counter() - t0))
+    return results
+
+
+def run_threads(mode, sessions, workers):
+    """Yield results as sessions finish, with at most workers * IN_FLIGHT_PER_WORKER sessions queued."""
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+        pending = set()
+        for session_id, records in sessions.items():
+            if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+            pending.add(pool.submit(run_session, mode, session_id, records))
+        for future in as_completed(pending):
+            yield from future.result()
+
+
+def _turn_outcome(future):
+    """(response, turn_s) of a worker-pool turn; a worker that died fails the turn like an agent error."""
+    try:
+        return future.result(), future.turn_s
+    except RuntimeError as e:
+        return f"⚠️ Batch Error — {type(e).__name__}: {e}", 0.0
+
+
+def run_processes(mode, sessions, workers):
+    """Yield results as turns finish on the worker pool (sticky by session, so turns stay in order)."""
+    from worker_pool import AgentWorkerPool
+
+    with AgentWorkerPool(workers, default_mode=mode) as pool:
+        pending = {}
+        for session_id, records in sessions.items():
+            for record in records:
+                if len(pending) >= workers * IN_FLIGHT_PER_WORKER * 16:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield _result(pending.pop(future), mode, *_turn_outcome(future))
+                future = pool.submit(session_id, record["message"], mode, customer=record["customer"])
+                pending[future] = record
+        for future in as_completed(list(pending)):
+            yield _result(pending.pop(future), mode, *_turn_outcome(future))
+
+
+@contextlib.contextmanager
+def silenced_stdout():
+    """Send the agents' prints (this process and workers spawned meanwhile) to /dev/null."""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with open(os.devnull, "w") as devnull:
+        os.dup2(devnull.fileno(), 1)
+        try:
+            yield
+        finally:
+            sys.stdout.flush()
+            os.dup2(saved, 1)
+            os.close(saved)
+
+
+# ----------------------------------------------------------------
+# Driver
+# ----------------------------------------------------------------
+def run_batch(input_path, mode, out_path=OUT_FILE, executor="thread", workers=None, quiet=True):
+    """Run every session with records not yet in out_path; returns the run summary."""
+    workers = workers or os.cpu_count() or 1
+    records = list(read_records(input_path))
+    done = completed_ids(out_path)
+    todo = [r for r in records if r["id"] not in done]
+    # Whole sessions: replaying a partly done one keeps its earlier turns' state
+    sessions = OrderedDict(
+        (session_id, session) for session_id, session in group_sessions(records).items()
+        if any(r["id"] not in done for r in session)
+    )
+    runner = run_processes if executor == "process" else run_threads
+
+    latencies, errors = [], 0
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    t0 = last_report = time.perf_counter()
+    with open(out_path, "a", encoding="utf-8") as out, (silenced_stdout() if quiet else contextlib.nullcontext()):
+        for result in runner(mode, sessions, workers):
+            if result["id"] in done:
+                continue  # replayed turn, already in the output
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()  # a crash loses at most the turns still running
+            latencies.append(result["latency_ms"])
+            errors += not result["ok"]
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_SECONDS:
+                last_report = now
+                print(f"⏳ {len(latencies)}/{len(todo)} turns · {len(latencies) / (now - t0):.1f} turns/s",
+                      file=sys.stderr, flush=True)
+    wall_s = time.perf_counter() - t0
+
+    lat = np.asarray(latencies) if latencies else np.zeros(1)
+    return {
+        "mode": mode,
+        "executor": executor,
+        "workers": workers,
+        "records": len(records),
+        "skipped": len(records) - len(todo),
+        "turns": len(latencies),
+        "sessions": len(sessions),
+        "errors": errors,
+        "wall_s": round(wall_s, 3),
+        "turns_per_s": round(len(latencies) / wall_s, 3) if wall_s and latencies else None,
+        "sessions_per_s": round(len(sessions) / wall_s, 3) if wall_s and latencies else None,
+        "latency_ms": {p: round(float(np.percentile(lat, int(p[1:]))), 3) for p in ("p50", "p95", "p99")},
+        "out": out_path,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a JSONL of (session, customer, message) records through an agent mode.")
+    parser.add_argument("input", help="JSONL with message and optional id, session, customer")
+    parser.add_argument("--mode", choices=AGENT_MODES, default="groc")
+    parser.add_argument("--out", default=OUT_FILE, help="results JSONL (appended; existing ids are skipped)")
+    parser.add_argument("--executor", choices=("thread", "process"), default="thread",
+                        help="thread pool in this process, or the shared-memory worker process pool")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--verbose", action="store_true", help="keep the agents' console output")
+    args = parser.parse_args()
+
+    summary = run_batch(args.input, args.mode, args.out, args.executor, args.workers, quiet=not args.verbose)
+    if summary["skipped"]:
+        print(f"↩️  Resumed: {summary['skipped']} of {summary['records']} records already in {summary['out']}")
+    lat = summary["latency_ms"]
+    print(
+        f"✅ {summary['turns']} turns in {summary['sessions']} sessions ({summary['errors']} errors) "
+        f"in {summary['wall_s']:.2f}s → {args.out}\n"
+        f"   {summary['turns_per_s']} turns/s, {summary['sessions_per_s']} sessions/s with "
+        f"{summary['workers']} {summary['executor']} workers · p50 {lat['p50']} ms, p95 {lat['p95']} ms, p99 {lat['p99']} ms"
+    )
@@ -0,0 +1,224 @@
+# ===========================================
+# benchmarks/replay.py (Transcript Replay Harness)
+# ===========================================
+"""
+Replays real conversations from logs/chat_history.log against an agent mode
+and reports latency distributions plus routing/response differences versus
+the logged answers.
+
+    python -m benchmarks.replay --mode supervisor
+    python -m benchmarks.replay --mode groc --llm cached --out /tmp/replay.json
+
+Turns are grouped into sessions by idle gap. Replays run in a scratch copy
+of data/ so claim writes and CRM logging never touch the real files.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import difflib
+import argparse
+import contextlib
+from datetime import datetime, timedelta
+
+from benchmarks.run_benchmarks import ROOT, WORKSPACE, percentiles
+
+LOG_FILE = os.path.join(ROOT, "logs", "chat_history.log")
+ENTRY_RE = re.compile(r"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\]\nUser: (.*?)\nAgent: (.*?)(?=\n\n\[\d{4}-|\Z)", re.S | re.M)
+
+# Response prefixes → which handler produced the answer
+ROUTES = (
+    ("Payment Agent", "payment"),
+    ("💰", "payment"),
+    ("Claim Agent", "claim"),
+    ("🧾 Existing Claim", "claim"),
+    ("✅ New claim", "claim"),
+    ("SOP Agent", "sop"),
+    ("📘", "sop"),
+    ("Verification Agent", "verification"),
+    ("🔐", "verification"),
+    ("✅ Verified", "verification"),
+    ("❌ No matching customer", "verification"),
+    ("👋", "greeting"),
+    ("🧾 Here's a quick summary", "summary"),
+    ("GROC Agent: I couldn", "unrouted"),
+    ("Sorry, I couldn't find", "unrouted"),
+    ("⚠️", "error"),
+)
+
+
+# ----------------------------------------------------------------
+# Parsing
+# ----------------------------------------------------------------
+def answer_text(agent_text):
+    """The comparable part of a logged or live answer (Supervisor logs wrap it)."""
+    text = agent_text.strip()
+    result = re.search(r"^Result: (.*?)(?:\nReflection:|\Z)", text, re.S | re.M)
+    if result:
+        text = result.group(1).strip()
+    return text.split("\n\n✅ Reflection:", 1)[0].strip()
+
+
+def route_of(text):
+    for prefix, route in ROUTES:
+        if text.startswith(prefix):
+            return route
+    return "other"
+
+
+def parse_log(path=LOG_FILE):
+    """Return logged turns as dicts with ts, user and agent text, in order."""
+    with open(path, "r", encoding="utf-8") as f:
+        raw = f.read()
+
+    turns = []
+    for ts, user, agent in ENTRY_RE.findall(raw):
+        turn = {
+            "ts": datetime.strptime(ts, "%Y-%m-%d %H:%M:%S"),
+            "user": user.strip(),
+            "agent": answer_text(agent),
+        }
+        # GROC and Supervisor both logged the same turn; keep one entry
+        prev = turns[-1] if turns else None
+        if prev and prev["user"] == turn["user"] and turn["ts"] - prev["ts"] <= timedelta(seconds=2):
+            prev["agent"] = turn["agent"] if "Result:" in agent else prev["agent"]
+            continue
+        turns.append(turn)
+    return turns
+
+
+def sessionize(turns, gap_minutes=30):
+    sessions, current = [], []
+    for turn in turns:
+        if current and turn["ts"] - current[-1]["ts"] > timedelta(minutes=gap_minutes):
+            sessions.append(current)
+            current = []
+        current.append(turn)
+    if current:
+        sessions.append(current)
+    return sessions
+
+
+# ----------------------------------------------------------------
+# Replay
+# ----------------------------------------------------------------
+def prepare_replay_workspace(data_dir):
+    workdir = os.path.join(WORKSPACE, "replay")
+    shutil.rmtree(workdir, ignore_errors=True)
+    shutil.copytree(data_dir, os.path.join(workdir, "data"))
+    os.makedirs(os.path.join(workdir, "logs"), exist_ok=True)
+    return workdir
+
+
+def replay(sessions, mode, similarity_threshold=0.9):
+    """Run every session through a fresh agent; return per-turn records."""
+    from agent_modes import create_agent, run_turn
+
+    records = []
+    for s_idx, session in enumerate(sessions):
+        agent = create_agent(mode, session_id=f"replay-{s_idx}")
+        for turn in session:
+            t = time.perf_counter()
+            try:
+                response = str(run_turn(agent, mode, turn["user"]))
+            except Exception as e:
+                response = f"⚠️ Replay Error — {type(e).__name__}: {e}"
+            latency = time.perf_counter() - t
+
+            live = answer_text(response)
+            similarity = difflib.SequenceMatcher(None, turn["agent"], live).ratio()
+            records.append({
+                "session": s_idx,
+                "user": turn["user"],
+                "latency_s": latency,
+                "logged_route": route_of(turn["agent"]),
+                "live_route": route_of(live),
+                "similarity": round(similarity, 3),
+                "changed": similarity < similarity_threshold,
+                "logged": turn["agent"],
+                "live": live,
+            })
+    return records
+
+
+def summarize(records, mode):
+    by_route = {}
+    for r in records:
+        by_route.setdefault(r["live_route"], []).append(r["latency_s"])
+    route_changes = [r for r in records if r["logged_route"] != r["live_route"]]
+    changed = [r for r in records if r["changed"]]
+    return {
+        "mode": mode,
+        "sessions": len({r["session"] for r in records}),
+        "turns": len(records),
+        "latency_ms": percentiles([r["latency_s"] for r in records]),
+        "latency_ms_by_route": {k: percentiles(v) for k, v in sorted(by_route.items())},
+        "route_changes": len(route_changes),
+        "response_diffs": len(changed),
+        "route_change_matrix": _matrix(route_changes),
+    }
+
+
+def _matrix(route_changes):
+    counts = {}
+    for r in route_changes:
+        key = f"{r['logged_route']} → {r['live_route']}"
+        counts[key] = counts.get(key, 0) + 1
+    return dict(sorted(counts.items(), key=lambda kv: -kv[1]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay logged transcripts against an agent mode.")
+    parser.add_argument("--mode", choices=("rule", "groc", "supervisor", "graph", "llm"), default="supervisor")
+    parser.add_argument("--log", default=LOG_FILE)
+    parser.add_argument("--data", default=os.path.join(ROOT, "data"), help="data folder to replay against")
+    parser.add_argument("--llm", choices=("stub", "cached"), default="stub",
+                        help="stub = deterministic fake LLM, cached = LLM_CACHE_FILE with recording on miss")
+    parser.add_argument("--gap-minutes", type=int, default=30, help="idle gap that starts a new session")
+    parser.add_argument("--threshold", type=float, default=0.9, help="similarity below this counts as a diff")
+    parser.add_argument("--show", type=int, default=10, help="print this many differing turns")
+    parser.add_argument("--out", help="write summary and per-turn records as JSON")
+    args = parser.parse_args(argv)
+
+    sessions = sessionize(parse_log(args.log), args.gap_minutes)
+    log_path = os.path.abspath(args.log)
+    out_path = os.path.abspath(args.out) if args.out else None
+    cache_file = os.path.abspath(os.getenv("LLM_CACHE_FILE", os.path.join(ROOT, "logs", "llm_cache.jsonl")))
+
+    # Point every agent at a scratch copy before any agent module is imported
+    workdir = prepare_replay_workspace(os.path.abspath(args.data))
+    os.chdir(workdir)
+    os.environ["AUTOFIN_DATA_DIR"] = os.path.join(workdir, "data")
+    os.environ["LLM_BACKEND"] = "fake" if args.llm == "stub" else "cached"
+    os.environ["LLM_CACHE_FILE"] = cache_file
+    sys.path.insert(0, ROOT)
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        records = replay(sessions, args.mode, args.threshold)
+    summary = summarize(records, args.mode)
+
+    lat = summary["latency_ms"]
+    print(f"🔁 Replayed {summary['turns']} turns in {summary['sessions']} sessions from {log_path}")
+    print(f"   latency ms  p50 {lat['p50']}  p95 {lat['p95']}  p99 {lat['p99']}")
+    for route, p in summary["latency_ms_by_route"].items():
+        print(f"   {route:>12}: p50 {p['p50']}  p95 {p['p95']}")
+    print(f"   route changes: {summary['route_changes']}  response diffs: {summary['response_diffs']}")
+    for change, n in summary["route_change_matrix"].items():
+        print(f"     {change}: {n}")
+    for r in [r for r in records if r["changed"]][: args.show]:
+        print(f"\n   ✳️ [{r['session']}] {r['user']!r}  ({r['logged_route']} → {r['live_route']})")
+        print(f"      logged: {r['logged'][:160]!r}")
+        print(f"      live:   {r['live'][:160]!r}")
+
+    if out_path:
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "records": records}, f, indent=2, ensure_ascii=False, default=str)
+        print(f"\n💾 Replay report saved to {out_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+# ===========================================
+# benchmarks/router_recovery.py (LLM Router Outage → Recovery Check)
+# ===========================================
+"""
+Drives a RoutedLLM over two local stub servers through an outage of the
+fast backend and its recovery, and checks that traffic fails over and then
+returns to the fastest backend:
+
+    warm-up   "groq" 20 ms, "ollama" 80 ms   → most calls go to groq
+    outage    groq answers 503               → every call is still answered (ollama)
+    recovery  groq 20 ms again               → traffic returns to groq
+
+Windows are shortened (error window, probe interval, cooldown) so the run
+takes a few seconds. Exits non-zero if a phase does not behave.
+
+    python -m benchmarks.router_recovery
+"""
+
+import os
+import sys
+import time
+import socket
+
+os.environ.setdefault("GROQ_API_KEY", "stub")
+
+from langchain_community.llms import Ollama
+
+from benchmarks.stub_llm_server import serve
+from llm_loader import ChatGroq
+from llm_router import RoutedLLM
+
+FAST_MS, SLOW_MS = 20.0, 80.0
+CALLS = 24
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _phase(llm, states, calls, pause_s=0.05):
+    """Run calls sequentially; returns (answered, requests per backend during the phase)."""
+    before = {name: state.requests for name, state in states.items()}
+    answered = 0
+    for i in range(calls):
+        try:
+            answered += bool(llm.invoke(f"router check {i}"))
+        except Exception as e:
+            print(f"   call {i} failed — {type(e).__name__}: {e}")
+        time.sleep(pause_s)
+    return answered, {name: state.requests - before[name] for name, state in states.items()}
+
+
+def run(error_window_s=1.0, probe_s=0.3, cooldown_s=0.5):
+    groq_port, ollama_port = _free_port(), _free_port()
+    groq_server, groq = serve(groq_port, latency_ms=FAST_MS, background=True)
+    ollama_server, ollama = serve(ollama_port, latency_ms=SLOW_MS, background=True)
+    states = {"groq": groq, "ollama": ollama}
+
+    groq_llm = ChatGroq(model="stub", groq_api_key="stub", base_url=f"http://127.0.0.1:{groq_port}")
+    object.__setattr__(groq_llm, "client", groq_llm.client.with_options(max_retries=0))
+    llm = RoutedLLM(
+        backends=[("groq", groq_llm), ("ollama", Ollama(model="stub", base_url=f"http://127.0.0.1:{ollama_port}"))],
+        hedge_ms=5_000.0,  # no hedging: every call shows where the router sent it
+        probe_s=probe_s,
+        error_window_s=error_window_s,
+        cooldown_s=cooldown_s,
+    )
+
+    failures = []
+    try:
+        answered, sent = _phase(llm, states, CALLS)
+        print(f"warm-up:  {answered}/{CALLS} answered, requests {sent}")
+        if answered != CALLS or sent["groq"] <= sent["ollama"]:
+            failures.append("warm-up: traffic did not settle on the fastest backend")
+
+        groq.error_rate = 1.0
+        answered, sent = _phase(llm, states, CALLS)
+        print(f"outage:   {answered}/{CALLS} answered, requests {sent}")
+        if answered != CALLS or sent["ollama"] < CALLS:
+            failures.append("outage: calls were not failed over to ollama")
+
+        groq.error_rate = 0.0
+        answered, sent = _phase(llm, states, CALLS, pause_s=(error_window_s + probe_s) / CALLS * 2)
+        print(f"recovery: {answered}/{CALLS} answered, requests {sent}")
+        tail, tail_sent = _phase(llm, states, CALLS)
+        print(f"after:    {tail}/{CALLS} answered, requests {tail_sent}")
+        if answered != CALLS or tail != CALLS or tail_sent["groq"] <= tail_sent["ollama"]:
+            failures.append("recovery: traffic did not return to groq")
+        print(f"stats:    {llm.report()}")
+    finally:
+        groq_server.shutdown()
+        ollama_server.shutdown()
+    return failures
+
+
+if __name__ == "__main__":
+    failures = run()
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Router failed over during the outage and returned to the fastest backend")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,319 @@
+# ===========================================
+# benchmarks/run_benchmarks.py (Agent Mode Benchmark Suite)
+# ===========================================
+"""
+Runs scripted conversations against every agent mode over synthetic data
+of increasing size and reports p50/p95/p99 latency, throughput and peak RSS.
+
+    python -m benchmarks.run_benchmarks --sizes 10,1000,100000 --sessions 20
+    python -m benchmarks.run_benchmarks --baseline benchmarks/results/<file>.json
+    python -m benchmarks.run_benchmarks --sizes 1000 --memory   # + bytes per session/component
+
+Each (mode, size) pair runs in a fresh process so peak RSS is per run,
+on a fresh copy of the generated data (turns like "claim status" append
+claims), so every run starts from the same tables.
+The LLM is the deterministic fake backend unless --llm-backend says otherwise.
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import random
+import shutil
+import argparse
+import platform
+import resource
+import contextlib
+import subprocess
+import multiprocessing as mp
+
+import numpy as np
+
+from benchmarks.synthetic_data import generate
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+WORKSPACE = os.path.join(ROOT, "benchmarks", ".workspace")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+MODES = ("rule", "groc", "supervisor", "graph", "llm")
+CASE_TIMEOUT_S = float(os.getenv("BENCH_CASE_TIMEOUT_S", "1800"))
+
+
+# ----------------------------------------------------------------
+# Scripted conversations
+# ----------------------------------------------------------------
+def script_for(mode, i):
+    """Conversation for customer number i, phrased for the mode's entrypoint."""
+    cid, loan = f"C{i:03d}", f"LN{i:03d}"
+    if mode in ("supervisor", "graph"):
+        return [loan, "is my EMI paid?", "what is my claim status", "explain my insurance coverage"]
+    if mode == "llm":
+        return [
+            f"My customer id is {cid}, is my EMI paid?",
+            f"Customer {cid}: when is my next EMI due?",
+            "What documents do I need for a claim?",
+        ]
+    if mode == "groc":
+        return ["is my EMI paid?", "what is my claim status", "explain my insurance coverage"]
+    return ["hi", "what is my EMI balance", "claim status", "explain my insurance coverage"]
+
+
+def prepare_session(agent, mode, i):
+    """Pre-verify modes that have no verification turn of their own."""
+    if mode == "rule":
+        agent.verified_customer = f"C{i:03d}"
+    if mode == "groc":
+        return {"customer_id": f"C{i:03d}"}
+    return None
+
+
+def percentiles(values):
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "mean": None}
+    arr = np.asarray(values) * 1000.0
+    return {
+        "p50": round(float(np.percentile(arr, 50)), 3),
+        "p95": round(float(np.percentile(arr, 95)), 3),
+        "p99": round(float(np.percentile(arr, 99)), 3),
+        "mean": round(float(arr.mean()), 3),
+    }
+
+
+# ----------------------------------------------------------------
+# Child process: one (mode, size) run
+# ----------------------------------------------------------------
+def _run_case(mode, size, workdir, sessions, seed, queue, memory=False):
+    os.chdir(workdir)
+    os.environ["AUTOFIN_DATA_DIR"] = os.path.join(workdir, "data")
+    sys.path.insert(0, ROOT)
+
+    if memory:
+        os.environ["AUTOFIN_MEMORY_PROFILE"] = "1"
+    from memory_profile import track_session, memory_report
+    from agent_modes import create_agent, run_turn
+
+    rng = random.Random(seed)
+    latencies, errors = [], 0
+    kept = []  # with --memory every session stays alive to be measured
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        t0 = time.perf_counter()
+        agent = create_agent(mode, session_id="bench-warmup")
+        setup_s = time.perf_counter() - t0
+
+        start = time.perf_counter()
+        for s in range(sessions):
+            i = rng.randint(1, size)
+            agent = create_agent(mode, session_id=f"bench-{s}")
+            context = prepare_session(agent, mode, i)
+            if memory:
+                kept.append(agent)
+                track_session(f"bench-{s}", agent=agent)
+            for message in script_for(mode, i):
+                t = time.perf_counter()
+                try:
+                    response = run_turn(agent, mode, message, context=context)
+                    if "Error" in str(response):
+                        errors += 1
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - t)
+        wall_s = time.perf_counter() - start
+
+    result = {
+        "mode": mode,
+        "size": size,
+        "turns": len(latencies),
+        "errors": errors,
+        "setup_ms": round(setup_s * 1000.0, 3),
+        "latency_ms": percentiles(latencies),
+        "throughput_tps": round(len(latencies) / wall_s, 3) if wall_s else None,
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024.0 if sys.platform != "darwin" else 1024.0 ** 2),
+            1,
+        ),
+    }
+    if memory:
+        result["memory"] = memory_summary(memory_report(limit=5))
+    queue.put(result)
+
+
+def memory_summary(report):
+    """Mean bytes per session and per component, shared cache total and top allocation sites."""
+    sessions = report["sessions"]
+    components = {}
+    for session in sessions:
+        for name, size in session["components"].items():
+            components[name] = components.get(name, 0) + size
+    n = max(len(sessions), 1)
+    return {
+        "sessions": len(sessions),
+        "per_session_bytes": round(report["sessions_bytes"] / n),
+        "per_component_bytes": {name: round(size / n) for name, size in sorted(components.items(), key=lambda kv: -kv[1])},
+        "shared_bytes": report["shared_bytes"],
+        "traced_bytes": (report["traced"] or {}).get("current_bytes"),
+        "top_allocations": report["top_allocations"],
+    }
+
+
+def run_case(mode, size, workdir, sessions, seed, memory=False, timeout_s=CASE_TIMEOUT_S):
+    """Run one case in a child process; returns (result, None) or (None, reason) if it crashed or hung."""
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    proc = ctx.Process(target=_run_case, args=(mode, size, workdir, sessions, seed, results, memory))
+    proc.start()
+    deadline = time.monotonic() + timeout_s
+    result = failure = None
+    while result is None and failure is None:
+        try:
+            result = results.get(timeout=1.0)
+        except queue.Empty:
+            if not proc.is_alive():
+                try:  # it may have exited right after putting its result
+                    result = results.get(timeout=1.0)
+                except queue.Empty:
+                    failure = f"exited with code {proc.exitcode} without a result"
+            elif time.monotonic() > deadline:
+                proc.terminate()
+                failure = f"no result within {timeout_s:g}s"
+    proc.join()
+    return result, failure
+
+
+# ----------------------------------------------------------------
+# Workspace + reporting
+# ----------------------------------------------------------------
+def prepare_workspace(size, seed):
+    """Generate pristine data for a size once and reuse it across runs; returns its directory."""
+    pristine = os.path.join(WORKSPACE, f"n{size}", f"seed-{seed}")
+    marker = os.path.join(pristine, ".complete")
+    if not os.path.exists(marker):
+        print(f"🧪 Generating {size} customers …")
+        shutil.rmtree(pristine, ignore_errors=True)
+        generate(size, os.path.join(pristine, "data"), seed=seed)
+        open(marker, "w").close()
+    return pristine
+
+
+def fresh_workdir(pristine):
+    """Copy the pristine data into an empty run directory, so a case never sees another case's writes."""
+    workdir = os.path.join(os.path.dirname(pristine), "run")
+    shutil.rmtree(workdir, ignore_errors=True)
+    shutil.copytree(os.path.join(pristine, "data"), os.path.join(workdir, "data"))
+    os.makedirs(os.path.join(workdir, "logs"))
+    return workdir
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Print deltas against a baseline run; return the list of regressions."""
+    base = {(r["mode"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    print("\n📉 Comparison with baseline")
+    for r in results:
+        b = base.get((r["mode"], r["size"]))
+        if not b or not b["latency_ms"]["p95"] or not r["latency_ms"]["p95"]:
+            continue
+        p95_delta = r["latency_ms"]["p95"] / b["latency_ms"]["p95"] - 1.0
+        tps_delta = r["throughput_tps"] / b["throughput_tps"] - 1.0 if b["throughput_tps"] else 0.0
+        rss_delta = r["peak_rss_mb"] / b["peak_rss_mb"] - 1.0 if b["peak_rss_mb"] else 0.0
+        flag = ""
+        if p95_delta > tolerance or tps_delta < -tolerance or rss_delta > tolerance:
+            flag = "  ⚠️ REGRESSION"
+            regressions.append((r["mode"], r["size"]))
+        print(
+            f"{r['mode']:>10} {r['size']:>9}  p95 {p95_delta:+.1%}  "
+            f"tps {tps_delta:+.1%}  rss {rss_delta:+.1%}{flag}"
+        )
+    return regressions
+
+
+def print_table(results):
+    print(f"\n{'mode':>10} {'size':>9} {'turns':>6} {'err':>4} {'p50':>9} {'p95':>9} {'p99':>9} {'tps':>9} {'rss MB':>8}")
+    for r in results:
+        lat = r["latency_ms"]
+        print(
+            f"{r['mode']:>10} {r['size']:>9} {r['turns']:>6} {r['errors']:>4} "
+            f"{lat['p50']:>9} {lat['p95']:>9} {lat['p99']:>9} {r['throughput_tps']:>9} {r['peak_rss_mb']:>8}"
+        )
+
+
+def print_memory(results):
+    print(f"\n{'mode':>10} {'size':>9} {'KiB/session':>12}  heaviest components")
+    for r in results:
+        m = r["memory"]
+        top = ", ".join(f"{name} {size / 1024.0:.1f}" for name, size in list(m["per_component_bytes"].items())[:3])
+        print(f"{r['mode']:>10} {r['size']:>9} {m['per_session_bytes'] / 1024.0:>12.1f}  {top}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark all agent modes on synthetic data.")
+    parser.add_argument("--sizes", default="10,1000,100000", help="comma-separated customer counts")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--sessions", type=int, default=20, help="scripted conversations per run")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--llm-backend", default="fake", help="LLM_BACKEND for the runs")
+    parser.add_argument("--baseline", help="previous results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--memory", action="store_true",
+                        help="keep sessions alive and report memory per session/component (tracemalloc; slower)")
+    parser.add_argument("--timeout", type=float, default=CASE_TIMEOUT_S, help="seconds before a run is abandoned")
+    parser.add_argument("--out", default=None, help="results file (default: benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    os.environ["LLM_BACKEND"] = args.llm_backend
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    modes = [m for m in args.modes.split(",") if m]
+
+    results, failures = [], []
+    for size in sizes:
+        pristine = prepare_workspace(size, args.seed)
+        for mode in modes:
+            print(f"⏱️  {mode} @ {size} customers")
+            result, failure = run_case(mode, size, fresh_workdir(pristine), args.sessions, args.seed,
+                                       args.memory, args.timeout)
+            if failure:
+                print(f"❌ {mode} @ {size} customers {failure}")
+                failures.append({"mode": mode, "size": size, "error": failure})
+            else:
+                results.append(result)
+    print_table(results)
+    if args.memory:
+        print_memory(results)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "llm_backend": args.llm_backend,
+        "sessions": args.sessions,
+        "results": results,
+        "failures": failures,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out = args.out or os.path.join(RESULTS_DIR, f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {out}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            return 1
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
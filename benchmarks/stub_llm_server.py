@@ -0,0 +1,139 @@
+# ===========================================
+# benchmarks/stub_llm_server.py (Local Groq / Ollama Stub Server)
+# ===========================================
+"""
+Speaks just enough of the Groq (OpenAI-style chat completions) and Ollama
+(/api/generate) HTTP APIs to exercise the LLM router offline, with
+configurable latency and error rate. Answers come from FakeLLM.
+
+    python -m benchmarks.stub_llm_server --port 8801 --latency-ms 800          # "slow Groq"
+    python -m benchmarks.stub_llm_server --port 8802 --latency-ms 50           # "local Ollama"
+    GROQ_BASE_URL=http://127.0.0.1:8801 OLLAMA_BASE_URL=http://127.0.0.1:8802 \\
+        GROQ_API_KEY=stub LLM_BACKEND=router streamlit run app.py
+
+POST /admin with {"latency_ms": .., "error_rate": ..} changes behaviour live.
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from llm_loader import FakeLLM
+
+
+class StubState:
+    def __init__(self, latency_ms=0.0, error_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.requests = 0
+        self.rng = random.Random(seed)
+        self.fake = FakeLLM()
+        self.lock = threading.Lock()
+
+    def answer(self, prompt):
+        with self.lock:
+            self.requests += 1
+            fail = self.rng.random() < self.error_rate
+        time.sleep(self.latency_ms / 1000.0)
+        return None if fail else self.fake.invoke(prompt)
+
+
+def make_handler(state):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status, body, content_type="application/json"):
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+
+            if self.path == "/admin":
+                state.latency_ms = float(body.get("latency_ms", state.latency_ms))
+                state.error_rate = float(body.get("error_rate", state.error_rate))
+                self._send(200, json.dumps({"latency_ms": state.latency_ms, "error_rate": state.error_rate}))
+                return
+
+            if self.path.endswith("/chat/completions"):
+                prompt = body["messages"][-1]["content"]
+                text = state.answer(prompt)
+                if text is None:
+                    self._send(503, json.dumps({"error": {"message": "stub outage", "type": "server_error"}}))
+                    return
+                self._send(200, json.dumps({
+                    "id": f"stub-{state.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": text},
+                        "finish_reason": "stop",
+                        "logprobs": None,
+                    }],
+                    "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4,
+                              "total_tokens": (len(prompt) + len(text)) // 4},
+                    "system_fingerprint": "stub",
+                }))
+                return
+
+            if self.path == "/api/generate":
+                text = state.answer(body.get("prompt", ""))
+                if text is None:
+                    self._send(500, json.dumps({"error": "stub outage"}))
+                    return
+                lines = [
+                    json.dumps({"model": body.get("model"), "response": text, "done": False}),
+                    json.dumps({"model": body.get("model"), "response": "", "done": True}),
+                ]
+                self._send(200, "\n".join(lines) + "\n", "application/x-ndjson")
+                return
+
+            self._send(404, json.dumps({"error": "not found"}))
+
+        def log_message(self, *args):
+            pass
+
+    return StubHandler
+
+
+class StubServer(ThreadingHTTPServer):
+    # Async clients open hundreds of connections at once; the default backlog is 5
+    request_queue_size = 1024
+
+
+def serve(port, latency_ms=0.0, error_rate=0.0, host="127.0.0.1", seed=None, background=False):
+    """Start a stub server; with background=True returns (server, state) after starting a daemon thread."""
+    state = StubState(latency_ms, error_rate, seed)
+    server = StubServer((host, port), make_handler(state))
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server, state
+    print(f"🧪 Stub LLM server on http://{host}:{port} (latency {latency_ms} ms, error rate {error_rate})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return server, state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Groq/Ollama-compatible stub LLM server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8801)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    serve(args.port, args.latency_ms, args.error_rate, args.host, args.seed)
+    sys.exit(0)
@@ -0,0 +1,165 @@
+# ===========================================
+# benchmarks/synthetic_data.py (Synthetic Data Generator)
+# ===========================================
+"""
+Generates customers.csv, payments.csv and claims.csv with the same headers
+and value formats as data/, scaled from 10 to 10M customers.
+
+    python -m benchmarks.synthetic_data --customers 1000000 --out /tmp/af_data
+
+Rows are built with vectorized numpy in chunks, so 10M customers needs a few
+hundred MB of RAM at most. IDs follow the real patterns (C001 / LN001), so
+customer i is always C{i:03d} with loan LN{i:03d}.
+"""
+
+import os
+import shutil
+import argparse
+import numpy as np
+import pandas as pd
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data")
+CHUNK_ROWS = 500_000
+AS_OF = pd.Timestamp("2025-11-04")
+
+FIRST_NAMES = ["John", "Jane", "Raj", "Sarah", "Arjun", "Emily", "Anita", "Ravi", "David", "Priya",
+               "Amit", "Neha", "Vikram", "Sneha", "Rahul", "Pooja", "Karan", "Meera", "Suresh", "Divya"]
+LAST_NAMES = ["Doe", "Smith", "Kumar", "Lee", "Patel", "Clark", "Verma", "Sharma", "Wilson", "Reddy",
+              "Singh", "Iyer", "Gupta", "Nair", "Das", "Rao", "Mehta", "Joshi", "Khan", "Bose"]
+CITIES = ["Bangalore", "Mumbai", "Delhi", "Pune", "Hyderabad", "Chennai", "Kolkata", "Ahmedabad", "Gurugram", "Jaipur"]
+CITY_WEIGHTS = [0.16, 0.15, 0.14, 0.09, 0.1, 0.1, 0.08, 0.07, 0.06, 0.05]
+VEHICLES = ["Honda Civic", "Hyundai Creta", "Tata Nexon", "Maruti Baleno", "Kia Seltos", "MG Hector",
+            "Toyota Innova", "Skoda Rapid", "Volkswagen Polo", "Maruti Swift"]
+VEHICLE_WEIGHTS = [0.08, 0.14, 0.13, 0.12, 0.1, 0.06, 0.07, 0.05, 0.07, 0.18]
+SERVICE_CENTERS = ["ABC Motors", "Dream Cars", "Speed Auto", "City Motors", "Shine Auto",
+                   "SmartDrive", "DriveCare", "Elite Auto"]
+INCIDENT_TYPES = ["Accident", "Damage", "Theft"]
+INCIDENT_WEIGHTS = [0.6, 0.28, 0.12]
+CLAIM_STATUSES = ["Closed", "In Progress", "New"]
+CLAIM_STATUS_WEIGHTS = [0.6, 0.25, 0.15]
+CLAIM_COLUMNS = ["claim_id", "customer_id", "incident_type", "incident_date", "claim_status",
+                 "estimated_damage", "service_center", "claim_amount", "settlement_date", "remarks"]
+
+
+def _ids(prefix, start, stop):
+    nums = pd.Series(np.arange(start, stop)).astype(str).str.zfill(3)
+    return prefix + nums
+
+
+def _dates(ts):
+    """Format timestamps the way the source CSVs store them (dd-mm-yyyy)."""
+    return pd.Series(pd.DatetimeIndex(ts).strftime("%d-%m-%Y"))
+
+
+def _write(df, path, first):
+    df.to_csv(path, mode="w" if first else "a", header=first, index=False)
+
+
+def customer_chunk(rng, start, stop):
+    n = stop - start
+    first = rng.choice(FIRST_NAMES, n)
+    last = rng.choice(LAST_NAMES, n)
+    ids = _ids("C", start, stop)
+    return pd.DataFrame({
+        "customer_id": ids,
+        "first_name": first,
+        "last_name": last,
+        "email": (pd.Series(first).str.lower() + "." + pd.Series(last).str.lower()
+                  + "." + ids.str.lower() + "@example.com"),
+        # Unique 10-digit numbers: an affine permutation of the customer index
+        "phone": (9000000000 + (np.arange(start, stop, dtype=np.int64) * 7919) % 1000000000).astype(str),
+        "loan_number": _ids("LN", start, stop),
+        "vehicle_model": rng.choice(VEHICLES, n, p=VEHICLE_WEIGHTS),
+        "vehicle_year": rng.integers(2015, 2025, n).astype(str),
+        "registered_city": rng.choice(CITIES, n, p=CITY_WEIGHTS),
+    })
+
+
+def payment_chunk(rng, start, stop):
+    n = stop - start
+    emi = (np.round(rng.lognormal(np.log(15000), 0.25, n) / 100) * 100).astype(np.int64)
+    overdue = rng.random(n) < 0.25
+    overdue_days = np.where(overdue, np.minimum(rng.exponential(30, n).astype(np.int64) + 1, 180), 0)
+    # Paid loans are due within the next month; overdue ones were due overdue_days ago
+    next_due = np.where(
+        overdue,
+        AS_OF - pd.to_timedelta(overdue_days, unit="D"),
+        AS_OF + pd.to_timedelta(rng.integers(1, 31, n), unit="D"),
+    )
+    last_payment = pd.DatetimeIndex(next_due) - pd.DateOffset(months=1)
+    last_payment = last_payment - pd.to_timedelta(np.where(overdue, 30, 0), unit="D")
+    return pd.DataFrame({
+        "loan_number": _ids("LN", start, stop),
+        "customer_id": _ids("C", start, stop),
+        "last_payment_date": _dates(last_payment),
+        "next_due_date": _dates(next_due),
+        "emi_amount": emi,
+        "payment_status": np.where(overdue, "Overdue", "Paid"),
+        "outstanding_balance": emi * rng.integers(2, 61, n),
+        "overdue_days": overdue_days,
+        "remarks": np.where(overdue, "Payment delayed", "On-time payment"),
+    })
+
+
+def claim_chunk(rng, start, stop, next_claim_no):
+    n = stop - start
+    # ~20% of customers have claims; a few have several
+    per_customer = np.where(rng.random(n) < 0.2, rng.poisson(1.0, n) + 1, 0)
+    customers = np.repeat(np.arange(start, stop), per_customer)
+    m = len(customers)
+    if m == 0:
+        return pd.DataFrame(columns=CLAIM_COLUMNS), next_claim_no
+
+    incident = AS_OF - pd.to_timedelta(rng.integers(0, 720, m), unit="D")
+    status = rng.choice(CLAIM_STATUSES, m, p=CLAIM_STATUS_WEIGHTS)
+    closed = status == "Closed"
+    settled = incident + pd.to_timedelta(rng.integers(7, 60, m), unit="D")
+    amount = np.where(status == "New", 0, (np.round(rng.gamma(2.0, 7000, m) / 500) * 500).astype(np.int64))
+    cities = rng.choice(CITIES, m, p=CITY_WEIGHTS)
+    centers = pd.Series(rng.choice(SERVICE_CENTERS, m)) + " " + cities
+
+    df = pd.DataFrame({
+        "claim_id": _ids("CLM", next_claim_no, next_claim_no + m),
+        "customer_id": "C" + pd.Series(customers).astype(str).str.zfill(3),
+        "incident_type": rng.choice(INCIDENT_TYPES, m, p=INCIDENT_WEIGHTS),
+        "incident_date": _dates(incident),
+        "claim_status": status,
+        "estimated_damage": "Synthetic damage description",
+        "service_center": np.where(status == "New", "", centers),
+        "claim_amount": amount,
+        "settlement_date": np.where(closed, _dates(settled), ""),
+        "remarks": np.where(closed, "Claim settled successfully", "Under review"),
+    })
+    return df, next_claim_no + m
+
+
+def generate(n_customers, out_dir, seed=42, chunk_rows=CHUNK_ROWS):
+    """Write the three datasets (plus sop_data.json) for n_customers into out_dir."""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    paths = {name: os.path.join(out_dir, f"{name}.csv") for name in ("customers", "payments", "claims")}
+
+    next_claim_no = 1
+    for start in range(1, n_customers + 1, chunk_rows):
+        stop = min(start + chunk_rows, n_customers + 1)
+        first = start == 1
+        _write(customer_chunk(rng, start, stop), paths["customers"], first)
+        _write(payment_chunk(rng, start, stop), paths["payments"], first)
+        claims, next_claim_no = claim_chunk(rng, start, stop, next_claim_no)
+        if first or not claims.empty:
+            _write(claims, paths["claims"], first)
+
+    for extra in ("sop_data.json",):
+        shutil.copy(os.path.join(DATA_PATH, extra), os.path.join(out_dir, extra))
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic auto-finance datasets.")
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    paths = generate(args.customers, args.out, seed=args.seed)
+    print(f"✅ Generated {args.customers} customers → {args.out}")
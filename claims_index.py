@@ -0,0 +1,232 @@
+# ===========================================
+# claims_index.py (Per-Customer Claim Timeline Index)
+# ===========================================
+
+import copy
+import string
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+from data_store import add_change_listener, SHARD_CACHE_SIZE
+
+OPEN_STATUSES = ("New", "In Progress")
+
+# Raw CSV header → the names AutoFinanceGROC normalizes them to
+COLUMN_ALIASES = {
+    "customer_id": ("customer_id", "CustomerID"),
+    "claim_id": ("claim_id", "ClaimID"),
+    "claim_status": ("claim_status", "Status"),
+    "incident_date": ("incident_date",),
+    "settlement_date": ("settlement_date", "Settlement_Date"),
+}
+
+
+def parse_dates(series):
+    """
+    Parse claim dates once. The CSV uses dd-mm-yyyy, but claims created by
+    fnol_claim_tool are written as yyyy-mm-dd, so fall back to ISO.
+    Only the distinct values are parsed; dates repeat heavily across claims.
+    """
+    codes, uniques = pd.factorize(pd.Series(series, dtype="object").astype(str).str.strip())
+    text = pd.Series(uniques, dtype="object")
+    parsed = pd.to_datetime(text, format="%d-%m-%Y", errors="coerce")
+    missing = parsed.isna() & (text != "")
+    if missing.any():
+        parsed[missing] = pd.to_datetime(text[missing], format="%Y-%m-%d", errors="coerce")
+    values = parsed.to_numpy(dtype="datetime64[ns]")
+    out = np.full(len(codes), np.datetime64("NaT"), dtype="datetime64[ns]")
+    found = codes >= 0
+    out[found] = values[codes[found]]
+    return pd.Series(out, index=getattr(series, "index", None))
+
+
+def _column(df, name):
+    for alias in COLUMN_ALIASES[name]:
+        if alias in df.columns:
+            return df[alias]
+    return pd.Series([""] * len(df), index=df.index, dtype="object")
+
+
+class ClaimsIndex:
+    """
+    Claims grouped per customer and ordered by (incident date, claim number).
+    Answers are row positions into the table the index was built from, which
+    are also valid for any column-renamed view of it.
+
+    - latest(customer)             O(1)
+    - open_claims(customer)        O(k) over that customer's k claims
+    - between(customer, start, end) O(log k)
+    - all_between(start, end)       O(log n)
+    """
+
+    def __init__(self, claims: pd.DataFrame):
+        n = len(claims)
+        self.size = n
+        customers = _column(claims, "customer_id").astype(str).str.strip().str.lower().to_numpy(dtype=object)
+        claim_ids = _column(claims, "claim_id").astype(str)
+        self.incident_dates = parse_dates(_column(claims, "incident_date")).to_numpy(dtype="datetime64[ns]")
+        self.settlement_dates = parse_dates(_column(claims, "settlement_date")).to_numpy(dtype="datetime64[ns]")
+        self.is_open = _column(claims, "claim_status").astype(str).isin(OPEN_STATUSES).to_numpy()
+
+        # Numeric claim number breaks ties and avoids CLM1000 < CLM999
+        claim_no = pd.to_numeric(claim_ids.str.strip().str.lstrip(string.ascii_letters), errors="coerce").fillna(-1)
+        claim_no = claim_no.astype(np.int64).to_numpy()
+        self._claim_no = claim_no
+        self._tails = []  # (row offset, ClaimsIndex) for rows appended since the build
+        # NaT sorts first, so undated claims never shadow dated ones
+        dates_i8 = self.incident_dates.view("i8")
+
+        if n:
+            codes, uniques = pd.factorize(customers)
+            self._order = np.lexsort((claim_no, dates_i8, codes))
+            sorted_codes = codes[self._order]
+            bounds = np.flatnonzero(np.diff(sorted_codes)) + 1
+            starts = np.concatenate(([0], bounds))
+            stops = np.concatenate((bounds, [n]))
+            self._slices = {
+                uniques[code]: (int(start), int(stop))
+                for code, start, stop in zip(sorted_codes[starts], starts, stops)
+            }
+            self._sorted_dates = dates_i8[self._order]
+            self._by_date = np.argsort(dates_i8, kind="stable")
+            self._by_date_dates = dates_i8[self._by_date]
+        else:
+            self._order = np.empty(0, dtype=np.int64)
+            self._slices = {}
+            self._sorted_dates = np.empty(0, dtype=np.int64)
+            self._by_date = np.empty(0, dtype=np.int64)
+            self._by_date_dates = np.empty(0, dtype=np.int64)
+
+    @staticmethod
+    def _key(customer_id):
+        return str(customer_id).strip().lower()
+
+    # ----------------------------------------------------------------
+    # Incremental updates
+    # ----------------------------------------------------------------
+    @property
+    def tail_rows(self):
+        return sum(t.size for _, t in self._tails)
+
+    def extend(self, delta: pd.DataFrame):
+        """
+        Index rows appended after the current end of the table.
+        The appended rows get their own small index (a "tail"); the base
+        arrays are reused, so the cost is proportional to the delta.
+        Returns a new index; the old one stays valid for the old table.
+        """
+        tail = ClaimsIndex(delta)
+        merged = copy.copy(self)
+        merged.size = self.size + tail.size
+        merged.incident_dates = np.concatenate((self.incident_dates, tail.incident_dates))
+        merged.settlement_dates = np.concatenate((self.settlement_dates, tail.settlement_dates))
+        merged.is_open = np.concatenate((self.is_open, tail.is_open))
+        merged._claim_no = np.concatenate((self._claim_no, tail._claim_no))
+        merged._tails = self._tails + [(self.size, tail)]
+        return merged
+
+    def _sorted(self, positions):
+        """Order positions by (incident date, claim number)."""
+        return positions[np.lexsort((self._claim_no[positions], self.incident_dates.view("i8")[positions]))]
+
+    # ----------------------------------------------------------------
+    # Queries
+    # ----------------------------------------------------------------
+    def _base_positions(self, key):
+        bounds = self._slices.get(key)
+        if bounds is None:
+            return self._order[:0]
+        return self._order[bounds[0]:bounds[1]]
+
+    def claims_for(self, customer_id):
+        """Row positions of a customer's claims, oldest incident first."""
+        key = self._key(customer_id)
+        positions = self._base_positions(key)
+        if not self._tails:
+            return positions
+        parts = [positions] + [offset + t.claims_for(key) for offset, t in self._tails]
+        return self._sorted(np.concatenate(parts))
+
+    def latest(self, customer_id):
+        """Row position of the customer's most recent claim, or None."""
+        if self._tails:
+            positions = self.claims_for(customer_id)
+            return int(positions[-1]) if len(positions) else None
+        bounds = self._slices.get(self._key(customer_id))
+        if bounds is None:
+            return None
+        return int(self._order[bounds[1] - 1])
+
+    def open_claims(self, customer_id):
+        positions = self.claims_for(customer_id)
+        return positions[self.is_open[positions]]
+
+    def between(self, customer_id, start=None, end=None):
+        """A customer's claims with start <= incident_date <= end."""
+        key = self._key(customer_id)
+        bounds = self._slices.get(key)
+        positions = self._order[:0]
+        if bounds is not None:
+            lo, hi = bounds
+            i, j = self._range(self._sorted_dates[lo:hi], start, end)
+            positions = self._order[lo + i:lo + j]
+        if not self._tails:
+            return positions
+        parts = [positions] + [offset + t.between(key, start, end) for offset, t in self._tails]
+        return self._sorted(np.concatenate(parts))
+
+    def all_between(self, start=None, end=None):
+        """All claims with start <= incident_date <= end, oldest first."""
+        i, j = self._range(self._by_date_dates, start, end)
+        positions = self._by_date[i:j]
+        if not self._tails:
+            return positions
+        parts = [positions] + [offset + t.all_between(start, end) for offset, t in self._tails]
+        return self._sorted(np.concatenate(parts))
+
+    @staticmethod
+    def _range(sorted_i8, start, end):
+        i = 0 if start is None else int(np.searchsorted(sorted_i8, pd.Timestamp(start).value, side="left"))
+        j = len(sorted_i8) if end is None else int(np.searchsorted(sorted_i8, pd.Timestamp(end).value, side="right"))
+        return i, j
+
+
+# Rebuild from scratch once appended tails exceed this share of the base
+MAX_TAIL_FRACTION = 0.05
+
+_lock = threading.Lock()
+# id(source table) -> (source table, index), least recently used first: the
+# whole claims table, plus one per open shard in the partitioned layout
+_cached = OrderedDict()
+CACHE_SIZE = SHARD_CACHE_SIZE + 1
+
+
+def get_claims_index(claims: pd.DataFrame) -> ClaimsIndex:
+    """Build the index once per claims table (the data store hands out one shared object)."""
+    with _lock:
+        hit = _cached.get(id(claims))
+        if hit is None or hit[0] is not claims:
+            hit = _cached[id(claims)] = (claims, ClaimsIndex(claims))
+        _cached.move_to_end(id(claims))
+        while len(_cached) > CACHE_SIZE:
+            _cached.popitem(last=False)
+        return hit[1]
+
+
+def _on_table_change(name, old, new, delta):
+    """Keep the cached index in step with data-store swaps, incrementally for appends."""
+    if name != "claims":
+        return
+    with _lock:
+        hit = _cached.pop(id(old), None)
+        if hit is None or hit[0] is not old:
+            return
+        index = hit[1]
+        if delta is not None and index.tail_rows + len(delta) <= max(1000, index.size * MAX_TAIL_FRACTION):
+            _cached[id(new)] = (new, index.extend(delta))
+        # otherwise rebuilt lazily on next use
+
+
+add_change_listener(_on_table_change)
@@ -0,0 +1,141 @@
+# ===========================================
+# collections_job.py (Overdue Recompute & Collections Worklist)
+# ===========================================
+"""
+payments.csv stores overdue_days / payment_status as exported, so they go
+stale the next day. recompute_overdue() derives both from next_due_date
+against an as-of date in one vectorized pass; the lookup tools call it at
+read time and this script runs it over the whole book:
+
+    python collections_job.py --as-of 2025-11-04 --out logs/collections_worklist.csv
+"""
+
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from claims_index import parse_dates
+
+BUCKETS = [(1, 30, "1-30"), (31, 60, "31-60"), (61, 90, "61-90"), (91, None, "90+")]
+WORKLIST_COLUMNS = [
+    "priority", "loan_number", "customer_id", "bucket", "overdue_days", "emi_amount",
+    "amount_due", "outstanding_balance", "next_due_date", "last_payment_date", "remarks",
+]
+
+
+def default_as_of():
+    """AUTOFIN_AS_OF (yyyy-mm-dd) if set, otherwise today."""
+    value = os.getenv("AUTOFIN_AS_OF")
+    return pd.Timestamp(value) if value else pd.Timestamp.today().normalize()
+
+
+# Raw CSV header first, then the alias agent_groc's normalized views use
+DUE_COLUMNS = ("next_due_date", "Due_Date")
+BALANCE_COLUMNS = ("outstanding_balance", "Balance")
+LAST_PAYMENT_COLUMNS = ("last_payment_date",)
+
+
+def _first_column(df, names):
+    return next((name for name in names if name in df.columns), None)
+
+
+def recompute_overdue(payments: pd.DataFrame, as_of=None) -> pd.DataFrame:
+    """
+    Return a copy of payments with overdue_days and payment_status derived
+    from next_due_date. A last_payment_date on or after the due date means
+    that instalment was paid (late), so the loan is not overdue. Rows
+    without a parseable due date keep their values. Works on raw tables and
+    on GROC's renamed views; values stay strings, like the rest of the loaders.
+    """
+    df = payments.copy()
+    due_column = _first_column(df, DUE_COLUMNS)
+    if df.empty or due_column is None:
+        return df
+
+    as_of = pd.Timestamp(as_of) if as_of is not None else default_as_of()
+    due = parse_dates(df[due_column]).to_numpy(dtype="datetime64[ns]")
+    known = ~np.isnat(due)
+    days = ((np.datetime64(as_of.to_datetime64(), "ns") - due) // np.timedelta64(1, "D")).astype(np.int64)
+    days = np.where(known, np.maximum(days, 0), 0)
+
+    last_column = _first_column(df, LAST_PAYMENT_COLUMNS)
+    if last_column is not None:
+        last_paid = parse_dates(df[last_column]).to_numpy(dtype="datetime64[ns]")
+        days = np.where(~np.isnat(last_paid) & (last_paid >= due), 0, days)
+
+    status = np.where(days > 0, "Overdue", "Paid").astype(object)
+    balance_column = _first_column(df, BALANCE_COLUMNS)
+    if balance_column is not None:
+        balance = pd.to_numeric(df[balance_column], errors="coerce").to_numpy()
+        status = np.where(known & (balance == 0), "Closed", status)
+
+    old_days = df["overdue_days"].to_numpy(dtype=object) if "overdue_days" in df.columns else np.full(len(df), "")
+    old_status = df["payment_status"].to_numpy(dtype=object) if "payment_status" in df.columns else np.full(len(df), "")
+    df["overdue_days"] = np.where(known, days.astype(str), old_days)
+    df["payment_status"] = np.where(known, status, old_status)
+    return df
+
+
+def build_worklist(payments: pd.DataFrame, as_of=None) -> pd.DataFrame:
+    """Overdue loans, most urgent first: oldest bucket, then largest exposure."""
+    df = recompute_overdue(payments, as_of)
+    if df.empty:
+        return pd.DataFrame(columns=WORKLIST_COLUMNS)
+
+    df = df[(df["payment_status"] == "Overdue").to_numpy()].copy()
+
+    def as_int(column):
+        return pd.to_numeric(df[column], errors="coerce").fillna(0).astype(np.int64).to_numpy()
+
+    overdue_days = as_int("overdue_days")
+    emi = as_int("emi_amount")
+    balance = as_int("outstanding_balance")
+
+    bucket_rank = np.zeros(len(df), dtype=np.int64)
+    bucket_name = np.full(len(df), "", dtype=object)
+    for rank, (lo, hi, name) in enumerate(BUCKETS, start=1):
+        in_bucket = (overdue_days >= lo) & (overdue_days <= (hi or np.iinfo(np.int64).max))
+        bucket_rank = np.where(in_bucket, rank, bucket_rank)
+        bucket_name = np.where(in_bucket, name, bucket_name)
+
+    # Missed instalments so far (at least one), capped at what is still owed
+    missed = np.maximum(np.ceil(overdue_days / 30.0), 1).astype(np.int64)
+    df["bucket"] = bucket_name
+    df["overdue_days"] = overdue_days
+    df["emi_amount"] = emi
+    df["outstanding_balance"] = balance
+    df["amount_due"] = np.minimum(emi * missed, balance)
+    df["_rank"] = bucket_rank
+
+    df = df.sort_values(["_rank", "outstanding_balance", "overdue_days"], ascending=False, kind="stable")
+    df["priority"] = np.arange(1, len(df) + 1)
+    return df.reindex(columns=WORKLIST_COLUMNS).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    from data_store import read_table
+
+    parser = argparse.ArgumentParser(description="Recompute overdue status and write a collections worklist.")
+    parser.add_argument("--as-of", help="yyyy-mm-dd (default: AUTOFIN_AS_OF or today)")
+    parser.add_argument("--out", default="logs/collections_worklist.csv")
+    parser.add_argument("--refreshed-payments", help="also write the full payments table with derived columns")
+    args = parser.parse_args()
+
+    as_of = pd.Timestamp(args.as_of) if args.as_of else default_as_of()
+    t0 = time.perf_counter()
+    payments = read_table("payments")
+    t1 = time.perf_counter()
+    worklist = build_worklist(payments, as_of)
+    t2 = time.perf_counter()
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    worklist.to_csv(args.out, index=False)
+    if args.refreshed_payments:
+        recompute_overdue(payments, as_of).to_csv(args.refreshed_payments, index=False)
+
+    print(
+        f"✅ {len(worklist)} of {len(payments)} loans overdue as of {as_of.date()} → {args.out}\n"
+        f"   load {t1 - t0:.2f}s, recompute + prioritise {t2 - t1:.2f}s"
+    )
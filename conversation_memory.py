@@ -0,0 +1,144 @@
+# ===========================================
+# conversation_memory.py (Bounded Conversation Memory)
+# ===========================================
+"""
+Prompt memory for the LLM-backed modes: the last few turns verbatim plus a
+structured summary (verified identity, identifiers the user stated, and
+the latest answered fact per topic). Turns that fall out of the window only survive through the
+summary, and render() is hard-capped, so the memory block a prompt carries
+stays the same size however long the chat runs.
+"""
+
+import os
+import re
+
+WINDOW_TURNS = int(os.getenv("MEMORY_WINDOW_TURNS", "4"))
+MAX_CHARS = int(os.getenv("MEMORY_MAX_CHARS", "1500"))
+TURN_CHARS = 240
+FACT_CHARS = 160
+
+IDENTITY_FIELDS = ("customer_id", "LoanID", "CustomerName")
+
+# Answer prefixes → topic of the fact they establish
+TOPICS = (
+    ("Payment Agent", "payment"),
+    ("💰", "payment"),
+    ("Claim Agent", "claim"),
+    ("🧾 Existing Claim", "claim"),
+    ("✅ New claim", "claim"),
+    ("SOP Agent", "coverage"),
+    ("📘", "coverage"),
+    ("Verification Agent: Verified", "identity"),
+    ("✅ Verified", "identity"),
+)
+
+CUSTOMER_RE = re.compile(r"\bC\d{3,}\b")
+LOAN_RE = re.compile(r"\bLN\d{3,}\b", re.IGNORECASE)
+
+
+def _clip(text, limit):
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def topic_of(answer):
+    answer = str(answer).lstrip()
+    for prefix, topic in TOPICS:
+        if answer.startswith(prefix):
+            return topic
+    return None
+
+
+class ConversationMemory:
+    def __init__(self, window=WINDOW_TURNS, max_chars=MAX_CHARS):
+        self.window = window
+        self.max_chars = max_chars
+        self.identity = {}  # verified only (remember_identity)
+        self.stated = {}  # identifiers typed by the user, not verified
+        self.facts = {}  # topic -> latest answer (clipped)
+        self.turns = []  # [(user, agent)], at most `window`
+        self.total_turns = 0
+
+    # ----------------------------------------------------------------
+    # Updates
+    # ----------------------------------------------------------------
+    def remember_identity(self, context):
+        """Record verified identity (e.g. the Supervisor's user_context)."""
+        for field in IDENTITY_FIELDS:
+            if context and context.get(field):
+                self.identity[field] = str(context[field])
+
+    def add_turn(self, user, agent):
+        user, agent = str(user), str(agent)
+        # Identifiers the user types are kept for context, never as verified
+        if m := CUSTOMER_RE.search(user):
+            self.stated["customer_id"] = m.group(0)
+        if m := LOAN_RE.search(user):
+            self.stated["LoanID"] = m.group(0).upper()
+
+        # The Supervisor appends "✅ Reflection: …"; only the answer is a fact
+        answer = agent.split("\n\n✅ Reflection:", 1)[0]
+        topic = topic_of(answer)
+        if topic:
+            self.facts[topic] = _clip(answer, FACT_CHARS)
+
+        self.turns.append((_clip(user, TURN_CHARS), _clip(answer, TURN_CHARS)))
+        del self.turns[: -self.window or None]
+        self.total_turns += 1
+
+    def clear(self):
+        self.identity.clear()
+        self.stated.clear()
+        self.facts.clear()
+        self.turns.clear()
+        self.total_turns = 0
+
+    # ----------------------------------------------------------------
+    # Rendering
+    # ----------------------------------------------------------------
+    def render(self):
+        """Memory block for a prompt ('' for a new conversation), at most max_chars."""
+        if not (self.identity or self.stated or self.facts or self.turns):
+            return ""
+        lines = ["[Conversation memory]"]
+        if self.identity:
+            lines.append("Verified customer: " + ", ".join(f"{k}={v}" for k, v in self.identity.items()))
+        stated = {k: v for k, v in self.stated.items() if self.identity.get(k) != v}
+        if stated:
+            lines.append("Stated by user (not verified): " + ", ".join(f"{k}={v}" for k, v in stated.items()))
+        for topic, fact in self.facts.items():
+            lines.append(f"Known {topic}: {fact}")
+        earlier = self.total_turns - len(self.turns)
+        if earlier > 0:
+            lines.append(f"({earlier} earlier turns summarized above)")
+        turn_lines = []
+        for user, agent in self.turns:
+            turn_lines += [f"User: {user}", f"Agent: {agent}"]
+
+        # Drop the oldest verbatim turns first; the summary is kept
+        while turn_lines and len("\n".join(lines + turn_lines)) > self.max_chars:
+            turn_lines = turn_lines[2:]
+        return "\n".join(lines + turn_lines)[: self.max_chars]
+
+    # ----------------------------------------------------------------
+    # Persistence (session store records are JSON)
+    # ----------------------------------------------------------------
+    def to_dict(self):
+        return {
+            "identity": self.identity,
+            "stated": self.stated,
+            "facts": self.facts,
+            "turns": [list(t) for t in self.turns],
+            "total_turns": self.total_turns,
+        }
+
+    @classmethod
+    def from_dict(cls, data, **kwargs):
+        memory = cls(**kwargs)
+        if data:
+            memory.identity = dict(data.get("identity", {}))
+            memory.stated = dict(data.get("stated", {}))
+            memory.facts = dict(data.get("facts", {}))
+            memory.turns = [tuple(t) for t in data.get("turns", [])][-memory.window:]
+            memory.total_turns = int(data.get("total_turns", len(memory.turns)))
+        return memory
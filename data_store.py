@@ -0,0 +1,617 @@
+# ===========================================
+# data_store.py (Process-wide Read-only Data Tables)
+# ===========================================
+
+import io
+import os
+import threading
+import contextlib
+from collections import OrderedDict
+import pandas as pd
+
+import partitions
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+# AUTOFIN_DATA_DIR points every agent at another data folder (e.g. benchmark data)
+DATA_PATH = os.getenv("AUTOFIN_DATA_DIR", os.path.join(os.path.dirname(__file__), "data"))
+DATASET_FILES = {
+    "customers": "customers.csv",
+    "payments": "payments.csv",
+    "claims": "claims.csv",
+}
+
+TAIL_BYTES = 256
+WATCH_INTERVAL = float(os.getenv("AUTOFIN_WATCH_INTERVAL", "2"))
+
+# "partitioned" reads the shard layout written by partitions.py
+DATA_LAYOUT = os.getenv("AUTOFIN_DATA_LAYOUT", "flat").lower()
+SHARD_DIR = os.getenv("AUTOFIN_SHARD_DIR") or os.path.join(DATA_PATH, "shards")
+SHARD_CACHE_SIZE = int(os.getenv("AUTOFIN_SHARD_CACHE", "32"))
+
+_lock = threading.RLock()
+_cache = {}  # name -> DataFrame (current snapshot)
+_meta = {}  # name -> {"mtime_ns", "size", "tail"} of the file the snapshot was read from
+_installed = {}  # name -> DataFrame installed by install_tables() (shared-memory views in a worker)
+_listeners = []
+_partition_listeners = []
+_versions = {name: 0 for name in DATASET_FILES}
+_version = 0
+_watcher = None
+_shards = OrderedDict()  # (name, shard) -> ((mtime_ns, size), DataFrame), least recently used first
+_keys = OrderedDict()  # (kind, shard) -> ((mtime_ns, size), {key: customer_id}), least recently used first
+_manifest_cache = (None, None)  # (manifest mtime_ns, manifest)
+_dataset_locks = {}  # name -> threading.RLock guarding the lock file below
+_lock_files = {}  # name -> [open lock file, depth], touched only by the thread holding the RLock
+
+
+def dataset_path(name):
+    return os.path.join(DATA_PATH, DATASET_FILES[name])
+
+
+def partitioned():
+    return DATA_LAYOUT == "partitioned"
+
+
+def read_table(name):
+    """Read one dataset from disk as plain strings (the format every agent expects)."""
+    if partitioned():
+        # The whole book, for bulk jobs; per-customer paths use get_partition()
+        frames = list(iter_partitions(name))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    path = dataset_path(name)
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    return pd.read_csv(path, dtype=str).fillna("")
+
+
+def _shard_signature(name):
+    manifest = _manifest()
+    if manifest is None or name not in manifest["datasets"]:
+        return None
+    signature = []
+    for shard in range(manifest["num_shards"]):
+        st = os.stat(partitions.shard_file(SHARD_DIR, name, shard))
+        signature.append((st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+
+def _file_meta(path):
+    if not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    with open(path, "rb") as f:
+        f.seek(max(st.st_size - TAIL_BYTES, 0))
+        tail = f.read(st.st_size - f.tell())
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "tail": tail}
+
+
+def _changed(name):
+    if partitioned():
+        return _meta.get(name) != _shard_signature(name)
+    path = dataset_path(name)
+    meta = _meta.get(name)
+    if not os.path.exists(path):
+        return meta is not None
+    if meta is None:
+        return True
+    st = os.stat(path)
+    return st.st_mtime_ns != meta["mtime_ns"] or st.st_size != meta["size"]
+
+
+def _read_appended(name, old, meta):
+    """
+    If the file only grew by whole lines since the snapshot, parse just the
+    new bytes. Returns (delta DataFrame, meta after the delta), or None when a
+    full reload is needed.
+    """
+    if old is None or old.columns.empty or meta is None or not meta["tail"].endswith(b"\n"):
+        return None
+    path = dataset_path(name)
+    with open(path, "rb") as f:
+        mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+        f.seek(meta["size"] - len(meta["tail"]))
+        if f.read(len(meta["tail"])) != meta["tail"]:
+            return None
+        appended = f.read()
+    if not appended or not appended.endswith(b"\n"):
+        return None
+
+    delta = pd.read_csv(
+        io.BytesIO(appended), header=None, names=list(old.columns), dtype=str
+    ).fillna("")
+    new_meta = {
+        "mtime_ns": mtime_ns,
+        "size": meta["size"] + len(appended),
+        "tail": (meta["tail"] + appended)[-TAIL_BYTES:],
+    }
+    return delta, new_meta
+
+
+def refresh(name):
+    """
+    Bring one table up to date with its file. Appended rows are applied as a
+    delta; anything else rebuilds the snapshot. Either way the new table is
+    swapped in atomically, so readers holding the old one are unaffected.
+    Returns True if the table changed.
+    """
+    global _version
+    with _lock:
+        installed = name in _installed
+        # Installed tables follow their file only if installed with its metadata
+        if installed and (name not in _meta or partitioned()):
+            return False
+        if not _changed(name):
+            return False
+        old = _installed[name] if installed else _cache.get(name)
+        meta = _meta.get(name)
+        path = dataset_path(name)
+
+        if partitioned():
+            # Shard files only change through append_rows (which patches the
+            # cached book itself) or a rebuild, so reload the book
+            delta, new_meta, new = None, _shard_signature(name), read_table(name)
+        else:
+            appended = None
+            if meta and os.path.exists(path) and os.path.getsize(path) > meta["size"]:
+                appended = _read_appended(name, old, meta)
+            if appended is not None:
+                delta, new_meta = appended
+                if installed:
+                    delta = _like(delta, old)
+                new = pd.concat([old, delta], ignore_index=True)
+            else:
+                # Re-read if the file moved under us, so meta always matches the rows
+                delta = None
+                for _ in range(3):
+                    new_meta = _file_meta(path)
+                    new = read_table(name)
+                    if _file_meta(path) == new_meta:
+                        break
+
+        (_installed if installed else _cache)[name], _meta[name] = new, new_meta
+        _versions[name] += 1
+        _version += 1
+
+    for listener in list(_listeners):
+        listener(name, old, new, delta)
+    return True
+
+
+def _like(rows, table):
+    """rows with table's column dtypes, so appending to Arrow-backed shared tables stays chunked (no copy)."""
+    return rows.astype({c: table[c].dtype for c in rows.columns if c in table.columns and table[c].dtype != object})
+
+
+def _patch_installed(name, rows):
+    """Append rows to an installed table this process wrote to (its file is not tracked)."""
+    global _version
+    with _lock:
+        old = _installed[name]
+        new = _installed[name] = pd.concat([old, _like(rows, old)], ignore_index=True)
+        _versions[name] += 1
+        _version += 1
+    for listener in list(_listeners):
+        listener(name, old, new, rows)
+
+
+def get_table(name):
+    """
+    Return the shared DataFrame for a dataset.
+    Tables are loaded once per process and refreshed only when the file
+    changes. Callers must treat the result as read-only.
+    """
+    if name in _installed:
+        if name in _meta and _changed(name):
+            refresh(name)
+        return _installed[name]
+    if name not in _cache or _changed(name):
+        refresh(name)
+    return _cache[name]
+
+
+# ----------------------------------------------------------------
+# Partitioned layout (AUTOFIN_DATA_LAYOUT=partitioned)
+# ----------------------------------------------------------------
+def _manifest():
+    global _manifest_cache
+    path = os.path.join(SHARD_DIR, partitions.MANIFEST)
+    if not os.path.exists(path):
+        return None
+    mtime_ns = os.stat(path).st_mtime_ns
+    if _manifest_cache[0] != mtime_ns:
+        _manifest_cache = (mtime_ns, partitions.read_manifest(SHARD_DIR))
+    return _manifest_cache[1]
+
+
+def _require_manifest():
+    manifest = _manifest()
+    if manifest is None:
+        raise FileNotFoundError(
+            f"No shard manifest in {SHARD_DIR} — run `python partitions.py` or unset AUTOFIN_DATA_LAYOUT."
+        )
+    return manifest
+
+
+def _key_shard(kind, shard):
+    path = partitions.key_file(SHARD_DIR, kind, shard)
+    st = os.stat(path)
+    meta = (st.st_mtime_ns, st.st_size)
+    with _lock:
+        hit = _keys.get((kind, shard))
+        if hit is not None and hit[0] == meta:
+            _keys.move_to_end((kind, shard))
+            return hit[1]
+    keys = pd.read_csv(path, dtype=str).fillna("")
+    # First occurrence wins (appended duplicates don't take over a key)
+    keys = keys.drop_duplicates("key")
+    mapping = dict(zip(keys["key"], keys["customer_id"]))
+    with _lock:
+        _keys[(kind, shard)] = (meta, mapping)
+        _keys.move_to_end((kind, shard))
+        while len(_keys) > 2 * SHARD_CACHE_SIZE:
+            _keys.popitem(last=False)
+    return mapping
+
+
+def _resolve_key(kind, value):
+    key = partitions.normalize_key(kind, value)
+    if not key:
+        return None
+    return _key_shard(kind, partitions.shard_of(key, _require_manifest()["num_shards"])).get(key)
+
+
+def resolve_customer(loan=None, phone=None):
+    """customer_id for a loan number (preferred) or phone via the key index, or None."""
+    if loan:
+        return _resolve_key("loan", loan)
+    if phone:
+        return _resolve_key("phone", phone)
+    return None
+
+
+def _load_shard(name, shard):
+    path = partitions.shard_file(SHARD_DIR, name, shard)
+    st = os.stat(path)
+    meta = (st.st_mtime_ns, st.st_size)
+    key = (name, shard)
+    with _lock:
+        hit = _shards.get(key)
+        if hit is not None and hit[0] == meta:
+            _shards.move_to_end(key)
+            return hit[1]
+    df = pd.read_csv(path, dtype=str).fillna("")
+    with _lock:
+        _shards[key] = (meta, df)
+        _shards.move_to_end(key)
+        while len(_shards) > SHARD_CACHE_SIZE:
+            _shards.popitem(last=False)
+    return df
+
+
+def get_partition(name, key):
+    """
+    The rows a lookup for one customer needs: in the partitioned layout the
+    shard `key` maps to (key may be a customer_id or a loan number), in the
+    flat layout the whole shared table. Callers filter it exactly as they
+    would the full table, and must treat it as read-only.
+    """
+    if not partitioned():
+        return get_table(name)
+    if name in _installed:
+        return _installed[name]
+    manifest = _require_manifest()
+    key = str(key or "").strip()
+    # Agents sometimes carry the loan number as the customer key
+    key = resolve_customer(loan=key) or key
+    return _load_shard(name, partitions.shard_of(key, manifest["num_shards"]))
+
+
+def iter_partitions(name):
+    """Every shard of a dataset in order (cached shards are reused; others are not cached)."""
+    manifest = _require_manifest()
+    if name not in manifest["datasets"]:
+        return
+    for shard in range(manifest["num_shards"]):
+        with _lock:
+            hit = _shards.get((name, shard))
+        if hit is not None:
+            yield _load_shard(name, shard)
+        else:
+            yield pd.read_csv(partitions.shard_file(SHARD_DIR, name, shard), dtype=str).fillna("")
+
+
+def partition_signature(name):
+    """(mtime_ns, size) of each shard file of a dataset; the same in every process, None if not partitioned."""
+    return _shard_signature(name) if partitioned() else None
+
+
+def row_count(name):
+    """Rows in a dataset without loading it in the partitioned layout (manifest counts)."""
+    if partitioned() and name not in _installed:
+        return _require_manifest()["datasets"].get(name, {}).get("rows", 0)
+    return len(get_table(name))
+
+
+def partition_cache_info():
+    with _lock:
+        frames = [df for _, df in _shards.values()]
+        return {
+            "layout": DATA_LAYOUT,
+            "cached_shards": len(frames),
+            "capacity": SHARD_CACHE_SIZE,
+            "rows": sum(len(df) for df in frames),
+            "bytes": int(sum(df.memory_usage(index=True, deep=True).sum() for df in frames)),
+        }
+
+
+def _append_line_safe(path, text):
+    """Append CSV text, adding a newline first if the file does not end with one."""
+    prefix = ""
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            prefix = "" if f.read(1) == b"\n" else "\n"
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        f.write(prefix + text)
+
+
+def _append_partitioned(name, rows):
+    """
+    Route rows to their shards; cached shards and a cached book are patched,
+    not re-read. Other processes append to the same files, so the whole
+    sequence (including the manifest's read-modify-write of the row count)
+    runs under dataset_lock("shards") on a freshly read manifest, and cached
+    frames are only patched if nobody else changed their file meanwhile.
+    """
+    global _version, _manifest_cache
+    with dataset_lock("shards"), _lock:
+        manifest = partitions.read_manifest(SHARD_DIR)
+        if manifest is None:
+            _require_manifest()  # raises with the setup hint
+        columns = manifest["datasets"][name]["columns"]
+        rows = rows.reindex(columns=columns).fillna("").astype(str)
+        shards = partitions.shard_ids(rows[partitions.PARTITION_KEY], manifest["num_shards"])
+        signature_before = _shard_signature(name)
+        book_current = name in _cache and _meta.get(name) == signature_before
+
+        for shard in pd.unique(shards):
+            group = rows[shards == shard]
+            path = partitions.shard_file(SHARD_DIR, name, int(shard))
+            before = os.stat(path)
+            _append_line_safe(path, group.to_csv(index=False, header=False, lineterminator="\n"))
+            hit = _shards.pop((name, int(shard)), None)
+            if hit is not None and hit[0] == (before.st_mtime_ns, before.st_size):
+                st = os.stat(path)
+                _shards[(name, int(shard))] = (
+                    (st.st_mtime_ns, st.st_size), pd.concat([hit[1], group], ignore_index=True)
+                )
+        if name == "customers":
+            for kind in partitions.KEY_KINDS:
+                keys = partitions.key_rows(rows, kind)
+                key_shards = partitions.shard_ids(keys["key"], manifest["num_shards"])
+                for shard in pd.unique(key_shards):
+                    _append_line_safe(
+                        partitions.key_file(SHARD_DIR, kind, int(shard)),
+                        keys[key_shards == shard].to_csv(index=False, header=False, lineterminator="\n"),
+                    )
+        manifest["datasets"][name]["rows"] += len(rows)
+        partitions.write_manifest(SHARD_DIR, manifest)
+        _manifest_cache = (os.stat(os.path.join(SHARD_DIR, partitions.MANIFEST)).st_mtime_ns, manifest)
+
+        if name in _installed:
+            # Tables the caller installed; keep this process's own appends visible
+            _patch_installed(name, rows)
+        old = _cache.get(name)
+        new = None
+        signature_after = _shard_signature(name)
+        if book_current:
+            new = _cache[name] = pd.concat([old, rows], ignore_index=True)
+            _meta[name] = signature_after
+        _versions[name] += 1
+        _version += 1
+
+    if new is not None:
+        for listener in list(_listeners):
+            listener(name, old, new, rows)
+    for listener in list(_partition_listeners):
+        listener(name, signature_before, signature_after, rows)
+    return len(rows)
+
+
+def append_rows(name, rows: pd.DataFrame):
+    """
+    Append rows to a dataset file in one write (header only for a new file)
+    and refresh the cached table, which picks them up as a delta.
+    Columns are aligned to the existing table; missing ones are left empty.
+    In the partitioned layout each row goes to its customer's shard.
+    """
+    if partitioned():
+        return _append_partitioned(name, rows)
+    path = dataset_path(name)
+    with _lock:
+        current = get_table(name)
+        columns = list(current.columns) if len(current.columns) else list(rows.columns)
+        rows = rows.reindex(columns=columns)
+        needs_header = not os.path.exists(path) or os.path.getsize(path) == 0
+        _append_line_safe(path, rows.to_csv(index=False, header=needs_header, lineterminator="\n"))
+        if not refresh(name) and name in _installed:
+            _patch_installed(name, rows.fillna("").astype(str))
+    return len(rows)
+
+
+def get_tables():
+    return {name: get_table(name) for name in DATASET_FILES}
+
+
+def data_version():
+    """Monotonic counter bumped on every table change; caches can key on it."""
+    return _version
+
+
+def data_signature():
+    """
+    (name, mtime_ns, size) of every data file. Unlike data_version() this is
+    the same in every process reading the same files, so it can key state
+    that is shared across workers.
+    """
+    if partitioned():
+        return tuple((name, _shard_signature(name)) for name in DATASET_FILES)
+    signature = []
+    for name in DATASET_FILES:
+        path = dataset_path(name)
+        if os.path.exists(path):
+            st = os.stat(path)
+            signature.append((name, st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+
+def table_version(name):
+    return _versions[name]
+
+
+def add_partition_listener(listener):
+    """
+    Register listener(name, signature_before, signature_after, rows), called
+    after this process appends rows in the partitioned layout (where the
+    whole book is usually not cached, so change listeners do not fire).
+    State keyed on partition_signature(name) == signature_before can fold
+    the rows in and move to signature_after; any other change (e.g. another
+    process's append) leaves the signatures apart and forces a rebuild.
+    """
+    _partition_listeners.append(listener)
+
+
+def add_change_listener(listener):
+    """listener(name, old_table, new_table, delta_or_None) runs after each swap."""
+    _listeners.append(listener)
+
+
+def _lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    while True:
+        try:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:  # LK_LOCK gives up after ~10s; keep waiting
+            continue
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextlib.contextmanager
+def dataset_lock(name):
+    """
+    Exclusive hold on a dataset across threads and processes (a lock file in
+    the data folder), for check-then-append sequences such as allocating
+    claim IDs. Re-entrant within a thread. Tables read while holding it
+    include every row other holders appended before.
+    """
+    with _lock:
+        thread_lock = _dataset_locks.setdefault(name, threading.RLock())
+    with thread_lock:
+        entry = _lock_files.get(name)
+        if entry is None:
+            f = open(os.path.join(DATA_PATH, f".{name}.lock"), "a+b")
+            _lock_file(f)
+            entry = _lock_files[name] = [f, 0]
+        entry[1] += 1
+        try:
+            yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del _lock_files[name]
+                _unlock_file(entry[0])
+                entry[0].close()
+
+
+def snapshot_tables():
+    """
+    (tables, file metadata) read together, for install_tables() in another
+    process. Empty in the partitioned layout: each process loads the shards
+    it needs (checked against their files), which keeps memory per shard
+    and picks up other processes' appends.
+    """
+    if partitioned():
+        return {}, {}
+    with _lock:
+        tables = get_tables()
+        return tables, {name: _meta.get(name) for name in tables}
+
+
+def install_tables(tables, meta=None):
+    """
+    Use externally provided tables (e.g. shared-memory views in a worker
+    process) instead of reading the files. With the metadata from
+    snapshot_tables() rows appended to a file later, by this or any other
+    process, are applied on top as a delta; without it the tables stay
+    pinned apart from this process's own append_rows().
+    """
+    global _version
+    with _lock:
+        _installed.update(tables)
+        for name in tables:
+            if meta and meta.get(name) is not None and not partitioned():
+                _meta[name] = meta[name]
+            else:
+                _meta.pop(name, None)
+        _version += 1
+
+
+def clear_tables():
+    global _version
+    with _lock:
+        _cache.clear()
+        _meta.clear()
+        _installed.clear()
+        _shards.clear()
+        _keys.clear()
+        _version += 1
+
+
+# ----------------------------------------------------------------
+# Background watcher
+# ----------------------------------------------------------------
+class DataWatcher(threading.Thread):
+    """Polls data/ file mtimes and applies changes off the request path."""
+
+    def __init__(self, interval=WATCH_INTERVAL):
+        super().__init__(name="autofin-data-watcher", daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            for name in DATASET_FILES:
+                try:
+                    if name in _cache:
+                        refresh(name)
+                except Exception as e:
+                    print(f"⚠️ Data watcher failed to refresh {name} — {type(e).__name__}: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def start_watcher(interval=WATCH_INTERVAL):
+    """Start the process-wide watcher once; later calls return the running one."""
+    global _watcher
+    with _lock:
+        if _watcher is None or not _watcher.is_alive():
+            _watcher = DataWatcher(interval)
+            _watcher.start()
+        return _watcher
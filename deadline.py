@@ -0,0 +1,164 @@
+# ===========================================
+# deadline.py (Per-Turn Deadlines & Fallback Counters)
+# ===========================================
+"""
+A turn's time budget travels with the turn in a context variable, so
+verification, GROC handlers, LLM calls (including the router's backends)
+all see the same deadline without extra parameters:
+
+    with deadline_scope(8.0):
+        value = run_within(func, arg, share=0.5)   # at most half of the time left
+
+run_within() bounds a blocking call: when its slice runs out the caller
+gets DeadlineExceeded and moves on to a fallback; the abandoned call
+finishes in the background and its result is dropped. LLM calls
+(llm=True) run on their own threads, so a hung model cannot use up the
+threads data lookups need, and the Groq client takes the time left as its
+HTTP timeout, so an abandoned request ends with the deadline.
+
+await_within() is the async form: the awaiting task is cancelled, which
+stops native awaits, while blocking work already running on a thread
+finishes like an abandoned run_within() call. Fallbacks are counted per
+kind (fallback_counts(), and autofin_fallbacks_total on the metrics
+endpoint).
+"""
+
+import os
+import time
+import asyncio
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from tracing import metrics
+
+_pool = ThreadPoolExecutor(max_workers=int(os.getenv("DEADLINE_THREADS", "16")), thread_name_prefix="deadline")
+_llm_pool = ThreadPoolExecutor(max_workers=int(os.getenv("DEADLINE_LLM_THREADS", "16")), thread_name_prefix="deadline-llm")
+_current = contextvars.ContextVar("autofin_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class Deadline:
+    def __init__(self, budget_s):
+        self.budget_s = budget_s
+        self.expires_at = time.monotonic() + budget_s
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0.0
+
+
+class deadline_scope:
+    """Make `budget_s` the deadline for the enclosed block (nested scopes only tighten it)."""
+
+    def __init__(self, budget_s):
+        self.budget_s = budget_s
+
+    def __enter__(self):
+        outer = _current.get()
+        budget = self.budget_s if outer is None else min(self.budget_s, outer.remaining())
+        self.deadline = Deadline(budget)
+        self._token = _current.set(self.deadline)
+        return self.deadline
+
+    def __exit__(self, *exc):
+        _current.reset(self._token)
+        return False
+
+
+def current_deadline():
+    return _current.get()
+
+
+def remaining(default=None):
+    """Seconds left in the current turn, or `default` when no deadline is set."""
+    d = _current.get()
+    return default if d is None else d.remaining()
+
+
+def check_deadline(stage=""):
+    d = _current.get()
+    if d is not None and d.expired():
+        raise DeadlineExceeded(f"deadline exceeded before {stage or 'stage'}")
+
+
+def run_within(func, *args, share=1.0, reserve=0.0, llm=False, **kwargs):
+    """
+    Call func under a slice of the current deadline: `share` of the time
+    left after holding back `reserve` seconds for later stages. Without a
+    deadline this is a plain call. llm=True runs it on the LLM threads.
+    """
+    d = _current.get()
+    if d is None:
+        return func(*args, **kwargs)
+    budget = (d.remaining() - reserve) * share
+    if budget <= 0.0:
+        raise DeadlineExceeded(f"no time left for {getattr(func, '__name__', 'call')}")
+    ctx = contextvars.copy_context()
+    future = (_llm_pool if llm else _pool).submit(ctx.run, _bounded, budget, func, args, kwargs)
+    try:
+        return future.result(timeout=budget)
+    except FutureTimeout:
+        future.cancel()
+        raise DeadlineExceeded(f"{getattr(func, '__name__', 'call')} exceeded {budget:.2f}s") from None
+
+
+def _bounded(budget, func, args, kwargs):
+    # Nested calls (e.g. LLM router hedging) see the slice, not the whole turn
+    with deadline_scope(budget):
+        return func(*args, **kwargs)
+
+
+async def await_within(awaitable, share=1.0, reserve=0.0):
+    """
+    Async run_within(): await under a slice of the current deadline. On
+    overrun the awaiting task is cancelled, which stops native awaits (e.g.
+    AsyncGroq requests) and drops run_blocking() work that has not started;
+    blocking work already running keeps its thread until it returns, but it
+    runs under the slice, so check_deadline() and LLM timeouts end it early.
+    """
+    d = _current.get()
+    if d is None:
+        return await awaitable
+    budget = (d.remaining() - reserve) * share
+    if budget <= 0.0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded("no time left")
+    try:
+        return await asyncio.wait_for(_abounded(budget, awaitable), timeout=budget)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"exceeded {budget:.2f}s") from None
+
+
+async def _abounded(budget, awaitable):
+    with deadline_scope(budget):
+        return await awaitable
+
+
+# ----------------------------------------------------------------
+# Fallback counters
+# ----------------------------------------------------------------
+_counts_lock = threading.Lock()
+_counts = {}
+
+
+def record_fallback(kind):
+    with _counts_lock:
+        _counts[kind] = _counts.get(kind, 0) + 1
+    metrics.count("autofin_fallbacks_total", kind)
+
+
+def fallback_counts():
+    with _counts_lock:
+        return dict(_counts)
+
+
+def reset_fallback_counts():
+    with _counts_lock:
+        _counts.clear()
@@ -2,10 +2,20 @@
 # llm_loader.py (Final Stable Version)
 # ===========================================
 import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import threading
+import weakref
+from typing import Any
 from dotenv import load_dotenv
 from langchain.llms.base import LLM
 from langchain_community.llms import Ollama
-from groq import Groq
+from groq import Groq, AsyncGroq
+from tracing import span
+from deadline import DeadlineExceeded, remaining
 
 load_dotenv()
 
@@ -27,9 +37,11 @@ class ChatGroq(LLM):
         metadata=None,
         verbose=False,
         cache=None,
+        base_url=None,
     ):
         # Use object.__setattr__ to bypass Pydantic's BaseModel field restriction
-        object.__setattr__(self, "client", Groq(api_key=groq_api_key))
+        # base_url (GROQ_BASE_URL) lets tests point at a local stub server
+        object.__setattr__(self, "client", Groq(api_key=groq_api_key, base_url=base_url))
         object.__setattr__(self, "model", model)
         object.__setattr__(self, "temperature", temperature)
         object.__setattr__(self, "max_tokens", max_tokens)
@@ -40,17 +52,60 @@ class ChatGroq(LLM):
         object.__setattr__(self, "metadata", metadata or {})
         object.__setattr__(self, "verbose", verbose)
         object.__setattr__(self, "cache", cache)  # ✅ NEW — fixes AttributeError
+        # Async clients hold loop-bound connection pools: one per event loop
+        object.__setattr__(self, "async_clients", weakref.WeakKeyDictionary())
+
+    def _within_deadline(self, client):
+        """
+        Inside a turn deadline: one attempt with the time left as the HTTP
+        timeout (a retry could not answer in time), so a hung request frees
+        its thread when the deadline passes.
+        """
+        left = remaining()
+        if left is None:
+            return client
+        if left <= 0.0:
+            raise DeadlineExceeded("no time left for the Groq request")
+        return client.with_options(timeout=left, max_retries=0)
 
     def _call(self, prompt: str, **kwargs) -> str:
         """
         Execute a Groq chat completion and return model output.
         """
-        completion = self.client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model=self.model,
-            temperature=self.temperature,
-            max_tokens=self.max_tokens,
-        )
+        with span("llm.groq", model=self.model) as s:
+            completion = self._within_deadline(self.client).chat.completions.create(
+                messages=[{"role": "user", "content": prompt}],
+                model=self.model,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+            )
+            if completion.usage is not None:
+                s.set(total_tokens=completion.usage.total_tokens)
+        return completion.choices[0].message.content
+
+    def _async_client(self):
+        loop = asyncio.get_running_loop()
+        client = self.async_clients.get(loop)
+        if client is None:
+            # Same endpoint, key and retry policy as the sync client
+            client = self.async_clients[loop] = AsyncGroq(
+                api_key=self.client.api_key,
+                base_url=self.client.base_url,
+                max_retries=self.client.max_retries,
+            )
+        return client
+
+    async def _acall(self, prompt: str, stop=None, run_manager=None, **kwargs) -> str:
+        """Non-blocking chat completion through AsyncGroq."""
+        with span("llm.groq", model=self.model) as s:
+            completion = await self._within_deadline(self._async_client()).chat.completions.create(
+                messages=[{"role": "user", "content": prompt}],
+                model=self.model,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+            )
+            if completion.usage is not None:
+                s.set(total_tokens=completion.usage.total_tokens)
         return completion.choices[0].message.content
 
     @property
@@ -58,17 +113,145 @@ class ChatGroq(LLM):
         return "groq"
 
 
-def load_llm(default_model="llama3-8b-8192"):
+class FakeLLM(LLM):
+    """
+    Deterministic offline LLM for benchmarks and replays (LLM_BACKEND=fake).
+    Answers reflection prompts with YES and drives the ReAct agent through
+    at most one tool call, so every mode can run without network access.
+    """
+
+    latency_ms: float = 0.0
+
+    def _call(self, prompt: str, stop=None, run_manager=None, **kwargs) -> str:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        return self._answer(prompt)
+
+    async def _acall(self, prompt: str, stop=None, run_manager=None, **kwargs) -> str:
+        # Simulated latency doesn't hold a thread, like a real network call
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000.0)
+        return self._answer(prompt)
+
+    def _answer(self, prompt):
+        if "Determine if the user's goal was fully achieved" in prompt:
+            return "YES - the result answers the stated goal."
+
+        # ReAct prompts: one tool call, then answer with its observation
+        if "Action Input" in prompt:
+            question = prompt.rsplit("Question:", 1)[-1]
+            observation = re.findall(r"Observation: (.*?)(?:\nThought:|$)", question, re.S)
+            if observation:
+                return f" I now know the final answer.\nFinal Answer: {observation[-1].strip()}"
+
+            lowered = question.lower()
+            customer = re.search(r"\bC\d+\b", question)
+            if customer and any(k in lowered for k in ["emi", "payment", "due", "balance"]):
+                tool, tool_input = "Payment Lookup", customer.group(0)
+            elif customer and "claim" in lowered:
+                tool, tool_input = "FNOL Claim Tool", customer.group(0)
+            else:
+                tool, tool_input = "SOP Lookup", question.split("\n", 1)[0].strip()
+            return f" I should use the {tool} tool.\nAction: {tool}\nAction Input: {tool_input}"
+
+        return "OK"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+
+_cache_lock = threading.Lock()
+_caches = {}  # cache file -> {prompt hash: response}
+
+
+class CachedLLM(LLM):
+    """
+    Prompt-keyed response cache in front of another LLM (LLM_BACKEND=cached).
+    Hits are served from a JSONL file; misses call the inner backend and are
+    appended, so replays of recorded traffic stop calling the network.
+    """
+
+    inner: Any
+    path: str = "logs/llm_cache.jsonl"
+
+    def _entries(self):
+        with _cache_lock:
+            if self.path not in _caches:
+                entries = {}
+                if os.path.exists(self.path):
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        for line in f:
+                            if line.strip():
+                                item = json.loads(line)
+                                entries[item["key"]] = item["response"]
+                _caches[self.path] = entries
+            return _caches[self.path]
+
+    def _call(self, prompt: str, stop=None, run_manager=None, **kwargs) -> str:
+        key = hashlib.sha256(f"{stop}|{prompt}".encode("utf-8")).hexdigest()
+        entries = self._entries()
+        if key in entries:
+            return entries[key]
+        return self._record(entries, key, self.inner.invoke(prompt, stop=stop))
+
+    async def _acall(self, prompt: str, stop=None, run_manager=None, **kwargs) -> str:
+        key = hashlib.sha256(f"{stop}|{prompt}".encode("utf-8")).hexdigest()
+        entries = self._entries()
+        if key in entries:
+            return entries[key]
+        return self._record(entries, key, await self.inner.ainvoke(prompt, stop=stop))
+
+    def _record(self, entries, key, response):
+        with _cache_lock:
+            entries[key] = response
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "response": response}, ensure_ascii=False) + "\n")
+        return response
+
+    @property
+    def _llm_type(self) -> str:
+        return "cached"
+
+
+def load_llm(default_model="llama3-8b-8192", backend=None, model=None):
     """
     Dynamically load either Groq Cloud LLM or Local Ollama
     based on environment variable LLM_BACKEND.
     """
-    backend = os.getenv("LLM_BACKEND", "groq").lower()
-    model_name = os.getenv("LLM_MODEL", default_model)
+    backend = (backend or os.getenv("LLM_BACKEND", "groq")).lower()
+    model_name = model or os.getenv("LLM_MODEL", default_model)
 
     if backend == "ollama":
         print(f"🧠 Using Local Ollama model: {model_name}")
-        return Ollama(model=model_name)
+        return Ollama(model=model_name, base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"))
+    elif backend == "router":
+        from llm_router import RoutedLLM, parse_backends
+
+        backends = []
+        for name, entry_model in parse_backends(os.getenv("LLM_ROUTER_BACKENDS", "groq,ollama:mistral")):
+            try:
+                llm = load_llm(default_model, backend=name, model=entry_model)
+            except Exception as e:
+                print(f"⚠️ Skipping LLM backend {name} — {type(e).__name__}: {e}")
+                continue
+            if isinstance(llm, ChatGroq):
+                # The router fails over instead of letting the SDK retry with backoff
+                object.__setattr__(llm, "client", llm.client.with_options(max_retries=0))
+            backends.append((f"{name}:{entry_model or model_name}", llm))
+        if not backends:
+            raise ValueError("❌ No usable backend in LLM_ROUTER_BACKENDS.")
+        print(f"🔀 Routing LLM calls across {', '.join(n for n, _ in backends)}")
+        return RoutedLLM(backends=backends)
+    elif backend == "fake":
+        print("🧪 Using deterministic fake LLM")
+        return FakeLLM(latency_ms=float(os.getenv("FAKE_LLM_LATENCY_MS", "0")))
+    elif backend == "cached":
+        inner = load_llm(default_model, backend=os.getenv("LLM_CACHE_BACKEND", "groq"))
+        path = os.getenv("LLM_CACHE_FILE", "logs/llm_cache.jsonl")
+        print(f"🗃️ Using cached LLM responses from {path}")
+        return CachedLLM(inner=inner, path=path)
     else:
         groq_api_key = os.getenv("GROQ_API_KEY")
         if not groq_api_key:
@@ -79,4 +262,5 @@ def load_llm(default_model="llama3-8b-8192"):
             groq_api_key=groq_api_key,
             temperature=0.2,
             max_tokens=2048,
+            base_url=os.getenv("GROQ_BASE_URL") or None,
         )
@@ -0,0 +1,252 @@
+# ===========================================
+# llm_router.py (Latency-Aware Multi-Backend LLM)
+# ===========================================
+"""
+RoutedLLM fronts several backends (e.g. Groq models plus local Ollama) as
+one LangChain LLM (LLM_BACKEND=router):
+
+- rolling latency and error rate are tracked per backend/model
+- each call goes to the healthy backend with the best score
+- if it has not answered after LLM_HEDGE_MS, the next backend is tried in
+  parallel and the first answer wins
+- an error fails over to the next backend immediately; a backend whose
+  recent error rate is too high sits out LLM_ROUTER_COOLDOWN_S
+- errors count for LLM_ROUTER_ERROR_WINDOW_S only, and a backend that has
+  not been called for LLM_ROUTER_PROBE_S (e.g. demoted after an outage)
+  gets the next call as a probe, so traffic returns once it recovers
+- within a turn deadline (deadline.py) the router gives up when it expires
+
+    LLM_BACKEND=router LLM_ROUTER_BACKENDS=groq:llama3-8b-8192,ollama:mistral
+
+For local testing, point GROQ_BASE_URL / OLLAMA_BASE_URL at
+benchmarks/stub_llm_server.py instances.
+"""
+
+import os
+import time
+import asyncio
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any
+
+from langchain.llms.base import LLM
+from tracing import span
+from deadline import DeadlineExceeded, remaining
+
+HEDGE_MS = float(os.getenv("LLM_HEDGE_MS", "1500"))
+COOLDOWN_S = float(os.getenv("LLM_ROUTER_COOLDOWN_S", "30"))
+ERROR_WINDOW_S = float(os.getenv("LLM_ROUTER_ERROR_WINDOW_S", "60"))
+PROBE_S = float(os.getenv("LLM_ROUTER_PROBE_S", "15"))
+WINDOW = 50  # calls kept per backend
+EWMA_ALPHA = 0.3  # weight of the newest latency; reacts within a few calls
+MIN_SAMPLES = 5  # before an error rate can mark a backend unhealthy
+MAX_ERROR_RATE = 0.5
+
+_pool = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_ROUTER_THREADS", "16")), thread_name_prefix="llm-router")
+
+
+class BackendStats:
+    """Rolling latency / error window for one backend (thread-safe)."""
+
+    def __init__(self, name, window=WINDOW, error_window_s=ERROR_WINDOW_S, cooldown_s=COOLDOWN_S):
+        self.name = name
+        self.error_window_s = error_window_s
+        self.cooldown_s = cooldown_s
+        self._lock = threading.Lock()
+        self._calls = deque(maxlen=window)  # (time, latency_s, ok)
+        self.ewma_s = None  # smoothed latency of successful calls
+        self.down_until = 0.0
+        self.last_used = time.time()  # when a call last finished or was claimed as a probe
+
+    def record(self, latency_s, ok):
+        now = time.time()
+        with self._lock:
+            self._calls.append((now, latency_s, ok))
+            self.last_used = now
+            if ok:
+                self.ewma_s = latency_s if self.ewma_s is None else (
+                    EWMA_ALPHA * latency_s + (1 - EWMA_ALPHA) * self.ewma_s
+                )
+        calls = self._recent()
+        errors = sum(1 for _, good in calls if not good)
+        if not ok and len(calls) >= MIN_SAMPLES and errors / len(calls) > MAX_ERROR_RATE:
+            self.down_until = now + self.cooldown_s
+
+    def _recent(self):
+        """(latency_s, ok) of the calls inside the error window; older errors no longer count."""
+        cutoff = time.time() - self.error_window_s
+        with self._lock:
+            return [(lat, ok) for t, lat, ok in self._calls if t >= cutoff]
+
+    def healthy(self):
+        return time.time() >= self.down_until
+
+    def claim_probe(self, interval_s):
+        """True (once per interval) if the backend has sat idle for interval_s and is out of cooldown."""
+        now = time.time()
+        with self._lock:
+            if now < self.down_until or now - self.last_used < interval_s:
+                return False
+            self.last_used = now  # concurrent calls don't all probe
+            return True
+
+    def snapshot(self):
+        calls = self._recent()
+        ok = sorted(lat for lat, good in calls if good)
+        return {
+            "calls": len(calls),
+            "error_rate": round(sum(1 for _, good in calls if not good) / len(calls), 3) if calls else 0.0,
+            "p50_ms": round(ok[len(ok) // 2] * 1000.0, 1) if ok else None,
+            "ewma_ms": round(self.ewma_s * 1000.0, 1) if self.ewma_s is not None else None,
+            "healthy": self.healthy(),
+        }
+
+    def score(self):
+        """Lower is better: smoothed successful latency, inflated by errors."""
+        snap = self.snapshot()
+        if not snap["calls"] and snap["ewma_ms"] is None:
+            return 0.0  # untried backends get a chance in configured order
+        latency = snap["ewma_ms"] if snap["ewma_ms"] is not None else 60_000.0
+        return latency * (1.0 + 4.0 * snap["error_rate"])
+
+
+class RoutedLLM(LLM):
+    """One LLM over several (name, llm) backends with routing, hedging and failover."""
+
+    backends: Any
+    hedge_ms: float = HEDGE_MS
+    probe_s: float = PROBE_S
+    error_window_s: float = ERROR_WINDOW_S
+    cooldown_s: float = COOLDOWN_S
+    stats: Any = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = {
+            name: BackendStats(name, error_window_s=self.error_window_s, cooldown_s=self.cooldown_s)
+            for name, _ in self.backends
+        }
+
+    def ranked(self):
+        """
+        Backend names, best first; unhealthy ones last (still used if nothing
+        else is left). A lower-ranked backend idle for probe_s goes first
+        once, so a recovered backend gets fresh samples; a slow or failing
+        probe is hedged or failed over like any call.
+        """
+        order = {name: i for i, (name, _) in enumerate(self.backends)}
+        names = sorted(
+            order,
+            key=lambda n: (not self.stats[n].healthy(), self.stats[n].score(), order[n]),
+        )
+        for name in names[1:]:
+            if self.stats[name].claim_probe(self.probe_s):
+                names.remove(name)
+                return [name, *names]
+        return names
+
+    def _invoke(self, name, prompt, stop):
+        llm = dict(self.backends)[name]
+        t0 = time.perf_counter()
+        try:
+            with span("llm.router.backend", backend=name):
+                result = llm.invoke(prompt, stop=stop)
+        except Exception:
+            self.stats[name].record(time.perf_counter() - t0, ok=False)
+            raise
+        self.stats[name].record(time.perf_counter() - t0, ok=True)
+        return result
+
+    def _submit(self, name, prompt, stop):
+        # Keep the caller's trace context in the worker thread
+        ctx = contextvars.copy_context()
+        return _pool.submit(ctx.run, self._invoke, name, prompt, stop)
+
+    def _call(self, prompt: str, stop=None, run_manager=None, **kwargs) -> str:
+        queue = self.ranked()
+        pending = {}
+        errors = []
+        with span("llm.router") as s:
+            while queue or pending:
+                if queue and (not pending or len(pending) < 2):
+                    name = queue.pop(0)
+                    pending[self._submit(name, prompt, stop)] = name
+                # Hedge: give the in-flight call hedge_ms before starting the next,
+                # but never wait past the turn's deadline
+                timeout = self.hedge_ms / 1000.0 if queue else None
+                left = remaining()
+                if left is not None:
+                    if left <= 0.0:
+                        raise DeadlineExceeded("LLM call ran out of time — " + "; ".join(errors or ["no answer yet"]))
+                    timeout = left if timeout is None else min(timeout, left)
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        errors.append(f"{name}: {type(e).__name__}: {e}")
+                        continue
+                    s.set(backend=name, attempts=len(errors) + 1 + len(pending))
+                    return result
+            raise RuntimeError("All LLM backends failed — " + "; ".join(errors))
+
+    async def _ainvoke(self, name, prompt, stop):
+        llm = dict(self.backends)[name]
+        t0 = time.perf_counter()
+        try:
+            with span("llm.router.backend", backend=name):
+                result = await llm.ainvoke(prompt, stop=stop)
+        except Exception:
+            self.stats[name].record(time.perf_counter() - t0, ok=False)
+            raise
+        self.stats[name].record(time.perf_counter() - t0, ok=True)
+        return result
+
+    async def _acall(self, prompt: str, stop=None, run_manager=None, **kwargs) -> str:
+        """Same routing as _call, with tasks on the caller's event loop instead of pool threads."""
+        queue = self.ranked()
+        pending = {}
+        errors = []
+        with span("llm.router") as s:
+            while queue or pending:
+                if queue and len(pending) < 2:
+                    name = queue.pop(0)
+                    pending[asyncio.ensure_future(self._ainvoke(name, prompt, stop))] = name
+                timeout = self.hedge_ms / 1000.0 if queue else None
+                left = remaining()
+                if left is not None:
+                    if left <= 0.0:
+                        raise DeadlineExceeded("LLM call ran out of time — " + "; ".join(errors or ["no answer yet"]))
+                    timeout = left if timeout is None else min(timeout, left)
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    name = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        errors.append(f"{name}: {type(e).__name__}: {e}")
+                        continue
+                    s.set(backend=name, attempts=len(errors) + 1 + len(pending))
+                    return result
+            raise RuntimeError("All LLM backends failed — " + "; ".join(errors))
+
+    def report(self):
+        return {name: self.stats[name].snapshot() for name, _ in self.backends}
+
+    @property
+    def _llm_type(self) -> str:
+        return "router"
+
+
+def parse_backends(spec):
+    """'groq:llama3-8b-8192,ollama:mistral' → [('groq', 'llama3-8b-8192'), ('ollama', 'mistral')]."""
+    backends = []
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if item:
+            backend, _, model = item.partition(":")
+            backends.append((backend.strip().lower(), model.strip() or None))
+    return backends
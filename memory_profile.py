@@ -0,0 +1,360 @@
+# ===========================================
+# memory_profile.py (Opt-in Memory Accounting)
+# ===========================================
+"""
+Attributes a long-running process's memory to sessions and components:
+
+- per session: every attribute of the session's agent (GROC table views,
+  LLM clients, ...), its session-store record (verified context, completed
+  steps, conversation memory) and the Streamlit chat_history
+- shared: process-wide caches every session reaches but none owns (data
+  store tables and shards, claims indexes, tool executor, answer caches);
+  these are counted once and never charged to a session
+- top allocation sites from tracemalloc, optionally as growth since a
+  baseline snapshot
+
+Sizes are deep estimates (object graph walk; DataFrames by their column
+buffers, so views over a shared table cost nothing). Off unless
+AUTOFIN_MEMORY_PROFILE=1; the app then shows an admin panel in the sidebar.
+
+    report = memory_report()
+    dump_report("logs/memory_report.json")
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import types
+import weakref
+import threading
+import tracemalloc
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+PROFILE = os.getenv("AUTOFIN_MEMORY_PROFILE", "0") == "1"
+FRAMES = int(os.getenv("AUTOFIN_MEMORY_FRAMES", "1"))
+MAX_SESSIONS = int(os.getenv("AUTOFIN_MEMORY_MAX_SESSIONS", "200"))
+DUMP_FILE = os.getenv("AUTOFIN_MEMORY_DUMP", "logs/memory_report.json")
+TOP_N = 15
+
+# Process-wide caches, read only if their module is already loaded
+SHARED_GLOBALS = (
+    ("data_store", "_cache"),
+    ("data_store", "_installed"),
+    ("data_store", "_shards"),
+    ("data_store", "_keys"),
+    ("claims_index", "_cached"),
+    ("portfolio_aggregates", "_claims_state"),
+    ("portfolio_aggregates", "_exposure_state"),
+    ("tools.verify_user_tool", "_normalized"),
+    ("tools.verify_user_tool", "_results"),
+    ("tool_registry", "_tools"),
+    ("tool_registry", "_executor"),
+    ("supervisor_graph", "_shared"),
+    ("supervisor_agent", "_answers"),
+    ("llm_loader", "_caches"),
+    ("session_store", "_default_store"),
+)
+# Shared, but holds per-session records: sessions are charged their own record
+PER_SESSION_CONTAINERS = (("session_store", "_default_store"),)
+
+# Never walked into: code, classes, modules and OS handles are not session data
+_OPAQUE = (
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+    types.MethodType, types.CodeType, types.FrameType, weakref.ref,
+    threading.Thread, type(threading.Lock()), type(threading.RLock()),
+)
+
+
+def start(frames=FRAMES):
+    """Start tracemalloc (no-op if it is already tracing)."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def enabled():
+    return PROFILE
+
+
+# ----------------------------------------------------------------
+# Object sizing
+# ----------------------------------------------------------------
+def _buffer_bytes(array, seen):
+    """Bytes of the buffer an array views (object arrays include their elements), once per buffer."""
+    root = array
+    while isinstance(root, np.ndarray) and isinstance(root.base, np.ndarray):
+        root = root.base
+    if id(root) in seen:
+        return 0
+    seen[id(root)] = root
+    if not isinstance(root, np.ndarray):
+        return int(getattr(root, "nbytes", 0))
+    if root.dtype == object:
+        return int(pd.Series(root.ravel(), copy=False).memory_usage(index=False, deep=True))
+    return int(root.nbytes)
+
+
+def _pandas_bytes(obj, seen):
+    # pandas' own __sizeof__ is a deep memory_usage(); count the buffers ourselves instead
+    total = object.__sizeof__(obj)
+    if isinstance(obj, pd.RangeIndex):
+        return total
+    if isinstance(obj, pd.Index):
+        return total + _buffer_bytes(obj.to_numpy(copy=False), seen)
+    if isinstance(obj, pd.Series):
+        columns = [obj]
+    else:
+        columns = [obj.iloc[:, i] for i in range(obj.shape[1])]
+        total += sizeof(obj.columns, seen)
+    for column in columns:
+        total += _buffer_bytes(column.to_numpy(copy=False), seen)
+    return total + sizeof(obj.index, seen)
+
+
+def sizeof(obj, seen=None):
+    """
+    Deep size of obj in bytes. Objects whose id is in `seen` are skipped and
+    everything visited is added to it, so one `seen` across calls counts
+    shared structure once. `seen` maps id → object, which keeps temporaries
+    alive so their ids cannot be reused mid-walk.
+    """
+    seen = {} if seen is None else seen
+    total = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if isinstance(o, np.ndarray):
+            total += _buffer_bytes(o, seen)  # views of a counted buffer are free
+            continue
+        if id(o) in seen or isinstance(o, _OPAQUE):
+            continue
+        seen[id(o)] = o
+        if isinstance(o, (pd.DataFrame, pd.Series, pd.Index)):
+            total += _pandas_bytes(o, seen)
+        else:
+            total += sys.getsizeof(o, 0)
+            stack.extend(gc.get_referents(o))
+    return total
+
+
+# ----------------------------------------------------------------
+# Sessions
+# ----------------------------------------------------------------
+_lock = threading.Lock()
+# session_id -> {"agent": weakref or None, "chat_history": list}, most recent last.
+# Agents are held weakly so profiling never keeps a dropped session alive.
+_sessions = OrderedDict()
+
+
+def track_session(session_id, agent=None, chat_history=None):
+    """Register (or refresh) a session for memory_report(); cheap enough to call on every rerun."""
+    if not PROFILE:
+        return
+    ref = weakref.ref(agent) if agent is not None else None
+    with _lock:
+        _sessions[session_id] = {"agent": ref, "chat_history": chat_history}
+        _sessions.move_to_end(session_id)
+        while len(_sessions) > MAX_SESSIONS:
+            _sessions.popitem(last=False)
+
+
+def forget_session(session_id):
+    with _lock:
+        _sessions.pop(session_id, None)
+
+
+def _live_sessions():
+    with _lock:
+        for session_id in [sid for sid, s in _sessions.items() if s["agent"] is not None and s["agent"]() is None]:
+            del _sessions[session_id]
+        return [(sid, s["agent"]() if s["agent"] else None, s["chat_history"]) for sid, s in _sessions.items()]
+
+
+def agent_components(agent):
+    """Component name → object for one agent; nested GROC agents are split out by attribute."""
+    parts = {}
+    for name, value in vars(agent).items():
+        if name in ("groc_agent", "groc") and hasattr(value, "__dict__"):
+            parts.update({f"{name}.{n}": v for n, v in vars(value).items()})
+        else:
+            parts[name] = value
+    store, session_id = getattr(agent, "store", None), getattr(agent, "session_id", None)
+    if store is not None and session_id is not None and hasattr(store, "get"):
+        # Verified context, completed_steps and memory live in the shared store
+        parts["session_record"] = store.get(session_id)
+    return parts
+
+
+def session_report(session_id, agent=None, chat_history=None, seen=None):
+    """Bytes per component for one session (`seen` = shared objects that are not charged)."""
+    seen = dict(seen or {})
+    parts = agent_components(agent) if agent is not None else {}
+    if chat_history is not None:
+        parts["chat_history"] = chat_history
+    components = {name: sizeof(value, seen) for name, value in parts.items()}
+    return {
+        "session_id": session_id,
+        "agent": type(agent).__name__ if agent is not None else None,
+        "total_bytes": sum(components.values()),
+        "components": dict(sorted(components.items(), key=lambda kv: -kv[1])),
+    }
+
+
+# ----------------------------------------------------------------
+# Shared caches
+# ----------------------------------------------------------------
+def shared_objects():
+    objects = {}
+    for module_name, attr in SHARED_GLOBALS:
+        module = sys.modules.get(module_name)
+        if module is not None and getattr(module, attr, None) is not None:
+            objects[f"{module_name}.{attr}"] = getattr(module, attr)
+    return objects
+
+
+def _shared_accounting():
+    """(bytes per shared cache, objects that sessions must not be charged for)."""
+    seen, sizes = {}, {}
+    containers = {f"{m}.{a}" for m, a in PER_SESSION_CONTAINERS}
+    objects = shared_objects()
+    for name, obj in objects.items():
+        if name not in containers:
+            sizes[name] = sizeof(obj, seen)
+    exclude = dict(seen)
+    exclude.update({id(objects[name]): objects[name] for name in containers if name in objects})
+    for name in containers & objects.keys():
+        sizes[name] = sizeof(objects[name], seen)
+    return dict(sorted(sizes.items(), key=lambda kv: -kv[1])), exclude
+
+
+# ----------------------------------------------------------------
+# Process / tracemalloc
+# ----------------------------------------------------------------
+_baseline = None
+
+
+def rss_bytes():
+    """Current resident set size (Linux), else None."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+# Allocations made by the profiler and the import machinery are not app memory
+_IGNORED_FILES = {
+    tracemalloc.__file__, __file__, "<unknown>",
+    "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>",
+}
+
+
+def set_baseline():
+    """Remember the current allocations; top_allocations() then reports growth since now."""
+    global _baseline
+    if tracemalloc.is_tracing():
+        _baseline = tracemalloc.take_snapshot()
+
+
+def clear_baseline():
+    global _baseline
+    _baseline = None
+
+
+def _site(traceback):
+    # Frames run oldest → most recent; the last one made the allocation
+    site = {"site": str(traceback[-1])}
+    if len(traceback) > 1:
+        site["stack"] = [str(frame) for frame in traceback]
+    return site
+
+
+def top_allocations(limit=TOP_N, key_type="lineno"):
+    """Largest allocation sites (or largest growth since set_baseline())."""
+    if not tracemalloc.is_tracing():
+        return []
+    # Filtering the grouped statistics is far cheaper than Snapshot.filter_traces()
+    snapshot = tracemalloc.take_snapshot()
+    if _baseline is not None:
+        stats = (s for s in snapshot.compare_to(_baseline, key_type) if s.traceback[-1].filename not in _IGNORED_FILES)
+        return [
+            {**_site(s.traceback), "size_bytes": s.size, "size_diff_bytes": s.size_diff,
+             "count": s.count, "count_diff": s.count_diff}
+            for s, _ in zip(stats, range(limit))
+        ]
+    stats = (s for s in snapshot.statistics(key_type) if s.traceback[-1].filename not in _IGNORED_FILES)
+    return [{**_site(s.traceback), "size_bytes": s.size, "count": s.count} for s, _ in zip(stats, range(limit))]
+
+
+def memory_report(limit=TOP_N):
+    """Per-session and shared bytes, process totals and top allocation sites."""
+    top = top_allocations(limit)  # before sizing, whose temporaries would show up
+    shared, exclude = _shared_accounting()
+    sessions = [session_report(sid, agent, history, exclude) for sid, agent, history in _live_sessions()]
+    sessions.sort(key=lambda s: -s["total_bytes"])
+    traced = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else None
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "pid": os.getpid(),
+        "rss_bytes": rss_bytes(),
+        "traced": {"current_bytes": traced[0], "peak_bytes": traced[1]} if traced else None,
+        "shared_bytes": sum(shared.values()),
+        "sessions_bytes": sum(s["total_bytes"] for s in sessions),
+        "shared": shared,
+        "sessions": sessions,
+        "top_allocations": top,
+        "since_baseline": _baseline is not None,
+    }
+
+
+def _kib(n):
+    return round(n / 1024.0, 1)
+
+
+def format_mib(n):
+    return f"{n / 2 ** 20:.1f} MiB" if n is not None else "n/a"
+
+
+def report_tables(report):
+    """memory_report() as small frames for display (KiB)."""
+    components = {}
+    for session in report["sessions"]:
+        for name, size in session["components"].items():
+            components[name] = components.get(name, 0) + size
+    return {
+        "sessions": pd.DataFrame(
+            [(s["session_id"][:12], s["agent"], _kib(s["total_bytes"])) for s in report["sessions"]],
+            columns=["session", "agent", "KiB"],
+        ),
+        "components (all sessions)": pd.DataFrame(
+            sorted(((name, _kib(size)) for name, size in components.items()), key=lambda r: -r[1]),
+            columns=["component", "KiB"],
+        ),
+        "shared caches": pd.DataFrame(
+            [(name, _kib(size)) for name, size in report["shared"].items()], columns=["cache", "KiB"]
+        ),
+        "top allocations": pd.DataFrame(
+            [(a["site"], _kib(a.get("size_diff_bytes", a["size_bytes"])), a.get("count_diff", a["count"]))
+             for a in report["top_allocations"]],
+            columns=["site", "KiB (growth)" if report["since_baseline"] else "KiB", "blocks"],
+        ),
+    }
+
+
+def dump_report(path=None, limit=TOP_N):
+    """Write memory_report() as JSON (atomically) and return the path."""
+    path = path or DUMP_FILE
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(memory_report(limit), f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+if PROFILE:
+    start()
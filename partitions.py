@@ -0,0 +1,126 @@
+# ===========================================
+# partitions.py (Partitioned Data Layout)
+# ===========================================
+"""
+Splits customers / payments / claims into N shard files hashed by
+customer_id, plus a manifest and a key index:
+
+    shards/manifest.json                 shard count, columns and row counts
+    shards/keys/<kind>/part-0003.csv     loan_number / phone → customer_id,
+                                         hashed by the key itself
+    shards/<dataset>/part-0007.csv       rows of the customers in shard 7
+
+With AUTOFIN_DATA_LAYOUT=partitioned the data store loads only the shard a
+customer maps to (data_store.get_partition), so memory and first-lookup
+latency follow the working set instead of the whole book.
+
+    python partitions.py --data data --out data/shards --shards 16
+"""
+
+import os
+import json
+import zlib
+import argparse
+import numpy as np
+import pandas as pd
+
+MANIFEST = "manifest.json"
+KEY_KINDS = ("loan", "phone")
+PARTITION_KEY = "customer_id"
+DATASETS = ("customers", "payments", "claims")
+DEFAULT_SHARDS = 16
+
+
+def shard_of(customer_id, num_shards):
+    """Stable across processes and runs (unlike hash())."""
+    return zlib.crc32(str(customer_id).strip().encode("utf-8")) % num_shards
+
+
+def shard_ids(customer_ids: pd.Series, num_shards):
+    """Vectorized shard_of(): hashes each distinct id once."""
+    codes, uniques = pd.factorize(customer_ids.astype(str).str.strip())
+    hashed = np.fromiter((shard_of(u, num_shards) for u in uniques), dtype=np.int64, count=len(uniques))
+    return hashed[codes] if len(codes) else np.empty(0, dtype=np.int64)
+
+
+def shard_file(root, name, shard):
+    return os.path.join(root, name, f"part-{shard:04d}.csv")
+
+
+def norm_phone(phone):
+    return "".join(c for c in str(phone) if c.isdigit())
+
+
+def key_file(root, kind, shard):
+    return os.path.join(root, "keys", kind, f"part-{shard:04d}.csv")
+
+
+def normalize_key(kind, value):
+    return norm_phone(value) if kind == "phone" else str(value).strip().lower()
+
+
+def key_rows(customers: pd.DataFrame, kind):
+    """(key, customer_id) rows of one key index for a customers table; blank keys are skipped."""
+    column = "loan_number" if kind == "loan" else "phone"
+    values = customers.get(column, pd.Series("", index=customers.index))
+    keys = values.str.strip().str.lower() if kind == "loan" else values.map(norm_phone)
+    rows = pd.DataFrame({"key": keys, "customer_id": customers[PARTITION_KEY].str.strip()})
+    return rows[rows["key"] != ""]
+
+
+def read_manifest(root):
+    path = os.path.join(root, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_manifest(root, manifest):
+    path = os.path.join(root, MANIFEST)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+
+def build_partitions(data_dir, out_dir, num_shards=DEFAULT_SHARDS):
+    """Write the shard files, key index and manifest for the CSVs in data_dir."""
+    manifest = {"version": 1, "key": PARTITION_KEY, "hash": "crc32", "num_shards": num_shards, "datasets": {}}
+    for name in DATASETS:
+        path = os.path.join(data_dir, f"{name}.csv")
+        if not os.path.exists(path):
+            continue
+        df = pd.read_csv(path, dtype=str).fillna("")
+        os.makedirs(os.path.join(out_dir, name), exist_ok=True)
+        shards = shard_ids(df[PARTITION_KEY], num_shards)
+        # Every shard gets a file (header only if empty) so appends know the columns
+        for shard in range(num_shards):
+            df[shards == shard].to_csv(shard_file(out_dir, name, shard), index=False, lineterminator="\n")
+        manifest["datasets"][name] = {"columns": list(df.columns), "rows": len(df)}
+        if name == "customers":
+            for kind in KEY_KINDS:
+                # First occurrence wins, like a scan of the customer table
+                keys = key_rows(df, kind).drop_duplicates("key")
+                os.makedirs(os.path.join(out_dir, "keys", kind), exist_ok=True)
+                key_shards = shard_ids(keys["key"], num_shards)
+                for shard in range(num_shards):
+                    keys[key_shards == shard].to_csv(key_file(out_dir, kind, shard), index=False, lineterminator="\n")
+
+    # Manifest last: a half-built layout is never picked up
+    write_manifest(out_dir, manifest)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write the partitioned (sharded by customer_id) data layout.")
+    parser.add_argument("--data", default=os.getenv("AUTOFIN_DATA_DIR", "data"), help="folder with the flat CSVs")
+    parser.add_argument("--out", help="shard folder (default: <data>/shards)")
+    parser.add_argument("--shards", type=int, default=DEFAULT_SHARDS)
+    args = parser.parse_args()
+
+    out = args.out or os.path.join(args.data, "shards")
+    manifest = build_partitions(args.data, out, args.shards)
+    for name, info in manifest["datasets"].items():
+        print(f"📦 {name}: {info['rows']} rows → {manifest['num_shards']} shards")
+    print(f"✅ Manifest written to {os.path.join(out, MANIFEST)}")
@@ -0,0 +1,212 @@
+# ===========================================
+# portfolio_aggregates.py (Materialized Portfolio Aggregates)
+# ===========================================
+"""
+Precomputed operations views over the shared tables:
+
+- overdue exposure by registered_city (payments ⋈ customers, as of today)
+- open claims by service_center
+- claims, settled claims and payout totals by incident_type
+
+Each view is computed vectorized once per table snapshot. Claim views are
+then maintained incrementally: rows appended to claims.csv (fnol_claim_tool,
+bulk FNOL) arrive as a data-store delta and only the delta is aggregated
+and added. Any other change rebuilds the view on next read.
+
+In the partitioned layout the views are built one shard at a time
+(payments and customers share the customer_id partitioning, so the join
+stays within a shard), so the whole book is never loaded. They are kept
+until a shard file changes; claims this process appends are folded in
+the same way, so only another process's append forces a rebuild.
+
+    python portfolio_aggregates.py            # print all views
+    python portfolio_aggregates.py --json
+"""
+
+import json
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+
+from data_store import get_table, add_change_listener, add_partition_listener, partitioned, iter_partitions, partition_signature
+from claims_index import OPEN_STATUSES
+from collections_job import recompute_overdue, default_as_of
+
+UNASSIGNED = "(unassigned)"
+
+
+def _amount(series):
+    return pd.to_numeric(series, errors="coerce").fillna(0).astype(np.int64)
+
+
+def _label(series):
+    return series.astype(str).str.strip().replace("", UNASSIGNED)
+
+
+def claim_views(claims: pd.DataFrame):
+    """Claim aggregates for a table (or a delta of appended rows)."""
+    if claims.empty:
+        return {
+            "open_claims_by_service_center": pd.DataFrame({"open_claims": pd.Series(dtype=np.int64)}),
+            "claims_by_incident_type": pd.DataFrame(
+                {c: pd.Series(dtype=np.int64) for c in ("claims", "open", "closed", "payout")}
+            ),
+        }
+    status = claims["claim_status"]
+    is_open = status.isin(OPEN_STATUSES).to_numpy()
+    closed = (status == "Closed").to_numpy()
+
+    center = _label(claims["service_center"])[is_open]
+    by_center = center.value_counts().rename("open_claims").to_frame()
+
+    by_type = pd.DataFrame({
+        "incident_type": _label(claims["incident_type"]).to_numpy(),
+        "claims": 1,
+        "open": is_open.astype(np.int64),
+        "closed": closed.astype(np.int64),
+        "payout": np.where(closed, _amount(claims["claim_amount"]).to_numpy(), 0),
+    }).groupby("incident_type").sum()
+    return {"open_claims_by_service_center": by_center, "claims_by_incident_type": by_type}
+
+
+def merge_views(base, delta):
+    """base + delta, aligned on group labels (new groups are added)."""
+    return {
+        name: base[name].add(delta[name], fill_value=0).astype(np.int64).sort_index()
+        for name in base
+    }
+
+
+def exposure_by_city(payments: pd.DataFrame, customers: pd.DataFrame, as_of=None):
+    """Loans, overdue loans and outstanding exposure per registered_city."""
+    columns = ("loans", "overdue_loans", "overdue_exposure", "total_exposure")
+    if payments.empty:
+        return pd.DataFrame({c: pd.Series(dtype=np.int64) for c in columns})
+    p = recompute_overdue(payments, as_of)
+    if customers.empty or "registered_city" not in customers.columns:
+        city = pd.Series(UNASSIGNED, index=p.index)
+    else:
+        cities = customers.drop_duplicates("customer_id").set_index("customer_id")["registered_city"]
+        city = p["customer_id"].map(cities).fillna("")
+    balance = _amount(p["outstanding_balance"]).to_numpy()
+    overdue = (p["payment_status"] == "Overdue").to_numpy()
+    return pd.DataFrame({
+        "registered_city": _label(city).to_numpy(),
+        "loans": 1,
+        "overdue_loans": overdue.astype(np.int64),
+        "overdue_exposure": np.where(overdue, balance, 0),
+        "total_exposure": balance,
+    }).groupby("registered_city").sum().sort_values("overdue_exposure", ascending=False)
+
+
+# ----------------------------------------------------------------
+# Materialized state
+# ----------------------------------------------------------------
+_lock = threading.Lock()
+_claims_state = (None, None)  # (claims table, or shard signature when partitioned, views)
+_exposure_state = (None, None)  # ((payments, customers, as_of) tables or shard signatures, view)
+
+
+def _partitioned_claim_views():
+    views = claim_views(pd.DataFrame())
+    for shard in iter_partitions("claims"):
+        if len(shard):
+            views = merge_views(views, claim_views(shard))
+    return views
+
+
+def _partitioned_exposure(day):
+    views = [
+        exposure_by_city(payments, customers, day)
+        for payments, customers in zip(iter_partitions("payments"), iter_partitions("customers"))
+        if len(payments)
+    ]
+    if not views:
+        return exposure_by_city(pd.DataFrame(), pd.DataFrame())
+    return pd.concat(views).groupby(level=0).sum().sort_values("overdue_exposure", ascending=False)
+
+
+def get_claim_views():
+    global _claims_state
+    if partitioned():
+        signature = ("partitioned", partition_signature("claims"))
+        with _lock:
+            if _claims_state[0] != signature:
+                _claims_state = (signature, _partitioned_claim_views())
+            return _claims_state[1]
+    claims = get_table("claims")
+    with _lock:
+        if _claims_state[0] is not claims:
+            _claims_state = (claims, claim_views(claims))
+        return _claims_state[1]
+
+
+def get_exposure_by_city(as_of=None):
+    """Rebuilt when payments/customers change or the as-of day rolls over."""
+    global _exposure_state
+    as_of = pd.Timestamp(as_of) if as_of is not None else default_as_of()
+    if partitioned():
+        day = as_of.normalize()
+        key = (partition_signature("payments"), partition_signature("customers"), day)
+        with _lock:
+            if _exposure_state[0] != key:
+                _exposure_state = (key, _partitioned_exposure(day))
+            return _exposure_state[1]
+    payments, customers, day = get_table("payments"), get_table("customers"), as_of.normalize()
+    with _lock:
+        key, view = _exposure_state
+        if key is None or key[0] is not payments or key[1] is not customers or key[2] != day:
+            view = exposure_by_city(payments, customers, day)
+            _exposure_state = ((payments, customers, day), view)
+        return view
+
+
+def get_aggregates(as_of=None):
+    return {"overdue_exposure_by_city": get_exposure_by_city(as_of), **get_claim_views()}
+
+
+def _on_table_change(name, old, new, delta):
+    """Fold appended claims into the materialized views instead of rescanning."""
+    global _claims_state
+    if name != "claims":
+        return
+    with _lock:
+        source, views = _claims_state
+        if source is None or source is not old:
+            return
+        if delta is None:
+            _claims_state = (None, None)  # rebuilt on next read
+        else:
+            _claims_state = (new, merge_views(views, claim_views(delta)))
+
+
+def _on_partition_append(name, signature_before, signature_after, rows):
+    """Partitioned layout: fold this process's appended claims in and advance the shard signature."""
+    global _claims_state
+    if name != "claims":
+        return
+    with _lock:
+        key, views = _claims_state
+        if key == ("partitioned", signature_before):
+            _claims_state = (("partitioned", signature_after), merge_views(views, claim_views(rows)))
+
+
+add_change_listener(_on_table_change)
+add_partition_listener(_on_partition_append)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print materialized portfolio aggregates.")
+    parser.add_argument("--as-of", help="yyyy-mm-dd (default: AUTOFIN_AS_OF or today)")
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of tables")
+    args = parser.parse_args()
+
+    views = get_aggregates(args.as_of)
+    if args.json:
+        print(json.dumps({name: view.reset_index().to_dict(orient="records") for name, view in views.items()},
+                         indent=2, default=int))
+    else:
+        for name, view in views.items():
+            print(f"\n📊 {name.replace('_', ' ')}")
+            print(view.to_string() if len(view) else "(no data)")
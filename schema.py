@@ -0,0 +1,235 @@
+# ===========================================
+# schema.py (Typed Table Schema & Compact Records)
+# ===========================================
+"""
+Typed in-memory layout for the three datasets, as a measurement tool: the
+CSV loaders and every consumer keep each value as an object string, and
+to_typed() shows what storing low-cardinality text as categoricals,
+amounts as integers and dates as datetime64 would save. Nothing loads
+typed tables at runtime.
+
+The conversion is lossless: a column is only typed when every value
+formats back to exactly the original string (else it falls back to a
+categorical), so to_strings(to_typed(df)) == df and anything rendered from
+a typed table reads the same as before.
+
+    python schema.py                       # memory per 1M rows for data/
+    python schema.py --data /tmp/af_data   # e.g. benchmarks.synthetic_data output
+"""
+
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+DATE_FORMAT = "%d-%m-%Y"
+
+# Column → storage kind; unlisted columns (ids, email, free text) stay strings
+SCHEMAS = {
+    "customers": {
+        "first_name": "category",
+        "last_name": "category",
+        "phone": "int",
+        "vehicle_model": "category",
+        "vehicle_year": "int",
+        "registered_city": "category",
+    },
+    "payments": {
+        "customer_id": "category",
+        "last_payment_date": "date",
+        "next_due_date": "date",
+        "emi_amount": "int",
+        "payment_status": "category",
+        "outstanding_balance": "int",
+        "overdue_days": "int",
+        "remarks": "category",
+    },
+    "claims": {
+        "customer_id": "category",
+        "incident_type": "category",
+        "incident_date": "date",
+        "claim_status": "category",
+        "estimated_damage": "category",
+        "service_center": "category",
+        "claim_amount": "int",
+        "settlement_date": "date",
+        "remarks": "category",
+    },
+}
+
+
+# ----------------------------------------------------------------
+# Column conversion
+# ----------------------------------------------------------------
+def _as_int(col: pd.Series):
+    """Nullable integer column, or None if any value would not round-trip."""
+    # Checks run on the distinct values only; amounts and years repeat a lot
+    codes, uniques = pd.factorize(col)
+    text = pd.Series(uniques, dtype=object)
+    present = text != ""
+    values = pd.to_numeric(text.where(present), errors="coerce")
+    if values[present].isna().any():
+        return None
+    ints = values.astype("Int64")
+    if not (ints[present].astype(str) == text[present]).all():
+        return None  # e.g. "007" or "1.0"
+    if ints.dropna().abs().max() < 2**31:
+        ints = ints.astype("Int32")
+    return pd.Series(ints.take(codes).to_numpy(), index=col.index, dtype=ints.dtype)
+
+
+def _as_date(col: pd.Series):
+    """datetime64 column, or None if any value is not in DATE_FORMAT."""
+    codes, uniques = pd.factorize(col)
+    text = pd.Series(uniques, dtype=object)
+    present = text != ""
+    dates = pd.to_datetime(text.where(present), format=DATE_FORMAT, errors="coerce")
+    if dates[present].isna().any():
+        return None  # e.g. yyyy-mm-dd dates written by fnol_claim_tool
+    if not (dates[present].dt.strftime(DATE_FORMAT) == text[present]).all():
+        return None
+    return pd.Series(dates.to_numpy()[codes], index=col.index)
+
+
+def to_typed(df: pd.DataFrame, name: str) -> pd.DataFrame:
+    """Compact copy of a string table using SCHEMAS[name]."""
+    out = {}
+    for column in df.columns:
+        col = df[column]
+        kind = SCHEMAS.get(name, {}).get(column)
+        typed = None
+        if kind == "int":
+            typed = _as_int(col)
+        elif kind == "date":
+            typed = _as_date(col)
+        if typed is None and kind is not None:
+            typed = col.astype("category")
+        out[column] = col if typed is None else typed
+    return pd.DataFrame(out, index=df.index)
+
+
+def _format(col, render):
+    """Apply render() to the distinct values of col and map back."""
+    codes, uniques = pd.factorize(col)
+    text = np.asarray(render(pd.Series(uniques)), dtype=object)
+    out = np.full(len(col), "", dtype=object)
+    found = codes >= 0
+    out[found] = text[codes[found]]
+    return pd.Series(out, index=col.index)
+
+
+def to_strings(df: pd.DataFrame) -> pd.DataFrame:
+    """Inverse of to_typed(): the dtype=str / fillna("") layout the agents use."""
+    out = {}
+    for column in df.columns:
+        col = df[column]
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            col = col.astype(object)
+        elif pd.api.types.is_datetime64_any_dtype(col.dtype):
+            col = _format(col, lambda u: u.dt.strftime(DATE_FORMAT))
+        elif pd.api.types.is_integer_dtype(col.dtype):
+            col = _format(col, lambda u: u.astype(str))
+        out[column] = col.where(col.notna(), "") if col.dtype == object else col
+    return pd.DataFrame(out, index=df.index)
+
+
+# ----------------------------------------------------------------
+# Single-row records
+# ----------------------------------------------------------------
+_record_types = {}
+
+
+def record_type(columns):
+    """A __slots__ class for one table's columns, with Series-style .get()."""
+    columns = tuple(columns)
+    cls = _record_types.get(columns)
+    if cls is None:
+        slots = tuple(f"f{i}" for i in range(len(columns)))
+        positions = {c: i for i, c in enumerate(columns)}
+
+        def get(self, key, default=None):
+            i = positions.get(key)
+            return default if i is None else getattr(self, slots[i])
+
+        def __getitem__(self, key):
+            return getattr(self, slots[positions[key]])
+
+        def __repr__(self):
+            return f"Record({', '.join(f'{c}={self.get(c)!r}' for c in columns)})"
+
+        cls = type("Record", (), {
+            "__slots__": slots,
+            "columns": columns,
+            "get": get,
+            "__getitem__": __getitem__,
+            "__repr__": __repr__,
+        })
+        _record_types[columns] = cls
+    return cls
+
+
+class RecordView:
+    """
+    Row access without building a pandas Series per lookup: column arrays
+    are taken once per table and each row becomes a small slotted object.
+    Arrays are the columns' own storage (no copy), so Arrow-backed shared
+    tables in worker processes are indexed in place.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.size = len(df)
+        self._type = record_type(df.columns)
+        # to_numpy() is a view for numpy columns but copies extension (Arrow) columns
+        self._arrays = [
+            col.to_numpy() if isinstance(col.dtype, np.dtype) else col.array
+            for col in (df[c] for c in df.columns)
+        ]
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, pos):
+        record = object.__new__(self._type)
+        for slot, array in zip(self._type.__slots__, self._arrays):
+            object.__setattr__(record, slot, array[pos])
+        return record
+
+
+# ----------------------------------------------------------------
+# Memory report
+# ----------------------------------------------------------------
+def memory_report(tables):
+    """Bytes per 1M rows for each table, as loaded (strings) vs typed."""
+    report = {}
+    for name, df in tables.items():
+        if df.empty:
+            continue
+        typed = to_typed(df, name)
+        if not to_strings(typed).equals(df):
+            raise AssertionError(f"{name}: typed round-trip is not lossless")
+        per_million = 1_000_000 / len(df)
+        before = int(df.memory_usage(deep=True, index=False).sum() * per_million)
+        after = int(typed.memory_usage(deep=True, index=False).sum() * per_million)
+        report[name] = {
+            "rows": len(df),
+            "string_mb_per_1m": round(before / 2**20, 1),
+            "typed_mb_per_1m": round(after / 2**20, 1),
+            "saving": round(1 - after / before, 3) if before else 0.0,
+            "dtypes": {c: str(t) for c, t in typed.dtypes.items()},
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report memory per 1M rows for string vs typed tables.")
+    parser.add_argument("--data", help="data folder (default: AUTOFIN_DATA_DIR or data/)")
+    args = parser.parse_args()
+    if args.data:
+        os.environ["AUTOFIN_DATA_DIR"] = args.data
+
+    from data_store import DATASET_FILES, read_table
+
+    report = memory_report({name: read_table(name) for name in DATASET_FILES})
+    print(f"{'table':>10} {'rows':>10} {'str MB/1M':>10} {'typed MB/1M':>12} {'saving':>7}")
+    for name, r in report.items():
+        print(f"{name:>10} {r['rows']:>10} {r['string_mb_per_1m']:>10} {r['typed_mb_per_1m']:>12} {r['saving']:>7.1%}")
@@ -0,0 +1,259 @@
+# ===========================================
+# session_store.py (Bounded Session State Store)
+# ===========================================
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+# Only these verification fields are kept per session — the full customer
+# row returned by verify_user_tool stays in the data layer.
+CONTEXT_FIELDS = ("ok", "customer_id", "LoanID", "CustomerName")
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+DEFAULT_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+DEFAULT_MAX_HISTORY = int(os.getenv("SESSION_MAX_HISTORY", "20"))
+DEFAULT_MAX_HISTORY_CHARS = int(os.getenv("SESSION_MAX_HISTORY_CHARS", "500"))
+
+
+def compact_context(context):
+    """Reduce a verification result to the few fields the agents actually use."""
+    if not context:
+        return None
+    return {k: context.get(k) for k in CONTEXT_FIELDS if context.get(k) is not None}
+
+
+class SessionStore(ABC):
+    """
+    Base class for session stores.
+    A record is a small dict: {"context": {...}, "history": [...], "updated": ts}.
+    Backends implement _load / _save / _delete / evict_expired / __len__.
+    """
+
+    def __init__(
+        self,
+        max_entries=DEFAULT_MAX_ENTRIES,
+        ttl_seconds=DEFAULT_TTL_SECONDS,
+        max_history=DEFAULT_MAX_HISTORY,
+        max_history_chars=DEFAULT_MAX_HISTORY_CHARS,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_history = max_history
+        self.max_history_chars = max_history_chars
+        self._lock = threading.RLock()
+
+    # ----------------------------------------------------------------
+    # Backend hooks
+    # ----------------------------------------------------------------
+    @abstractmethod
+    def _load(self, session_id):
+        """Return the stored record for session_id, or None."""
+
+    @abstractmethod
+    def _save(self, session_id, record):
+        """Store the record (its "updated" timestamp is already set)."""
+
+    @abstractmethod
+    def _delete(self, session_id):
+        """Remove session_id if present."""
+
+    @abstractmethod
+    def evict_expired(self):
+        """Drop expired (and over-capacity) records; return how many were removed."""
+
+    # ----------------------------------------------------------------
+    # Public API
+    # ----------------------------------------------------------------
+    def get(self, session_id):
+        with self._lock:
+            record = self._load(session_id)
+            if record and self._expired(record):
+                self._delete(session_id)
+                return None
+            return record
+
+    def put(self, session_id, record):
+        with self._lock:
+            record["updated"] = time.time()
+            self._save(session_id, record)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._delete(session_id)
+
+    def get_context(self, session_id):
+        record = self.get(session_id)
+        return record.get("context") if record else None
+
+    def set_context(self, session_id, context):
+        with self._lock:
+            record = self.get(session_id) or {"context": None, "history": []}
+            record["context"] = compact_context(context)
+            self.put(session_id, record)
+
+    def get_memory(self, session_id):
+        record = self.get(session_id)
+        return record.get("memory") if record else None
+
+    def set_memory(self, session_id, memory):
+        """Store a ConversationMemory.to_dict() snapshot (already bounded)."""
+        with self._lock:
+            record = self.get(session_id) or {"context": None, "history": []}
+            record["memory"] = memory
+            self.put(session_id, record)
+
+    def get_history(self, session_id):
+        record = self.get(session_id)
+        return list(record.get("history", [])) if record else []
+
+    def append_history(self, session_id, entry):
+        with self._lock:
+            record = self.get(session_id) or {"context": None, "history": []}
+            history = record.get("history", [])
+            history.append(str(entry)[: self.max_history_chars])
+            record["history"] = history[-self.max_history:]
+            self.put(session_id, record)
+
+    def failed_attempts(self, session_id, window_seconds):
+        """Timestamps of failed verification attempts within the window."""
+        record = self.get(session_id)
+        cutoff = time.time() - window_seconds
+        return [t for t in (record or {}).get("attempts", []) if t > cutoff]
+
+    def record_failed_attempt(self, session_id, window_seconds):
+        """Record one failed verification attempt; return the count within the window."""
+        with self._lock:
+            record = self.get(session_id) or {"context": None, "history": []}
+            cutoff = time.time() - window_seconds
+            attempts = [t for t in record.get("attempts", []) if t > cutoff]
+            attempts.append(time.time())
+            record["attempts"] = attempts
+            self.put(session_id, record)
+            return len(attempts)
+
+    def clear_attempts(self, session_id):
+        with self._lock:
+            record = self.get(session_id)
+            if record and record.pop("attempts", None) is not None:
+                self.put(session_id, record)
+
+    def _expired(self, record):
+        return self.ttl_seconds > 0 and time.time() - record.get("updated", 0) > self.ttl_seconds
+
+
+class MemorySessionStore(SessionStore):
+    """In-process LRU store with max-entries and TTL eviction."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._records = OrderedDict()
+
+    def _load(self, session_id):
+        record = self._records.get(session_id)
+        if record is not None:
+            self._records.move_to_end(session_id)
+        return record
+
+    def _save(self, session_id, record):
+        self._records[session_id] = record
+        self._records.move_to_end(session_id)
+        while len(self._records) > self.max_entries:
+            self._records.popitem(last=False)
+
+    def _delete(self, session_id):
+        self._records.pop(session_id, None)
+
+    def evict_expired(self):
+        with self._lock:
+            expired = [sid for sid, rec in self._records.items() if self._expired(rec)]
+            for sid in expired:
+                del self._records[sid]
+            return len(expired)
+
+    def __len__(self):
+        return len(self._records)
+
+
+class SQLiteSessionStore(SessionStore):
+    """On-disk store (stdlib sqlite3) so sessions survive restarts and stay off the heap."""
+
+    def __init__(self, path="logs/sessions.db", **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._writes = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, record TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions(updated)")
+        self._conn.commit()
+
+    def _load(self, session_id):
+        row = self._conn.execute(
+            "SELECT record FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _save(self, session_id, record):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sessions (session_id, record, updated) VALUES (?, ?, ?)",
+            (session_id, json.dumps(record), record["updated"]),
+        )
+        self._conn.commit()
+        self._writes += 1
+        # Trim periodically rather than on every write
+        if self._writes % 100 == 0:
+            self.evict_expired()
+
+    def _delete(self, session_id):
+        self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        self._conn.commit()
+
+    def evict_expired(self):
+        with self._lock:
+            removed = 0
+            if self.ttl_seconds > 0:
+                cur = self._conn.execute(
+                    "DELETE FROM sessions WHERE updated < ?", (time.time() - self.ttl_seconds,)
+                )
+                removed += cur.rowcount
+            cur = self._conn.execute(
+                "DELETE FROM sessions WHERE session_id NOT IN "
+                "(SELECT session_id FROM sessions ORDER BY updated DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            removed += cur.rowcount
+            self._conn.commit()
+            return removed
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_session_store():
+    """
+    Return the process-wide session store, chosen by SESSION_STORE_BACKEND
+    ("memory" by default, or "sqlite" with SESSION_STORE_PATH).
+    """
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            backend = os.getenv("SESSION_STORE_BACKEND", "memory").lower()
+            if backend == "sqlite":
+                _default_store = SQLiteSessionStore(
+                    path=os.getenv("SESSION_STORE_PATH", "logs/sessions.db")
+                )
+            else:
+                _default_store = MemorySessionStore()
+        return _default_store
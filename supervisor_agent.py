@@ -2,11 +2,95 @@
 # supervisor_agent.py (Final Interactive Version)
 # ===========================================
 
+import os
 import re
+import time
+import asyncio
+import uuid
+import threading
+from collections import OrderedDict
 from agent_groc import AutoFinanceGROC
 from tools.crm_logger_tool import crm_logger_tool
 from tools.verify_user_tool import verify_user_tool
 from llm_loader import load_llm
+from session_store import get_session_store
+from conversation_memory import ConversationMemory
+from tracing import span
+from deadline import DeadlineExceeded, deadline_scope, remaining, run_within, await_within, record_fallback
+from async_runtime import run_blocking
+
+# Failed verification attempts allowed per session within the window
+VERIFY_MAX_ATTEMPTS = int(os.getenv("VERIFY_MAX_ATTEMPTS", "5"))
+VERIFY_WINDOW_SECONDS = float(os.getenv("VERIFY_WINDOW_SECONDS", "300"))
+
+# Per-turn time budget (0 = unbounded) and how it is sliced across stages
+TURN_BUDGET_S = float(os.getenv("SUPERVISOR_TURN_BUDGET_S", "8"))
+REFLECTION_MIN_S = float(os.getenv("SUPERVISOR_REFLECTION_MIN_S", "1.0"))
+VERIFY_SHARE = 0.25
+ANSWER_CACHE_MAX = 2048
+REFLECTION_SKIPPED = "⏱️ Skipped to stay within the response time budget."
+
+# "my EMI and claim status" → one GROC call per domain
+INTENT_SPLIT_RE = re.compile(r"\s*(?:,|;|\band also\b|\balso\b|\band\b|\bplus\b)\s*", re.IGNORECASE)
+
+# Last good answer per (customer, domain): GROC answers depend only on those
+_answers = OrderedDict()
+_answers_lock = threading.Lock()
+
+
+def _remember_answer(customer_id, domain, answer):
+    with _answers_lock:
+        _answers[(customer_id, domain)] = (time.time(), answer)
+        _answers.move_to_end((customer_id, domain))
+        while len(_answers) > ANSWER_CACHE_MAX:
+            _answers.popitem(last=False)
+
+
+def _cached_answer(customer_id, domain):
+    with _answers_lock:
+        return _answers.get((customer_id, domain))
+
+
+def split_intents(user_goal: str):
+    """
+    [(domain, text)] for each distinct domain a goal asks about. Goals with
+    a single domain come back whole, so they route exactly as before.
+    """
+    intents = []
+    for part in INTENT_SPLIT_RE.split(user_goal):
+        if not part.strip():
+            continue
+        domain = AutoFinanceGROC.classify(part)
+        if intents and (domain is None or domain == intents[-1][0]):
+            intents[-1] = (intents[-1][0], f"{intents[-1][1]} {part}")
+        elif intents and any(domain == d for d, _ in intents):
+            continue  # asked twice; one answer covers it
+        else:
+            intents.append((domain, part))
+    if len([d for d, _ in intents if d]) < 2:
+        return [(AutoFinanceGROC.classify(user_goal), user_goal)]
+    return [(d, text) for d, text in intents if d]
+
+
+def verification_query(user_goal: str) -> dict:
+    """Pull loan number, phone and name out of a message for verify_user_tool."""
+    query = {}
+
+    # Extract LoanID (like LN001)
+    loan_match = re.search(r"\bLN\d+\b", user_goal, re.IGNORECASE)
+    if loan_match:
+        query["loan"] = loan_match.group(0)
+
+    # Extract 10-digit phone number
+    phone_match = re.search(r"\b\d{10}\b", user_goal)
+    if phone_match:
+        query["phone"] = phone_match.group(0)
+
+    # Try name if present
+    name_match = re.search(r"\b[A-Z][a-z]+\s[A-Z][a-z]+\b", user_goal)
+    if name_match:
+        query["name"] = name_match.group(0)
+    return query
 
 
 class SupervisorAgent:
@@ -17,80 +101,269 @@ class SupervisorAgent:
     - Reflects on task success
     """
 
-    def __init__(self, model_name="mistral"):
+    def __init__(self, model_name="mistral", session_id=None, store=None):
         # ✅ Load the Groq/Ollama LLM dynamically
         self.llm = load_llm()
         self.groc_agent = AutoFinanceGROC(model_name)
-        self.completed_steps = []
-        self.user_context = None  # Store verified user details for the session
+        # Verified context and step history live in a bounded session store
+        self.session_id = session_id or uuid.uuid4().hex
+        self.store = store or get_session_store()
+        self.last_turn_stats = None
+        self._fallbacks = []
 
-    def orchestrate_goal(self, user_goal: str):
-        print(f"🎯 Received Goal: {user_goal}")
+    @property
+    def user_context(self):
+        return self.store.get_context(self.session_id)
+
+    @user_context.setter
+    def user_context(self, value):
+        self.store.set_context(self.session_id, value)
+
+    @property
+    def completed_steps(self):
+        return self.store.get_history(self.session_id)
+
+    @property
+    def memory(self):
+        return ConversationMemory.from_dict(self.store.get_memory(self.session_id))
 
-        # ------------------------------------------------------------
-        # 1️⃣ Step 1: Verification (only if not yet verified)
-        # ------------------------------------------------------------
-        if not self.user_context or not self.user_context.get("ok"):
-            query = {}
-
-            # Extract LoanID (like LN001)
-            loan_match = re.search(r"\bLN\d+\b", user_goal, re.IGNORECASE)
-            if loan_match:
-                query["loan"] = loan_match.group(0)
-
-            # Extract 10-digit phone number
-            phone_match = re.search(r"\b\d{10}\b", user_goal)
-            if phone_match:
-                query["phone"] = phone_match.group(0)
-
-            # Try name if present
-            name_match = re.search(r"\b[A-Z][a-z]+\s[A-Z][a-z]+\b", user_goal)
-            if name_match:
-                query["name"] = name_match.group(0)
-
-            verification_result = verify_user_tool(query)
-            if verification_result.get("ok"):
-                self.user_context = verification_result
-                verified_name = verification_result.get("CustomerName", "Customer")
-                verified_loan = verification_result.get("LoanID", "N/A")
-                print(f"✅ Verified user: {verified_name} (Loan: {verified_loan})")
-
-                # 👇 NEW LOGIC: Don't route “LN001” to GROC immediately
-                # Ask user what they want next
-                if (
-                    "emi" not in user_goal.lower()
-                    and "claim" not in user_goal.lower()
-                    and "insurance" not in user_goal.lower()
-                    and "coverage" not in user_goal.lower()
-                    and "payment" not in user_goal.lower()
-                ):
-                    return (
-                        f"✅ Verified {verified_name} (Loan {verified_loan}).\n"
-                        "What would you like to do next — check your EMI, claim status, or insurance coverage?"
-                    )
+    def reset(self):
+        """Forget this session's verification context and history."""
+        self.store.delete(self.session_id)
 
+    def orchestrate_goal(self, user_goal: str, budget_s: float = None):
+        budget_s = TURN_BUDGET_S if budget_s is None else budget_s
+        self._fallbacks = []
+        t0 = time.perf_counter()
+        # One trace per turn; tools and LLM calls below become child spans.
+        # The deadline rides along in a context variable to every stage.
+        with span("supervisor.turn", session_id=self.session_id) as s:
+            if budget_s > 0:
+                with deadline_scope(budget_s):
+                    answer = self._orchestrate_goal(user_goal)
             else:
-                return (
-                    "🔐 Verification Agent: Please provide your loan number "
-                    "(e.g., LN001) or registered phone number for verification."
-                )
+                answer = self._orchestrate_goal(user_goal)
+            s.set(fallbacks=list(self._fallbacks))
+        self._record_turn(budget_s, t0)
+        return answer
+
+    async def aorchestrate_goal(self, user_goal: str, budget_s: float = None):
+        """
+        Async orchestrate_goal(): the GROC lookups for a multi-intent goal run
+        concurrently on the blocking-work pool and reflection is awaited, so
+        one event loop can carry many conversations waiting on the LLM.
+        """
+        budget_s = TURN_BUDGET_S if budget_s is None else budget_s
+        self._fallbacks = []
+        t0 = time.perf_counter()
+        with span("supervisor.turn", session_id=self.session_id) as s:
+            if budget_s > 0:
+                with deadline_scope(budget_s):
+                    answer = await self._aorchestrate_goal(user_goal)
+            else:
+                answer = await self._aorchestrate_goal(user_goal)
+            s.set(fallbacks=list(self._fallbacks))
+        self._record_turn(budget_s, t0)
+        return answer
+
+    def _record_turn(self, budget_s, t0):
+        self.last_turn_stats = {
+            "budget_s": budget_s,
+            "elapsed_ms": round((time.perf_counter() - t0) * 1000.0, 1),
+            "fallbacks": list(self._fallbacks),
+        }
+
+    def _fallback(self, kind):
+        self._fallbacks.append(kind)
+        record_fallback(kind)
+
+    def _orchestrate_goal(self, user_goal: str):
+        print(f"🎯 Received Goal: {user_goal}")
+        user_context, reply = self._verify(user_goal)
+        if reply:
+            return reply
 
-        # ------------------------------------------------------------
-        # 2️⃣ Step 2: Route Goal to GROC Agent (with verified context)
-        # ------------------------------------------------------------
         try:
-            result = self.groc_agent.handle_goal(user_goal, context=self.user_context)
-            self.completed_steps.append(result)
+            result = self._answer_intents(user_goal, user_context)
+            self.store.append_history(self.session_id, result)
         except Exception as e:
             result = f"⚠️ GROC Agent Error — {type(e).__name__}: {e}"
             print(result)
 
-        # ------------------------------------------------------------
-        # 3️⃣ Step 3: Reflection Phase (concise reasoning)
-        # ------------------------------------------------------------
-        reflection_prompt = f"""
+        memory, prompt = self._reflection_prompt(user_goal, user_context, result)
+        if self._skip_reflection():
+            reflection = REFLECTION_SKIPPED
+        else:
+            try:
+                with span("supervisor.reflection"):
+                    reflection = run_within(self.llm.invoke, prompt, llm=True)
+            except DeadlineExceeded:
+                self._fallback("reflection_timeout")
+                reflection = REFLECTION_SKIPPED
+            except Exception as e:
+                reflection = f"⚠️ Reflection step failed — {type(e).__name__}: {e}"
+
+        return self._finish(user_goal, user_context, result, reflection, memory)
+
+    async def _aorchestrate_goal(self, user_goal: str):
+        print(f"🎯 Received Goal: {user_goal}")
+        # Session store and customer lookups are blocking work
+        user_context, reply = await run_blocking(self._verify, user_goal)
+        if reply:
+            return reply
+
+        try:
+            result = await self._aanswer_intents(user_goal, user_context)
+            await run_blocking(self.store.append_history, self.session_id, result)
+        except Exception as e:
+            result = f"⚠️ GROC Agent Error — {type(e).__name__}: {e}"
+            print(result)
+
+        memory, prompt = await run_blocking(self._reflection_prompt, user_goal, user_context, result)
+        if self._skip_reflection():
+            reflection = REFLECTION_SKIPPED
+        else:
+            try:
+                with span("supervisor.reflection"):
+                    reflection = await await_within(self.llm.ainvoke(prompt))
+            except DeadlineExceeded:
+                self._fallback("reflection_timeout")
+                reflection = REFLECTION_SKIPPED
+            except Exception as e:
+                reflection = f"⚠️ Reflection step failed — {type(e).__name__}: {e}"
+
+        return await run_blocking(self._finish, user_goal, user_context, result, reflection, memory)
+
+    # ----------------------------------------------------------------
+    # Steps (shared by the blocking and async flows)
+    # ----------------------------------------------------------------
+    def _verify(self, user_goal):
+        """
+        Step 1: Verification (only if not yet verified).
+        Returns (user_context, None) to continue, or (None, reply) to answer now.
+        """
+        user_context = self.user_context
+        if user_context and user_context.get("ok"):
+            return user_context, None
+
+        # Throttle before touching the data layer
+        if len(self.store.failed_attempts(self.session_id, VERIFY_WINDOW_SECONDS)) >= VERIFY_MAX_ATTEMPTS:
+            return None, (
+                "🔐 Verification Agent: Too many unsuccessful verification attempts. "
+                "Please try again in a few minutes."
+            )
+
+        query = verification_query(user_goal)
+        try:
+            verification_result = (
+                run_within(verify_user_tool, query, share=VERIFY_SHARE) if query else {"ok": False}
+            )
+        except DeadlineExceeded:
+            # Slow lookup is not the user's fault: no failed attempt is recorded
+            self._fallback("verification_timeout")
+            return None, (
+                "🔐 Verification Agent: Verification is taking longer than usual. "
+                "Please try again in a moment."
+            )
+
+        if not verification_result.get("ok"):
+            # Only lookups count; a turn without any identifier is just a prompt
+            if query:
+                self.store.record_failed_attempt(self.session_id, VERIFY_WINDOW_SECONDS)
+            return None, (
+                "🔐 Verification Agent: Please provide your loan number "
+                "(e.g., LN001) or registered phone number for verification."
+            )
+
+        self.store.clear_attempts(self.session_id)
+        self.user_context = verification_result
+        user_context = self.user_context
+        verified_name = verification_result.get("CustomerName", "Customer")
+        verified_loan = verification_result.get("LoanID", "N/A")
+        print(f"✅ Verified user: {verified_name} (Loan: {verified_loan})")
+
+        # 👇 NEW LOGIC: Don't route “LN001” to GROC immediately
+        # Ask user what they want next
+        if (
+            "emi" not in user_goal.lower()
+            and "claim" not in user_goal.lower()
+            and "insurance" not in user_goal.lower()
+            and "coverage" not in user_goal.lower()
+            and "payment" not in user_goal.lower()
+        ):
+            return None, (
+                f"✅ Verified {verified_name} (Loan {verified_loan}).\n"
+                "What would you like to do next — check your EMI, claim status, or insurance coverage?"
+            )
+        return user_context, None
+
+    def _answer_intents(self, user_goal, user_context):
+        """
+        Step 2: GROC answer for each intent in the goal. Each intent gets an
+        equal share of the time left (reflection keeps its minimum). An intent
+        that overruns falls back to its last good answer, or is left out of a
+        partial answer.
+        """
+        customer_id = user_context.get("customer_id") if user_context else None
+        intents = split_intents(user_goal)
+        answers = []
+        for i, (domain, text) in enumerate(intents):
+            try:
+                answer = run_within(
+                    self.groc_agent.handle_goal, text, context=user_context,
+                    share=1.0 / (len(intents) - i), reserve=REFLECTION_MIN_S,
+                )
+                if domain and not answer.startswith("⚠️"):
+                    _remember_answer(customer_id, domain, answer)
+            except DeadlineExceeded:
+                answer = self._intent_fallback(customer_id, domain)
+            answers.append(answer)
+        return self._join_answers(answers)
+
+    async def _aanswer_intents(self, user_goal, user_context):
+        """Async step 2: intents run concurrently, each bounded by the time left."""
+        customer_id = user_context.get("customer_id") if user_context else None
+
+        async def answer(domain, text):
+            try:
+                result = await await_within(
+                    self.groc_agent.ahandle_goal(text, context=user_context), reserve=REFLECTION_MIN_S
+                )
+            except DeadlineExceeded:
+                return self._intent_fallback(customer_id, domain)
+            if domain and not result.startswith("⚠️"):
+                _remember_answer(customer_id, domain, result)
+            return result
+
+        answers = await asyncio.gather(*(answer(d, t) for d, t in split_intents(user_goal)))
+        return self._join_answers(list(answers))
+
+    def _intent_fallback(self, customer_id, domain):
+        cached = _cached_answer(customer_id, domain) if domain else None
+        if cached:
+            self._fallback("cached_answer")
+            at, answer = cached
+            return answer + (
+                f"\n(⏱️ Last known {domain} details from {time.strftime('%H:%M', time.localtime(at))}; "
+                "live data is taking longer than usual.)"
+            )
+        self._fallback("intent_timeout")
+        return f"⏱️ {(domain or 'Your request').capitalize()} details are taking longer than usual — please ask again in a moment."
+
+    def _join_answers(self, answers):
+        if len(answers) > 1 and any(a.startswith("⏱️") for a in answers):
+            self._fallback("partial_answer")
+        return "\n\n".join(answers)
+
+    def _reflection_prompt(self, user_goal, user_context, result):
+        """Step 3: Reflection prompt, with bounded memory (summary + last few turns) instead of the full chat."""
+        memory = self.memory
+        memory.remember_identity(user_context)
+        prompt = f"""
         You are the Supervisor reviewing the GROC Agent's execution results.
 
+        {memory.render()}
+
         Goal: {user_goal}
         Result: {result}
 
@@ -99,20 +372,22 @@ class SupervisorAgent:
         - "YES" or "NO"
         - Followed by a one-line reasoning.
         """
-        try:
-            reflection = self.llm.invoke(reflection_prompt)
-        except Exception as e:
-            reflection = f"⚠️ Reflection step failed — {type(e).__name__}: {e}"
+        return memory, prompt
 
-        # ------------------------------------------------------------
-        # 4️⃣ Step 4: Log to CRM for traceability
-        # ------------------------------------------------------------
+    def _skip_reflection(self):
+        # Reflection is optional: skip it once the turn has degraded or when
+        # less than its minimum slice is left, rather than overrun the budget
+        if self._fallbacks or remaining(default=REFLECTION_MIN_S) < REFLECTION_MIN_S:
+            self._fallback("reflection_skipped")
+            return True
+        return False
+
+    def _finish(self, user_goal, user_context, result, reflection, memory):
+        """Steps 4–5: Save memory, log to CRM for traceability, return clean output."""
+        memory.add_turn(user_goal, result)
+        self.store.set_memory(self.session_id, memory.to_dict())
         crm_logger_tool(
             user_goal,
-            f"Context: {self.user_context}\nResult: {result}\nReflection: {reflection}"
+            f"Context: {user_context}\nResult: {result}\nReflection: {reflection}"
         )
-
-        # ------------------------------------------------------------
-        # 5️⃣ Step 5: Return Clean Output
-        # ------------------------------------------------------------
         return f"{result}\n\n✅ Reflection: {reflection}"
@@ -0,0 +1,498 @@
+# ===========================================
+# supervisor_graph.py (LangGraph Supervisor with Checkpointed Sessions)
+# ===========================================
+"""
+The Supervisor flow as a LangGraph state graph:
+
+    verify ──► route ──► payment ┐
+       │            ├──► claim   ├──► reflect ──► respond
+       ▼            ├──► sop     │
+      END           └──► identity┘
+
+Session state (verified context, handler memo, reflection memo) is
+checkpointed to SQLite per session, so a session resumes on any worker
+process without re-verifying. Handler results are memoized on
+(intent, customer, goal, data files, day) and reflections on
+(goal, answer), so a retried or repeated turn makes no new LLM call.
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import operator
+import threading
+from datetime import date
+from typing import Annotated, Optional, TypedDict
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+from langgraph.checkpoint.serde.types import TASKS
+from langgraph.graph import StateGraph, END
+
+from agent_groc import AutoFinanceGROC
+from async_runtime import run_blocking
+from data_store import data_signature
+from llm_loader import load_llm
+from session_store import compact_context, DEFAULT_TTL_SECONDS
+from supervisor_agent import verification_query, INTENT_SPLIT_RE, VERIFY_MAX_ATTEMPTS, VERIFY_WINDOW_SECONDS
+from tools.crm_logger_tool import crm_logger_tool
+from tools.verify_user_tool import verify_user_tool
+from tracing import span
+
+CHECKPOINT_DB = os.getenv("SUPERVISOR_GRAPH_DB", "logs/graph_checkpoints.db")
+REFLECTION_ENABLED = os.getenv("SUPERVISOR_GRAPH_REFLECTION", "1") == "1"
+MEMO_MAX_ENTRIES = 32
+CHECKPOINTS_PER_SESSION = 10
+
+# Intent → keywords, in GROC's routing order
+INTENTS = (
+    ("identity", ("verify", "identity", "who am i", "my name")),
+    ("payment", ("emi", "payment", "due date", "installment", "balance", "paid")),
+    ("claim", ("claim", "accident", "damage", "theft", "status")),
+    ("sop", ("sop", "procedure", "insurance", "coverage", "policy")),
+)
+TASK_WORDS = ("emi", "claim", "insurance", "coverage", "payment")
+
+
+# ----------------------------------------------------------------
+# Checkpointer
+# ----------------------------------------------------------------
+class SQLiteCheckpointSaver(BaseCheckpointSaver):
+    """
+    Minimal stdlib-sqlite3 checkpointer (langgraph 0.2.3 ships only the
+    in-memory one). Keeps the last CHECKPOINTS_PER_SESSION checkpoints per
+    thread so the file does not grow with every turn, and drops threads
+    idle for longer than the session store's TTL (SESSION_TTL_SECONDS).
+    """
+
+    def __init__(self, path=CHECKPOINT_DB, keep=CHECKPOINTS_PER_SESSION, ttl_seconds=DEFAULT_TTL_SECONDS):
+        super().__init__()
+        self.path = path
+        self.keep = keep
+        self.ttl_seconds = ttl_seconds
+        self._writes_since_evict = 0
+        self._lock = threading.RLock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "PRAGMA journal_mode=WAL;"
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            " thread_id TEXT, ns TEXT, checkpoint_id TEXT, parent_id TEXT,"
+            " type TEXT, checkpoint BLOB, metadata_type TEXT, metadata BLOB,"
+            " PRIMARY KEY (thread_id, ns, checkpoint_id));"
+            "CREATE TABLE IF NOT EXISTS writes ("
+            " thread_id TEXT, ns TEXT, checkpoint_id TEXT, task_id TEXT, idx INTEGER,"
+            " channel TEXT, type TEXT, value BLOB,"
+            " PRIMARY KEY (thread_id, ns, checkpoint_id, task_id, idx));"
+            "CREATE TABLE IF NOT EXISTS threads (thread_id TEXT PRIMARY KEY, updated REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_threads_updated ON threads(updated);"
+        )
+        # Threads checkpointed before last-write times were recorded start their TTL now
+        self._conn.execute(
+            "INSERT OR IGNORE INTO threads SELECT DISTINCT thread_id, ? FROM checkpoints", (time.time(),)
+        )
+        self._conn.commit()
+        self.evict_expired()
+
+    def _writes(self, thread_id, ns, checkpoint_id):
+        return self._conn.execute(
+            "SELECT task_id, channel, type, value FROM writes"
+            " WHERE thread_id = ? AND ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, ns, checkpoint_id),
+        ).fetchall()
+
+    def _tuple(self, thread_id, ns, row):
+        checkpoint_id, parent_id, c_type, c_blob, m_type, m_blob = row
+        sends = []
+        if parent_id:
+            sends = [
+                self.serde.loads_typed((t, v))
+                for _, channel, t, v in self._writes(thread_id, ns, parent_id)
+                if channel == TASKS
+            ]
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint_id}},
+            checkpoint={**self.serde.loads_typed((c_type, c_blob)), "pending_sends": sends},
+            metadata=self.serde.loads_typed((m_type, m_blob)),
+            parent_config={"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": parent_id}}
+            if parent_id
+            else None,
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((t, v)))
+                for task_id, channel, t, v in self._writes(thread_id, ns, checkpoint_id)
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "checkpoint_id, parent_id, type, checkpoint, metadata_type, metadata"
+        with self._lock:
+            if self._expired(thread_id):
+                self.delete_thread(thread_id)
+                return None
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self._conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND ns = ? AND checkpoint_id = ?",
+                    (thread_id, ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND ns = ?"
+                    " ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, ns),
+                ).fetchone()
+            return self._tuple(thread_id, ns, row) if row else None
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        # Only what resuming a session needs: a thread's checkpoints, newest first
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT checkpoint_id, parent_id, type, checkpoint, metadata_type, metadata FROM checkpoints"
+                " WHERE thread_id = ? AND ns = ? ORDER BY checkpoint_id DESC",
+                (thread_id, ns),
+            ).fetchall()
+            tuples = [self._tuple(thread_id, ns, row) for row in rows]
+        before_id = get_checkpoint_id(before) if before else None
+        for t in tuples:
+            if before_id and t.config["configurable"]["checkpoint_id"] >= before_id:
+                continue
+            if filter and not all(t.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            if limit is not None:
+                if limit <= 0:
+                    break
+                limit -= 1
+            yield t
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        c = checkpoint.copy()
+        c.pop("pending_sends", None)
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        c_type, c_blob = self.serde.dumps_typed(c)
+        m_type, m_blob = self.serde.dumps_typed(metadata)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                 c_type, c_blob, m_type, m_blob),
+            )
+            self._prune(thread_id, ns)
+            self._touch(thread_id)
+            self._conn.commit()
+            self._writes_since_evict += 1
+            # Trim periodically rather than on every write
+            if self._writes_since_evict >= 100:
+                self.evict_expired()
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(self, config: RunnableConfig, writes, task_id: str) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            t, v = self.serde.dumps_typed(value)
+            rows.append((thread_id, ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx), channel, t, v))
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._touch(thread_id)
+            self._conn.commit()
+
+    def _touch(self, thread_id):
+        self._conn.execute("INSERT OR REPLACE INTO threads VALUES (?, ?)", (thread_id, time.time()))
+
+    def _expired(self, thread_id):
+        if self.ttl_seconds <= 0:
+            return False
+        row = self._conn.execute("SELECT updated FROM threads WHERE thread_id = ?", (thread_id,)).fetchone()
+        return bool(row) and time.time() - row[0] > self.ttl_seconds
+
+    def evict_expired(self):
+        """Delete every thread whose last write is older than the TTL; returns how many were removed."""
+        with self._lock:
+            self._writes_since_evict = 0
+            if self.ttl_seconds <= 0:
+                return 0
+            cutoff = (time.time() - self.ttl_seconds,)
+            idle = "SELECT thread_id FROM threads WHERE updated < ?"
+            self._conn.execute(f"DELETE FROM checkpoints WHERE thread_id IN ({idle})", cutoff)
+            self._conn.execute(f"DELETE FROM writes WHERE thread_id IN ({idle})", cutoff)
+            removed = self._conn.execute("DELETE FROM threads WHERE updated < ?", cutoff).rowcount
+            self._conn.commit()
+            return removed
+
+    def _prune(self, thread_id, ns):
+        stale = self._conn.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND ns = ?"
+            " ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+            (thread_id, ns, self.keep),
+        ).fetchall()
+        if stale:
+            ids = [(thread_id, ns, r[0]) for r in stale]
+            self._conn.executemany("DELETE FROM checkpoints WHERE thread_id = ? AND ns = ? AND checkpoint_id = ?", ids)
+            self._conn.executemany("DELETE FROM writes WHERE thread_id = ? AND ns = ? AND checkpoint_id = ?", ids)
+
+    def delete_thread(self, thread_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            self._conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+            self._conn.execute("DELETE FROM threads WHERE thread_id = ?", (thread_id,))
+            self._conn.commit()
+
+
+# ----------------------------------------------------------------
+# State
+# ----------------------------------------------------------------
+def _merge(old, new):
+    """Dict reducer for parallel writers; None clears (start of a turn)."""
+    if new is None:
+        return {}
+    merged = {**(old or {}), **new}
+    # Bounded: keep the most recently written entries
+    if len(merged) > MEMO_MAX_ENTRIES:
+        merged = dict(list(merged.items())[-MEMO_MAX_ENTRIES:])
+    return merged
+
+
+class SupervisorState(TypedDict, total=False):
+    goal: str
+    context: Optional[dict]  # compact verified context; survives across turns
+    attempts: list  # timestamps of failed verification attempts
+    intents: list
+    results: Annotated[dict, _merge]  # intent -> handler output (this turn)
+    memo: Annotated[dict, _merge]  # memo key -> handler output (across turns)
+    reflections: Annotated[dict, _merge]  # (goal, answer) hash -> reflection
+    reflection: str
+    answer: str
+    llm_calls: Annotated[int, operator.add]
+
+
+def _digest(*parts):
+    return hashlib.sha256(json.dumps(parts, default=str).encode("utf-8")).hexdigest()[:24]
+
+
+# ----------------------------------------------------------------
+# Nodes
+# ----------------------------------------------------------------
+class _Nodes:
+    def __init__(self, groc, llm):
+        self.groc = groc
+        self.llm = llm
+
+    def verify(self, state: SupervisorState):
+        goal = state["goal"]
+        # Reset per-turn channels; context, memo and reflections carry over
+        update = {"results": None, "intents": [], "reflection": "", "answer": ""}
+        context = state.get("context")
+        if context and context.get("ok"):
+            return update
+
+        cutoff = time.time() - VERIFY_WINDOW_SECONDS
+        attempts = [t for t in state.get("attempts") or [] if t > cutoff]
+        if len(attempts) >= VERIFY_MAX_ATTEMPTS:
+            return {**update, "attempts": attempts, "answer": (
+                "🔐 Verification Agent: Too many unsuccessful verification attempts. "
+                "Please try again in a few minutes."
+            )}
+
+        query = verification_query(goal)
+        with span("graph.verify"):
+            result = verify_user_tool(query) if query else {"ok": False}
+        if not result.get("ok"):
+            if query:
+                attempts.append(time.time())
+            return {**update, "attempts": attempts, "answer": (
+                "🔐 Verification Agent: Please provide your loan number "
+                "(e.g., LN001) or registered phone number for verification."
+            )}
+
+        context = compact_context(result)
+        update.update(context=context, attempts=[])
+        if not any(w in goal.lower() for w in TASK_WORDS):
+            update["answer"] = (
+                f"✅ Verified {context.get('CustomerName', 'Customer')} (Loan {context.get('LoanID', 'N/A')}).\n"
+                "What would you like to do next — check your EMI, claim status, or insurance coverage?"
+            )
+        return update
+
+    def route(self, state: SupervisorState):
+        # One intent per clause, the first that matches (as AutoFinanceGROC.classify
+        # does): "what is my payment status" is a payment question, not also a claim one
+        found = set()
+        for clause in INTENT_SPLIT_RE.split(state["goal"].lower()):
+            intent = next((name for name, words in INTENTS if any(w in clause for w in words)), None)
+            if intent:
+                found.add(intent)
+        return {"intents": [name for name, _ in INTENTS if name in found]}
+
+    def _handler(self, intent, method):
+        def run(state: SupervisorState):
+            customer_id = (state.get("context") or {}).get("customer_id")
+            # Inputs a handler depends on; same inputs → reuse the stored answer
+            key = _digest(intent, customer_id, state["goal"].lower().strip(), data_signature(), date.today())
+            memo = state.get("memo") or {}
+            if key in memo:
+                return {"results": {intent: memo[key]}}
+            with span(f"graph.{intent}"):
+                try:
+                    result = method(state["goal"], customer_id)
+                except Exception as e:
+                    result = f"⚠️ GROC Agent Error — {type(e).__name__}: {e}"
+            return {"results": {intent: result}, "memo": {key: result}}
+
+        return run
+
+    def reflect(self, state: SupervisorState):
+        answer = _combine(state)
+        key = _digest(state["goal"], answer)
+        reflections = state.get("reflections") or {}
+        if key in reflections:
+            return {"reflection": reflections[key]}
+        prompt = f"""
+        You are the Supervisor reviewing the GROC Agent's execution results.
+
+        Goal: {state["goal"]}
+        Result: {answer}
+
+        Determine if the user's goal was fully achieved.
+        Respond with:
+        - "YES" or "NO"
+        - Followed by a one-line reasoning.
+        """
+        try:
+            with span("graph.reflection"):
+                reflection = self.llm.invoke(prompt)
+        except Exception as e:
+            # Failures are not memoized, so the next turn retries
+            return {"reflection": f"⚠️ Reflection step failed — {type(e).__name__}: {e}", "llm_calls": 1}
+        return {"reflection": reflection, "reflections": {key: reflection}, "llm_calls": 1}
+
+    def respond(self, state: SupervisorState):
+        answer = _combine(state)
+        reflection = state.get("reflection")
+        crm_logger_tool(
+            state["goal"],
+            f"Context: {state.get('context')}\nResult: {answer}\nReflection: {reflection}",
+        )
+        return {"answer": f"{answer}\n\n✅ Reflection: {reflection}" if reflection else answer}
+
+
+def _combine(state):
+    results = state.get("results") or {}
+    if not results:
+        return "GROC Agent: I couldn't identify the domain for this request. Please clarify: payment, claim, or coverage?"
+    return "\n\n".join(results[name] for name, _ in INTENTS if name in results)
+
+
+def _after_verify(state: SupervisorState):
+    return END if state.get("answer") else "route"
+
+
+def _fan_out(state: SupervisorState):
+    return state.get("intents") or ["respond"]
+
+
+def build_graph(groc=None, llm=None, checkpointer=None, reflection=REFLECTION_ENABLED):
+    nodes = _Nodes(groc or AutoFinanceGROC(), llm or load_llm())
+    after_handlers = "reflect" if reflection else "respond"
+
+    graph = StateGraph(SupervisorState)
+    graph.add_node("verify", nodes.verify)
+    graph.add_node("route", nodes.route)
+    handlers = {
+        "identity": nodes.groc._handle_verification,
+        "payment": nodes.groc._handle_payment,
+        "claim": nodes.groc._handle_claim,
+        "sop": nodes.groc._handle_sop,
+    }
+    for intent, method in handlers.items():
+        graph.add_node(intent, nodes._handler(intent, method))
+        graph.add_edge(intent, after_handlers)
+    if reflection:
+        graph.add_node("reflect", nodes.reflect)
+        graph.add_edge("reflect", "respond")
+    graph.add_node("respond", nodes.respond)
+
+    graph.set_entry_point("verify")
+    graph.add_conditional_edges("verify", _after_verify, ["route", END])
+    graph.add_conditional_edges("route", _fan_out, list(handlers) + ["respond"])
+    graph.add_edge("respond", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+_lock = threading.Lock()
+_shared = {}
+
+
+def get_graph():
+    """The compiled graph and its checkpointer, shared by every session in the process."""
+    with _lock:
+        if "graph" not in _shared:
+            _shared["checkpointer"] = SQLiteCheckpointSaver(CHECKPOINT_DB)
+            _shared["graph"] = build_graph(checkpointer=_shared["checkpointer"])
+        return _shared["graph"], _shared["checkpointer"]
+
+
+class SupervisorGraphAgent:
+    """Drop-in alternative to SupervisorAgent backed by the checkpointed graph."""
+
+    def __init__(self, session_id=None, graph=None, checkpointer=None):
+        if graph is None:
+            graph, checkpointer = get_graph()
+        self.graph = graph
+        self.checkpointer = checkpointer
+        self.session_id = session_id or uuid.uuid4().hex
+        self.last_turn_stats = None
+
+    @property
+    def config(self):
+        return {"configurable": {"thread_id": self.session_id}}
+
+    @property
+    def user_context(self):
+        snapshot = self.graph.get_state(self.config)
+        return (snapshot.values or {}).get("context") if snapshot else None
+
+    @user_context.setter
+    def user_context(self, value):
+        self.graph.update_state(self.config, {"context": compact_context(value)})
+
+    def reset(self):
+        if self.checkpointer is not None:
+            self.checkpointer.delete_thread(self.session_id)
+
+    async def aorchestrate_goal(self, user_goal: str):
+        """Async orchestrate_goal(); the graph and its SQLite checkpoints run on the blocking-work pool."""
+        return await run_blocking(self.orchestrate_goal, user_goal)
+
+    def orchestrate_goal(self, user_goal: str):
+        print(f"🎯 Received Goal: {user_goal}")
+        with span("supervisor_graph.turn", session_id=self.session_id):
+            before = (self.graph.get_state(self.config).values or {}).get("llm_calls", 0)
+            state = self.graph.invoke({"goal": user_goal}, self.config)
+        self.last_turn_stats = {
+            "intents": state.get("intents", []),
+            "llm_calls": state.get("llm_calls", 0) - before,
+        }
+        return state.get("answer", "")
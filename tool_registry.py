@@ -0,0 +1,192 @@
+# ===========================================
+# tool_registry.py (Shared Tools & ReAct Executor)
+# ===========================================
+"""
+The LangChain tools and the ReAct executor are built once per process and
+shared by every AutoFinanceLLMAgent (the zero-shot agent keeps no per-session
+state). Each run_turn() call gets its own TurnStats through a context
+variable: identical tool calls within a turn are answered from a memo, and
+LLM/tool call counts are recorded for the caller.
+"""
+
+import os
+import time
+import threading
+import contextvars
+from dataclasses import dataclass, field
+
+from langchain.agents import initialize_agent, Tool
+from langchain.agents import AgentType
+from langchain_core.callbacks import BaseCallbackHandler
+
+from tools.verify_user_tool import verify_user_tool, averify_user_tool
+from tools.payment_lookup_tool import payment_lookup_tool, apayment_lookup_tool
+from tools.fnol_claim_tool import fnol_claim_tool, afnol_claim_tool
+from tools.sop_lookup_tool import sop_lookup_tool, asop_lookup_tool
+from tools.crm_logger_tool import crm_logger_tool, acrm_logger_tool
+from llm_loader import load_llm
+
+# ReAct loop bounds; on hitting either the agent produces a final answer
+# from what it has so far ("generate") or a fixed message ("force")
+MAX_ITERATIONS = int(os.getenv("LLM_AGENT_MAX_ITERATIONS", "5"))
+MAX_EXECUTION_SECONDS = float(os.getenv("LLM_AGENT_MAX_SECONDS", "30"))
+EARLY_STOPPING_METHOD = os.getenv("LLM_AGENT_EARLY_STOPPING", "generate")
+
+# (name, blocking func, async func, description)
+TOOL_SPECS = (
+    ("Verify User", verify_user_tool, averify_user_tool,
+     "Verify customer identity using name, loan number, or contact details."),
+    ("Payment Lookup", payment_lookup_tool, apayment_lookup_tool,
+     "Fetch EMI, payment due date, and loan balance for verified customers."),
+    ("FNOL Claim Tool", fnol_claim_tool, afnol_claim_tool,
+     "Handle accident, theft, or damage insurance claims."),
+    ("SOP Lookup", sop_lookup_tool, asop_lookup_tool,
+     "Retrieve process or policy information from SOP documents."),
+    ("CRM Logger", crm_logger_tool, acrm_logger_tool,
+     "Log chat messages to CRM system for future reference."),
+)
+
+
+@dataclass
+class TurnStats:
+    """Counters and tool-result memo for one agent turn."""
+
+    llm_calls: int = 0
+    tool_calls: int = 0
+    tool_cache_hits: int = 0
+    elapsed_ms: float = 0.0
+    memo: dict = field(default_factory=dict, repr=False)
+
+    def as_dict(self):
+        return {
+            "llm_calls": self.llm_calls,
+            "tool_calls": self.tool_calls,
+            "tool_cache_hits": self.tool_cache_hits,
+            "elapsed_ms": round(self.elapsed_ms, 3),
+        }
+
+
+_turn = contextvars.ContextVar("autofin_turn", default=None)
+
+
+class _LLMCallCounter(BaseCallbackHandler):
+    # Run in the turn's own context (async runs would otherwise use a worker thread)
+    run_inline = True
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        stats = _turn.get()
+        if stats is not None:
+            stats.llm_calls += 1
+
+
+def _memoized(name, func):
+    """Wrap a tool so a repeated (tool, input) pair within a turn is not re-run."""
+
+    def call(tool_input):
+        stats = _turn.get()
+        if stats is None:
+            return func(tool_input)
+        key = (name, str(tool_input).strip())
+        stats.tool_calls += 1
+        if key in stats.memo:
+            stats.tool_cache_hits += 1
+            return stats.memo[key]
+        result = stats.memo[key] = func(tool_input)
+        return result
+
+    call.__name__ = getattr(func, "__name__", name)
+    call.__doc__ = func.__doc__
+    return call
+
+
+def _amemoized(name, afunc):
+    """Async _memoized(); shares the turn's memo with the blocking form."""
+
+    async def call(tool_input):
+        stats = _turn.get()
+        if stats is None:
+            return await afunc(tool_input)
+        key = (name, str(tool_input).strip())
+        stats.tool_calls += 1
+        if key in stats.memo:
+            stats.tool_cache_hits += 1
+            return stats.memo[key]
+        result = stats.memo[key] = await afunc(tool_input)
+        return result
+
+    call.__name__ = getattr(afunc, "__name__", name)
+    call.__doc__ = afunc.__doc__
+    return call
+
+
+_lock = threading.Lock()
+_tools = None
+_executor = None
+
+
+def get_tools():
+    """The process-wide Tool list (built on first use)."""
+    global _tools
+    with _lock:
+        if _tools is None:
+            _tools = [
+                Tool(
+                    name=name,
+                    func=_memoized(name, func),
+                    coroutine=_amemoized(name, afunc),
+                    description=description,
+                )
+                for name, func, afunc, description in TOOL_SPECS
+            ]
+        return _tools
+
+
+def get_executor():
+    """The process-wide ReAct executor over the shared tools and LLM."""
+    global _executor
+    tools = get_tools()
+    with _lock:
+        if _executor is None:
+            _executor = initialize_agent(
+                tools=tools,
+                llm=load_llm(),
+                agent_type=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+                verbose=True,
+                max_iterations=MAX_ITERATIONS,
+                max_execution_time=MAX_EXECUTION_SECONDS,
+                early_stopping_method=EARLY_STOPPING_METHOD,
+            )
+        return _executor
+
+
+def reset_registry():
+    """Drop the shared tools/executor (e.g. after changing LLM_BACKEND)."""
+    global _tools, _executor
+    with _lock:
+        _tools = _executor = None
+
+
+def run_turn(executor, user_input):
+    """Run one ReAct turn; returns (response, TurnStats)."""
+    stats = TurnStats()
+    token = _turn.set(stats)
+    t0 = time.perf_counter()
+    try:
+        response = executor.run(user_input, callbacks=[_LLMCallCounter()])
+    finally:
+        stats.elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        _turn.reset(token)
+    return response, stats
+
+
+async def arun_turn(executor, user_input):
+    """Async run_turn(): LLM calls are awaited and tools use their async forms."""
+    stats = TurnStats()
+    token = _turn.set(stats)
+    t0 = time.perf_counter()
+    try:
+        response = await executor.arun(user_input, callbacks=[_LLMCallCounter()])
+    finally:
+        stats.elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        _turn.reset(token)
+    return response, stats
@@ -1,5 +1,8 @@
 from datetime import datetime
+from tracing import traced
+from async_runtime import blocking_to_async
 
+@traced("crm_logger_tool")
 def crm_logger_tool(user_query: str, agent_response: str) -> str:
     """
     Logs each chat exchange to a local log file.
@@ -14,3 +17,6 @@ def crm_logger_tool(user_query: str, agent_response: str) -> str:
         f.write(log_entry)
 
     return "🗂️ Interaction logged successfully."
+
+
+acrm_logger_tool = blocking_to_async(crm_logger_tool)
@@ -0,0 +1,169 @@
+# ===========================================
+# tools/fnol_bulk_tool.py (Streaming Bulk FNOL Ingestion)
+# ===========================================
+"""
+Creates claims for a batch of FNOLs (e.g. partner files after a hailstorm)
+with the same rules as fnol_claim_tool, but in bulk:
+
+- the input CSV / JSONL is read in chunks
+- customer IDs are validated against the customer table, and repeats
+  within the batch are skipped, in one vectorized pass per chunk
+- under the claims dataset lock (shared with fnol_claim_tool, across
+  processes) customers whose latest claim is still open are skipped,
+  claim IDs are allocated as one contiguous block after the current row
+  count (fnol_claim_tool's scheme) and all accepted rows are committed to
+  claims.csv with a single append
+
+    python -m tools.fnol_bulk_tool incidents.jsonl --rejects logs/fnol_rejects.csv
+"""
+
+import os
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+from data_store import get_table, row_count, append_rows, dataset_lock
+from claims_index import OPEN_STATUSES
+from tracing import traced
+from async_runtime import blocking_to_async
+
+CHUNK_ROWS = 50_000
+INPUT_COLUMNS = ("customer_id", "incident_type", "incident_date", "estimated_damage",
+                 "service_center", "claim_amount", "remarks")
+DEFAULTS = {"incident_type": "Accident", "remarks": "Initial FNOL logged", "claim_amount": "0"}
+
+
+def _as_strings(frame):
+    """Blank missing values, then cast to str (so NaN / None never become "nan" / "None")."""
+    frame = frame.astype(object)
+    return frame.where(frame.notna(), "").astype(str)
+
+
+def _read_jsonl(path, chunk_rows):
+    """
+    JSONL in chunks of object columns, so numbers keep their literal form
+    (pd.read_json turns an int column with gaps into floats, "1500.0").
+    """
+    with open(path, encoding="utf-8") as f:
+        records = []
+        for line in f:
+            if line.strip():
+                records.append(json.loads(line))
+            if len(records) == chunk_rows:
+                yield pd.DataFrame(records, dtype=object)
+                records = []
+        if records:
+            yield pd.DataFrame(records, dtype=object)
+
+
+def read_incidents(source, chunk_rows=CHUNK_ROWS):
+    """Yield string DataFrame chunks from a CSV/JSONL path, or one chunk from a list of dicts / DataFrame."""
+    if isinstance(source, pd.DataFrame):
+        yield _as_strings(source)
+        return
+    if isinstance(source, (list, tuple)):
+        yield _as_strings(pd.DataFrame(list(source), dtype=object))
+        return
+    if str(source).endswith((".jsonl", ".json")):
+        yield from (_as_strings(c) for c in _read_jsonl(source, chunk_rows))
+    else:
+        yield from (c.fillna("") for c in pd.read_csv(source, dtype=str, chunksize=chunk_rows))
+
+
+def _open_claim_customers(claims):
+    """Customers whose most recent claim (file order, as fnol_claim_tool checks) is open."""
+    if claims.empty:
+        return pd.Index([])
+    latest = claims.drop_duplicates("customer_id", keep="last")
+    return pd.Index(latest.loc[latest["claim_status"].isin(OPEN_STATUSES), "customer_id"])
+
+
+@traced("fnol_bulk_tool")
+def fnol_bulk_ingest(source, chunk_rows=CHUNK_ROWS, dry_run=False):
+    """
+    Ingest a batch of FNOLs. Returns a summary dict plus the rejected rows
+    (with a 'reason' column) under "rejects".
+    """
+    t0 = time.perf_counter()
+    customers = pd.Index(get_table("customers").get("customer_id", pd.Series(dtype=str)).str.strip())
+
+    accepted, rejected, seen = [], [], pd.Index([])
+    received = 0
+    for chunk in read_incidents(source, chunk_rows):
+        received += len(chunk)
+        chunk = chunk.reindex(columns=INPUT_COLUMNS, fill_value="")
+        chunk["customer_id"] = chunk["customer_id"].str.strip()
+        for column, value in DEFAULTS.items():
+            chunk[column] = chunk[column].mask(chunk[column].str.strip() == "", value)
+
+        cid = chunk["customer_id"]
+        reason = np.select(
+            [~cid.isin(customers), cid.isin(seen) | cid.duplicated(keep="first")],
+            ["unknown customer", "duplicate in batch"],
+            default="",
+        )
+        ok = reason == ""
+        accepted.append(chunk[ok])
+        seen = seen.append(pd.Index(cid[ok]))
+        if (~ok).any():
+            rejected.append(chunk[~ok].assign(reason=reason[~ok]))
+
+    new = pd.concat(accepted, ignore_index=True) if accepted else pd.DataFrame(columns=INPUT_COLUMNS)
+
+    # Open-claim check, ID allocation and the append must not interleave
+    # with other writers (fnol_claim_tool turns, other workers or runs)
+    with dataset_lock("claims"):
+        has_open = new["customer_id"].isin(_open_claim_customers(get_table("claims")))
+        if has_open.any():
+            rejected.append(new[has_open].assign(reason="open claim exists"))
+            new = new[~has_open].reset_index(drop=True)
+
+        # One contiguous block of claim IDs, then a single append
+        start = row_count("claims") + 1
+        numbers = pd.Series(np.arange(start, start + len(new)), dtype="int64").astype(str).str.zfill(3)
+        new.insert(0, "claim_id", "CLM" + numbers)
+        new["incident_date"] = new["incident_date"].mask(
+            new["incident_date"].str.strip() == "", datetime.now().strftime("%Y-%m-%d")
+        )
+        new["claim_status"] = "New"
+        new["settlement_date"] = ""
+        if len(new) and not dry_run:
+            append_rows("claims", new)
+
+    rejects = pd.concat(rejected, ignore_index=True) if rejected else pd.DataFrame(columns=[*INPUT_COLUMNS, "reason"])
+
+    counts = rejects["reason"].value_counts().to_dict() if len(rejects) else {}
+    return {
+        "received": received,
+        "created": len(new),
+        "unknown_customer": counts.get("unknown customer", 0),
+        "open_claim_exists": counts.get("open claim exists", 0),
+        "duplicate_in_batch": counts.get("duplicate in batch", 0),
+        "first_claim_id": new["claim_id"].iloc[0] if len(new) else None,
+        "last_claim_id": new["claim_id"].iloc[-1] if len(new) else None,
+        "dry_run": dry_run,
+        "elapsed_s": round(time.perf_counter() - t0, 3),
+        "rejects": rejects,
+    }
+
+
+afnol_bulk_ingest = blocking_to_async(fnol_bulk_ingest)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-create claims from a CSV or JSONL file of FNOLs.")
+    parser.add_argument("source", help="incidents .csv or .jsonl (needs customer_id; other claim fields optional)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--rejects", help="write rejected rows with a reason column to this CSV")
+    parser.add_argument("--dry-run", action="store_true", help="validate and report without writing claims")
+    args = parser.parse_args()
+
+    summary = fnol_bulk_ingest(args.source, args.chunk_rows, args.dry_run)
+    rejects = summary.pop("rejects")
+    if args.rejects and len(rejects):
+        os.makedirs(os.path.dirname(args.rejects) or ".", exist_ok=True)
+        rejects.to_csv(args.rejects, index=False)
+    print(json.dumps(summary, indent=2))
@@ -1,14 +1,26 @@
 import pandas as pd
 from datetime import datetime
+from tracing import traced
+from async_runtime import blocking_to_async
+from data_store import get_partition, row_count, append_rows, dataset_lock
 
+@traced("fnol_claim_tool")
 def fnol_claim_tool(customer_id: str, incident_type: str = "Accident", remarks: str = "Initial FNOL logged") -> str:
     """
     Simulates logging or checking claim status.
     If claim exists → show latest status.
     If not → create a new one.
     """
-    claims_path = "data/claims.csv"
-    df = pd.read_csv(claims_path)
+    # Check-then-create must not interleave with other turns (threads, the
+    # async API, worker processes): they would both see "no open claim" or
+    # take the same claim ID
+    with dataset_lock("claims"):
+        return _claim_status_or_create(customer_id, incident_type, remarks)
+
+
+def _claim_status_or_create(customer_id, incident_type, remarks):
+    # Only this customer's shard is loaded in the partitioned layout
+    df = get_partition("claims", customer_id)
 
     existing = df[df["customer_id"] == customer_id]
 
@@ -23,7 +35,7 @@ def fnol_claim_tool(customer_id: str, incident_type: str = "Accident", remarks:
         )
 
     # Otherwise create a new claim
-    new_claim_id = f"CLM{len(df)+1:03d}"
+    new_claim_id = f"CLM{row_count('claims')+1:03d}"
     new_row = {
         "claim_id": new_claim_id,
         "customer_id": customer_id,
@@ -37,7 +49,11 @@ def fnol_claim_tool(customer_id: str, incident_type: str = "Accident", remarks:
         "remarks": remarks,
     }
 
-    df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-    df.to_csv(claims_path, index=False)
+    # Append the one row instead of rewriting the file; the data store
+    # picks it up as a delta and extends the claims index in place
+    append_rows("claims", pd.DataFrame([new_row]))
 
     return f"✅ New claim {new_claim_id} created for {incident_type}. You can track it later for updates."
+
+
+afnol_claim_tool = blocking_to_async(fnol_claim_tool)
@@ -1,16 +1,23 @@
-import pandas as pd
+from tracing import traced
+from async_runtime import blocking_to_async
+from data_store import get_partition
+from collections_job import recompute_overdue
 
+@traced("payment_lookup_tool")
 def payment_lookup_tool(customer_id: str) -> str:
     """
     Looks up payment details for a given customer_id.
     """
-    df = pd.read_csv("data/payments.csv")
+    df = get_partition("payments", customer_id)
+    if df.empty:
+        return "No payment record found for this customer."
 
     record = df[df["customer_id"] == customer_id]
     if record.empty:
         return "No payment record found for this customer."
 
-    row = record.iloc[0]
+    # Stored overdue_days / payment_status are stale; derive them for today
+    row = recompute_overdue(record.iloc[:1]).iloc[0]
     status = row["payment_status"]
     message = (
         f"💰 Loan Number: {row['loan_number']}\n"
@@ -25,3 +32,6 @@ def payment_lookup_tool(customer_id: str) -> str:
     else:
         message += f"✅ Status: {status}\nRemarks: {row['remarks']}"
     return message
+
+
+apayment_lookup_tool = blocking_to_async(payment_lookup_tool)
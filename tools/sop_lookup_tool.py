@@ -1,6 +1,9 @@
 import json
 import os
+from tracing import traced
+from async_runtime import blocking_to_async
 
+@traced("sop_lookup_tool")
 def sop_lookup_tool(user_query: str) -> str:
     """
     Searches SOP data for matching question patterns with error handling.
@@ -30,3 +33,6 @@ def sop_lookup_tool(user_query: str) -> str:
 
     # Default fallback if nothing matches
     return "Sorry, I couldn't find a standard process for that. Would you like to connect to an agent?"
+
+
+asop_lookup_tool = blocking_to_async(sop_lookup_tool)
@@ -4,17 +4,39 @@
 
 import pandas as pd
 import os
+import time
+import threading
+from collections import OrderedDict
+from data_store import get_table, table_version, partitioned, resolve_customer, get_partition, iter_partitions
+from tracing import traced
+from async_runtime import blocking_to_async
 
 DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data")
 CUSTOMER_FILE = os.path.join(DATA_PATH, "customers.csv")
 
+_normalized = (None, None)  # (source table, normalized view)
 
-def _load_customers():
+# Outcome cache, including "not found" results, so repeated or random
+# lookups don't rescan the customer table. Keys carry the customers table
+# version, so a change to customers invalidates every entry at once, while
+# claims/payments appends leave the cache alone.
+CACHE_TTL_SECONDS = float(os.getenv("VERIFY_CACHE_TTL_SECONDS", "60"))
+CACHE_MAX_ENTRIES = int(os.getenv("VERIFY_CACHE_MAX_ENTRIES", "10000"))
+_results = OrderedDict()  # key -> (expires_at, result)
+_results_lock = threading.Lock()
+
+
+def _load_customers(source=None):
     """Load customer master data flexibly across different header styles."""
-    if not os.path.exists(CUSTOMER_FILE):
+    global _normalized
+    source = get_table("customers") if source is None else source
+    if source.empty:
         return pd.DataFrame()
+    if _normalized[0] is source:
+        return _normalized[1]
 
-    df = pd.read_csv(CUSTOMER_FILE, dtype=str).fillna("")
+    # Work on a shallow copy so the shared table is never mutated
+    df = source.copy(deep=False)
 
     # Normalize all possible header variants
     rename_map = {}
@@ -34,11 +56,51 @@ def _load_customers():
 
     # Apply rename
     if rename_map:
-        df = df.rename(columns=rename_map)
+        df = df.rename(columns=rename_map, copy=False)
 
+    _normalized = (source, df)
     return df
 
 
+def _norm_phone(p):
+    return "".join([c for c in str(p) if c.isdigit()])
+
+
+def normalize_query(query: dict):
+    """The (loan, phone, name) triple a lookup actually depends on."""
+    return (
+        str(query.get("loan", "")).strip().lower(),
+        _norm_phone(query.get("phone", "")),
+        " ".join(str(query.get("name", "")).split()).lower(),
+    )
+
+
+def _cache_get(key):
+    with _results_lock:
+        hit = _results.get(key)
+        if hit is None:
+            return None
+        if hit[0] < time.time():
+            del _results[key]
+            return None
+        _results.move_to_end(key)
+        return hit[1]
+
+
+def _cache_put(key, result):
+    with _results_lock:
+        _results[key] = (time.time() + CACHE_TTL_SECONDS, result)
+        _results.move_to_end(key)
+        while len(_results) > CACHE_MAX_ENTRIES:
+            _results.popitem(last=False)
+
+
+def clear_verification_cache():
+    with _results_lock:
+        _results.clear()
+
+
+@traced("verify_user_tool")
 def verify_user_tool(query: dict):
     """
     query: dict with any of {'name': 'John Doe', 'loan': 'LN001', 'phone': '9999999990'}
@@ -46,13 +108,55 @@ def verify_user_tool(query: dict):
         {'ok': True, 'customer_id': 'C001', 'first_name': 'John', 'last_name': 'Doe', ...}
         or {'ok': False, 'reason': 'not found'}
     """
-    df = _load_customers()
+    loan, phone, name = normalize_query(query)
+    if not (loan or phone or name):
+        return {"ok": False, "reason": "no verification info provided"}
+
+    if not partitioned():
+        get_table("customers")  # load/refresh first, so the key has the version the lookup reads
+    key = (table_version("customers"), loan, phone, name)
+    cached = _cache_get(key) if CACHE_TTL_SECONDS > 0 else None
+    if cached is not None:
+        return dict(cached)
+
+    result = _lookup(loan, phone, name)
+    if CACHE_TTL_SECONDS > 0:
+        _cache_put(key, result)
+    return dict(result)
+
+
+def _customer_tables(loan, phone):
+    """
+    Tables to search: the customer table, or in the partitioned layout only
+    the shard the key index maps a loan/phone to (a name-only search still
+    has to walk every shard).
+    """
+    if not partitioned():
+        yield get_table("customers")
+    elif loan or phone:
+        customer_id = resolve_customer(loan=loan, phone=phone)
+        if customer_id:
+            yield get_partition("customers", customer_id)
+    else:
+        yield from iter_partitions("customers")
+
+
+def _lookup(loan, phone, name):
+    result = None
+    for source in _customer_tables(loan, phone):
+        found = _lookup_in(_load_customers(source), loan, phone, name)
+        if found.get("ok"):
+            return found
+        if result is None or not source.empty:
+            result = found
+    # No table to search means the key index already ruled the customer out
+    return result or {"ok": False, "reason": "not found"}
+
+
+def _lookup_in(df, loan, phone, name):
     if df.empty:
         return {"ok": False, "reason": "no customer data available"}
 
-    name = str(query.get("name", "")).strip().lower()
-    loan = str(query.get("loan", "")).strip().lower()
-    phone = str(query.get("phone", "")).strip()
     matched = pd.DataFrame()
 
     # --- Search by Loan ID ---
@@ -63,27 +167,18 @@ def verify_user_tool(query: dict):
 
     # --- Search by Phone ---
     elif phone:
-        def norm_phone(p):
-            return "".join([c for c in str(p) if c.isdigit()])
-
         if "Phone" in df.columns:
             phone_series = df["Phone"].astype(str)
         else:
             phone_series = pd.Series([""] * len(df))
 
-        df["__norm_phone"] = phone_series.apply(norm_phone)
-        norm_query_phone = norm_phone(phone)
-        matched = df[df["__norm_phone"] == norm_query_phone]
-        df.drop(columns=["__norm_phone"], inplace=True, errors="ignore")
+        matched = df[(phone_series.apply(_norm_phone) == phone).to_numpy()]
 
     # --- Search by Name ---
     elif name:
         if "CustomerName" not in df.columns:
             return {"ok": False, "reason": "name column missing in data"}
-        matched = df[df["CustomerName"].astype(str).str.lower().str.contains(name)]
-
-    else:
-        return {"ok": False, "reason": "no verification info provided"}
+        matched = df[df["CustomerName"].astype(str).str.lower().str.contains(name, regex=False)]
 
     if matched.empty:
         return {"ok": False, "reason": "not found"}
@@ -101,3 +196,21 @@ def verify_user_tool(query: dict):
         "last_name": last,
         **row,
     }
+
+
+def verify_customer(customer_id):
+    """
+    Verification result for a known customer_id, as if they had verified with
+    their loan number (batch runs that start out verified).
+    """
+    customer_id = str(customer_id).strip()
+    customers = get_partition("customers", customer_id)
+    if customers.empty or "loan_number" not in customers.columns:
+        return {"ok": False, "reason": "not found"}
+    loans = customers.loc[customers["customer_id"].astype(str).str.strip() == customer_id, "loan_number"]
+    if loans.empty or not str(loans.iloc[0]).strip():
+        return {"ok": False, "reason": "not found"}
+    return verify_user_tool({"loan": loans.iloc[0]})
+
+
+averify_user_tool = blocking_to_async(verify_user_tool)
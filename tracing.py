@@ -0,0 +1,267 @@
+# ===========================================
+# tracing.py (Lightweight Per-Turn Tracing & Metrics)
+# ===========================================
+"""
+Nested spans with a per-turn trace ID around verification, routing, tools
+and LLM calls. Finished traces are appended to a JSONL file and every span
+feeds a Prometheus latency histogram (text file and optional /metrics port).
+
+Disabled unless AUTOFIN_TRACING=1; a disabled span is a shared no-op object,
+so instrumented code pays one attribute check per call.
+"""
+
+import os
+import json
+import time
+import uuid
+import inspect
+import functools
+import threading
+import contextvars
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+TRACE_FILE = os.getenv("AUTOFIN_TRACE_FILE", "logs/traces.jsonl")
+METRICS_FILE = os.getenv("AUTOFIN_METRICS_FILE", "logs/metrics.prom")
+METRICS_FLUSH_SECONDS = float(os.getenv("AUTOFIN_METRICS_FLUSH_SECONDS", "5"))
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _State:
+    enabled = os.getenv("AUTOFIN_TRACING", "0") == "1"
+
+
+_current = contextvars.ContextVar("autofin_span", default=None)
+
+
+def set_tracing(enabled: bool):
+    _State.enabled = bool(enabled)
+
+
+def tracing_enabled() -> bool:
+    return _State.enabled
+
+
+# ----------------------------------------------------------------
+# Metrics
+# ----------------------------------------------------------------
+class StageMetrics:
+    """Per-stage latency histograms and error counters (thread-safe)."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counts = {}  # stage -> [bucket counts..., +Inf]
+        self._sums = {}
+        self._errors = {}
+        self._counters = {}  # (counter name, kind) -> count
+        self._last_flush = 0.0
+
+    def observe(self, stage, seconds, error=False):
+        with self._lock:
+            counts = self._counts.get(stage)
+            if counts is None:
+                counts = self._counts[stage] = [0] * (len(self.buckets) + 1)
+                self._sums[stage] = 0.0
+                self._errors[stage] = 0
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._sums[stage] += seconds
+            if error:
+                self._errors[stage] += 1
+
+    def count(self, name, kind):
+        """Increment a labelled counter (e.g. fallbacks by kind); always on, tracing or not."""
+        with self._lock:
+            key = (name, kind)
+            self._counters[key] = self._counters.get(key, 0) + 1
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        lines = [
+            "# HELP autofin_stage_latency_seconds Latency of agent pipeline stages.",
+            "# TYPE autofin_stage_latency_seconds histogram",
+        ]
+        with self._lock:
+            for stage in sorted(self._counts):
+                cumulative = 0
+                for bound, n in zip(self.buckets + (float("inf"),), self._counts[stage]):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'autofin_stage_latency_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'autofin_stage_latency_seconds_sum{{stage="{stage}"}} {self._sums[stage]:.6f}')
+                lines.append(f'autofin_stage_latency_seconds_count{{stage="{stage}"}} {cumulative}')
+            lines.append("# HELP autofin_stage_errors_total Stages that raised an exception.")
+            lines.append("# TYPE autofin_stage_errors_total counter")
+            for stage in sorted(self._errors):
+                lines.append(f'autofin_stage_errors_total{{stage="{stage}"}} {self._errors[stage]}')
+            for name in sorted({n for n, _ in self._counters}):
+                lines.append(f"# TYPE {name} counter")
+                for (n, kind), value in sorted(self._counters.items()):
+                    if n == name:
+                        lines.append(f'{name}{{kind="{kind}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path=None, force=False):
+        """Write the metrics file, at most once per METRICS_FLUSH_SECONDS unless forced."""
+        now = time.time()
+        if not force and now - self._last_flush < METRICS_FLUSH_SECONDS:
+            return
+        self._last_flush = now
+        path = path or METRICS_FILE
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+            self._sums.clear()
+            self._errors.clear()
+            self._counters.clear()
+
+
+metrics = StageMetrics()
+_export_lock = threading.Lock()
+
+
+def _export(spans):
+    os.makedirs(os.path.dirname(TRACE_FILE) or ".", exist_ok=True)
+    with _export_lock, open(TRACE_FILE, "a", encoding="utf-8") as f:
+        for s in spans:
+            f.write(json.dumps(s, ensure_ascii=False, default=str) + "\n")
+    metrics.write()
+
+
+# ----------------------------------------------------------------
+# Spans
+# ----------------------------------------------------------------
+class _NoopSpan:
+    trace_id = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.parent = _current.get()
+        self.trace_id = self.parent.trace_id if self.parent else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:8]
+        # The root span collects finished children and exports them together
+        self.finished = self.parent.finished if self.parent else []
+        self._token = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._t0
+        _current.reset(self._token)
+        record = {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round(duration * 1000.0, 3),
+            "attrs": self.attrs,
+        }
+        if exc_type is not None:
+            record["error"] = f"{exc_type.__name__}: {exc}"
+        self.finished.append(record)
+        metrics.observe(self.name, duration, error=exc_type is not None)
+        if self.parent is None:
+            _export(self.finished)
+        return False
+
+
+def span(name, **attrs):
+    """Open a child span (or a new trace if none is active)."""
+    if not _State.enabled:
+        return _NOOP
+    return Span(name, attrs)
+
+
+def current_trace_id():
+    s = _current.get()
+    return s.trace_id if s else None
+
+
+def traced(name):
+    """Decorator form of span() for tools and agent entrypoints."""
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            # The span must stay open across the awaits, not just coroutine creation
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _State.enabled:
+                    return await func(*args, **kwargs)
+                with Span(name, {}):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _State.enabled:
+                return func(*args, **kwargs)
+            with Span(name, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# ----------------------------------------------------------------
+# /metrics endpoint
+# ----------------------------------------------------------------
+def start_metrics_server(port=None, host="0.0.0.0"):
+    """Serve Prometheus metrics on http://host:port/metrics from a daemon thread."""
+    port = int(port or os.getenv("AUTOFIN_METRICS_PORT", "9464"))
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"📈 Metrics available on http://{host}:{port}/metrics")
+    return server
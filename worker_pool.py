@@ -0,0 +1,318 @@
+# ===========================================
+# worker_pool.py (Multi-Process Agent Serving Mode)
+# ===========================================
+"""
+Shards sessions across N worker processes with sticky routing by session ID.
+The read-only customer/payment/claim tables are published once into shared
+memory by the parent; workers attach to them instead of loading their own copy.
+
+Run as a small JSON HTTP service:
+    python worker_pool.py --workers 16 --port 8600
+    curl -X POST localhost:8600/chat -d '{"session_id": "s1", "message": "LN001"}'
+"""
+
+import os
+import io
+import json
+import time
+import zlib
+import pickle
+import argparse
+import threading
+import itertools
+import multiprocessing as mp
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait as mp_wait
+
+import pandas as pd
+
+from data_store import snapshot_tables, install_tables
+from agent_modes import AGENT_MODES, create_agent, run_turn, bind_customer
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - pyarrow ships with streamlit
+    pa = None
+
+WORKER_MAX_SESSIONS = int(os.getenv("WORKER_MAX_SESSIONS", "1000"))
+WORKER_REQUEST_TIMEOUT_S = float(os.getenv("WORKER_REQUEST_TIMEOUT_S", "60"))
+
+
+# ----------------------------------------------------------------
+# Shared-memory tables
+# ----------------------------------------------------------------
+def publish_tables(tables):
+    """
+    Copy each DataFrame into its own shared-memory block.
+    Returns (manifest, blocks); the manifest is small and picklable, the
+    blocks must stay referenced by the parent until workers exit.
+    """
+    manifest, blocks = {}, []
+    for name, df in tables.items():
+        if pa is not None:
+            sink = pa.BufferOutputStream()
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            payload = sink.getvalue()
+            fmt = "arrow"
+        else:
+            payload = pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+            fmt = "pickle"
+
+        size = len(payload)
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        shm.buf[:size] = memoryview(payload).cast("B")
+        blocks.append(shm)
+        manifest[name] = {"shm": shm.name, "size": size, "format": fmt}
+    return manifest, blocks
+
+
+def _open_block(name):
+    """Attach to a block without letting this worker's exit unlink it (the parent owns it)."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: workers share the parent's resource tracker, which
+        # already holds this block, so attaching does not add an owner.
+        return shared_memory.SharedMemory(name=name)
+
+
+def attach_tables(manifest):
+    """
+    Open the shared blocks in a worker and rebuild DataFrames on top of them.
+    With pyarrow the columns are Arrow-backed views of shared memory (no copy).
+    """
+    tables, blocks = {}, []
+    for name, info in manifest.items():
+        shm = _open_block(info["shm"])
+        blocks.append(shm)
+        view = shm.buf[: info["size"]]
+        if info["format"] == "arrow":
+            table = pa.ipc.open_stream(pa.py_buffer(view)).read_all()
+            tables[name] = table.to_pandas(types_mapper=pd.ArrowDtype)
+        else:
+            tables[name] = pickle.load(io.BytesIO(view))
+    return tables, blocks
+
+
+# ----------------------------------------------------------------
+# Worker process
+# ----------------------------------------------------------------
+def _worker_main(worker_id, manifest, meta, inbox, replies):
+    tables, _blocks = attach_tables(manifest)
+    # With the parent's file metadata, rows appended later (by any worker) are picked up as deltas
+    install_tables(tables, meta)
+    agents = OrderedDict()  # (session_id, mode) -> agent, LRU-bounded
+
+    while True:
+        msg = inbox.get()
+        if msg is None:
+            break
+        request_id, session_id, mode, text, customer = msg
+        key = (session_id, mode)
+        t0 = time.perf_counter()
+        try:
+            agent = agents.get(key)
+            if agent is None:
+                agent = create_agent(mode, session_id=session_id)
+                agents[key] = agent
+                if len(agents) > WORKER_MAX_SESSIONS:
+                    agents.popitem(last=False)
+            agents.move_to_end(key)
+            response = run_turn(agent, mode, text, context=bind_customer(agent, mode, customer))
+        except Exception as e:
+            response = f"⚠️ Worker {worker_id} Error — {type(e).__name__}: {e}"
+        replies.send((request_id, response, time.perf_counter() - t0))
+
+    # Arrow columns keep the shared buffers exported until the very end, so
+    # exit without running SharedMemory finalizers (replies are sent synchronously).
+    replies.close()
+    os._exit(0)
+
+
+class AgentWorkerPool:
+    """
+    Parent-side handle: routes each turn to worker crc32(session_id) % N,
+    so a session always lands on the same process and keeps its state there.
+    Each worker replies on its own pipe, so one that dies (even mid-reply)
+    cannot block the others; its pending turns fail with RuntimeError and a
+    replacement is started (its sessions start over).
+    """
+
+    def __init__(self, n_workers=None, default_mode="supervisor", start_method=None):
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.default_mode = default_mode
+        self._ctx = mp.get_context(start_method or os.getenv("WORKER_START_METHOD", "spawn"))
+        self._ids = itertools.count()
+        self._pending = {}  # request_id -> (future, worker_id)
+        self._pending_lock = threading.Lock()
+        self._workers, self._inboxes, self._replies, self._blocks = [], [], [], []
+        self._collector = None
+        self._manifest = self._meta = None
+        self._closing = False
+
+    def start(self):
+        tables, self._meta = snapshot_tables()
+        self._manifest, self._blocks = publish_tables(tables)
+        self._workers = [None] * self.n_workers
+        self._inboxes = [None] * self.n_workers
+        self._replies = [None] * self.n_workers
+        for worker_id in range(self.n_workers):
+            self._spawn(worker_id)
+
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+        print(f"🧵 Started {self.n_workers} agent workers")
+        return self
+
+    def _spawn(self, worker_id):
+        inbox = self._ctx.Queue()
+        reader, writer = self._ctx.Pipe(duplex=False)
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self._manifest, self._meta, inbox, writer),
+            daemon=True,
+        )
+        proc.start()
+        writer.close()  # the worker holds the only write end
+        self._inboxes[worker_id], self._replies[worker_id], self._workers[worker_id] = inbox, reader, proc
+
+    def _collect(self):
+        while True:
+            # Exited workers are dropped here once their pipe is closed; after close() none are left
+            live = [(i, proc, reader) for i, (proc, reader) in enumerate(zip(self._workers, self._replies))
+                    if not reader.closed]
+            if not live:
+                break
+            ready = set(mp_wait([reader for _, _, reader in live] + [proc.sentinel for _, proc, _ in live], timeout=1.0))
+            for worker_id, proc, reader in live:
+                if reader in ready:
+                    self._receive(reader)
+                if proc.sentinel in ready:
+                    while self._receive(reader):  # replies sent before it exited
+                        pass
+                    reader.close()
+                    proc.join()  # already exited; collects the exit code
+                    if not self._closing:
+                        self._replace(worker_id, proc)
+
+    def _receive(self, reader):
+        """Resolve one reply if one is waiting; False once the pipe is empty or closed."""
+        try:
+            if not reader.poll():
+                return False
+            request_id, response, turn_s = reader.recv()
+        except (EOFError, OSError):
+            return False
+        with self._pending_lock:
+            future, _ = self._pending.pop(request_id, (None, None))
+        if future is not None:
+            future.turn_s = turn_s  # time the worker spent on the turn, without queueing
+            future.set_result(response)
+        return True
+
+    def _replace(self, worker_id, proc):
+        """Fail the turns of a worker that exited unexpectedly and start a replacement."""
+        with self._pending_lock:
+            # Turns submitted from here on go to the replacement's inbox
+            self._spawn(worker_id)
+            lost = [rid for rid, (_, wid) in self._pending.items() if wid == worker_id]
+            futures = [self._pending.pop(rid)[0] for rid in lost]
+        error = RuntimeError(f"worker {worker_id} exited with code {proc.exitcode}")
+        for future in futures:
+            future.turn_s = 0.0
+            future.set_exception(error)
+        print(f"⚠️ Worker {worker_id} exited ({proc.exitcode}); failed {len(futures)} pending turns and restarted it")
+
+    def worker_for(self, session_id: str) -> int:
+        return zlib.crc32(str(session_id).encode("utf-8")) % self.n_workers
+
+    def submit(self, session_id: str, message: str, mode: str = None, customer: str = None) -> Future:
+        """Queue one turn; with `customer` the session answers as that verified customer (agent_modes.bind_customer)."""
+        mode = mode or self.default_mode
+        if mode not in AGENT_MODES:
+            raise ValueError(f"Unknown agent mode: {mode}")
+        request_id = next(self._ids)
+        worker_id = self.worker_for(session_id)
+        future = Future()
+        with self._pending_lock:
+            self._pending[request_id] = (future, worker_id)
+            self._inboxes[worker_id].put((request_id, session_id, mode, message, customer))
+        return future
+
+    def chat(self, session_id: str, message: str, mode: str = None, timeout=None, customer: str = None) -> str:
+        return self.submit(session_id, message, mode, customer=customer).result(timeout=timeout)
+
+    def close(self):
+        self._closing = True
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for proc in self._workers:
+            proc.join(timeout=5)
+        if self._collector is not None:
+            self._collector.join(timeout=5)
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._workers, self._inboxes, self._replies, self._blocks = [], [], [], []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ----------------------------------------------------------------
+# HTTP front end
+# ----------------------------------------------------------------
+def serve(pool: AgentWorkerPool, host="0.0.0.0", port=8600, timeout=WORKER_REQUEST_TIMEOUT_S):
+    class ChatHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/chat":
+                self.send_error(404)
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                response = pool.chat(body["session_id"], body["message"], body.get("mode"),
+                                     timeout=timeout, customer=body.get("customer"))
+                payload, code = {"response": response}, 200
+            except (KeyError, ValueError) as e:
+                payload, code = {"error": str(e)}, 400
+            except FutureTimeout:
+                payload, code = {"error": f"no reply within {timeout:g}s"}, 504
+            except RuntimeError as e:
+                payload, code = {"error": str(e)}, 503
+
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), ChatHandler)
+    print(f"🌐 Serving agents on http://{host}:{port}/chat")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve agents from a multi-process worker pool.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--mode", choices=AGENT_MODES, default="supervisor")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8600)
+    args = parser.parse_args()
+
+    with AgentWorkerPool(args.workers, default_mode=args.mode) as pool:
+        serve(pool, args.host, args.port)